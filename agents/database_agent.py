@@ -1,23 +1,25 @@
-import streamlit as st
+import json
+import re
 import sqlite3
 import pandas as pd
-from utils.database import create_tables, create_metadata, get_metaschema
-from openai import OpenAI
+from utils.database import PATH, create_tables, create_metadata, get_metaschema
+from utils.ledger import current_ledger, run_scope
+from utils.runtime import RuntimeContext, current_runtime
+from utils.tracing import span
 from dotenv import find_dotenv, load_dotenv
 from typing import Tuple
 
 # Load environment variables
 load_dotenv(find_dotenv())
 
-PATH = 'data/rca_data.db'
-
 def evaluate_and_refine_sql(
     question: str,
     sql_query: str,
     df: pd.DataFrame,
     schema: str,
     model: str = "gpt-5",
-    sql_error: Exception = None
+    sql_error: Exception = None,
+    runtime: RuntimeContext | None = None
 ) -> Tuple[str, str]:
     """
     Evaluates SQL query results and refines the query if needed to better answer the user's question.
@@ -31,6 +33,7 @@ def evaluate_and_refine_sql(
         df (pd.DataFrame): The resulting DataFrame from executing the SQL query.
         schema (str): The database schema information for reference.
         model (str, optional): The language model to use for evaluation. Defaults to "gpt-5".
+        runtime (RuntimeContext, optional): Client and cache settings; defaults to the current runtime.
 
     Returns:
         Tuple[str, str]: A tuple containing:
@@ -41,9 +44,6 @@ def evaluate_and_refine_sql(
         If the LLM response is not valid JSON, the function falls back to returning
         the original SQL query with the raw response as feedback.
     """
-    # Get client from session state
-    client = st.session_state.get("client") or OpenAI()
-
     prompt = f"""
 You are an expert SQL reviewer specializing in query optimization and accuracy validation.
 
@@ -82,13 +82,14 @@ Return ONLY a valid JSON object with this exact structure:
 Do not include any text outside the JSON object.
 """
 
-    response = client.chat.completions.create(
+    response = (runtime or current_runtime()).chat(
+        [{"role": "user", "content": prompt}],
         model=model,
-        messages=[{"role": "user", "content": prompt}],
+        agent="evaluate_and_refine_sql",
     )
 
     import json
-    content = response.choices[0].message.content
+    content = response.content
 
     # Strip markdown code blocks and fix Python-style booleans
     content_clean = content.strip().removeprefix("```json").removeprefix("```").removesuffix("```").strip()
@@ -110,7 +111,8 @@ Do not include any text outside the JSON object.
 
     return feedback, refined_sql
 
-def database_interpreter(query: str, sql_gen_ref: pd.DataFrame, metadata: str, model: str = "gpt-5") -> Tuple[str, bool]:
+def database_interpreter(query: str, sql_gen_ref: pd.DataFrame, metadata: str, model: str = "gpt-5",
+                         runtime: RuntimeContext | None = None) -> Tuple[str, bool]:
     """
     Converts SQL query results into a natural language answer for the user's question.
 
@@ -122,6 +124,7 @@ def database_interpreter(query: str, sql_gen_ref: pd.DataFrame, metadata: str, m
         sql_gen_ref (pd.DataFrame): The DataFrame containing the SQL query results.
         metadata (str): The database schema metadata for context.
         model (str, optional): The language model to use for interpretation. Defaults to "gpt-5".
+        runtime (RuntimeContext, optional): Client and cache settings; defaults to the current runtime.
 
     Returns:
         Tuple[str, bool]: A tuple containing:
@@ -132,8 +135,6 @@ def database_interpreter(query: str, sql_gen_ref: pd.DataFrame, metadata: str, m
         The response focuses on clarity and readability, avoiding SQL syntax and technical jargon
         where possible. If results are empty, it explains that no data was found.
     """
-    # Get client from session state
-    client = st.session_state.get("client") or OpenAI()
     prompt = f"""
 You are an expert data analyst translating database query results into clear, actionable insights.
 
@@ -160,13 +161,15 @@ Return ONLY a valid JSON object with this exact structure:
 }}
 Do not include any text outside the JSON object.
 """
-    response = client.chat.completions.create(
+    response = (runtime or current_runtime()).chat(
+        [{"role": "user", "content": prompt}],
         model=model,
-        messages=[{"role": "user", "content": prompt}],
+        agent="database_interpreter",
+        stream=True,
     )
 
     import json
-    content = response.choices[0].message.content
+    content = response.content
     # Strip markdown code blocks and fix Python-style booleans
     content_clean = content.strip().removeprefix("```json").removeprefix("```").removesuffix("```").strip()
     content_clean = content_clean.replace(": True", ": true").replace(": False", ": false")
@@ -185,7 +188,27 @@ Do not include any text outside the JSON object.
         success = False
     return output, success
 
-def database_agent(query: str, model: str = "gpt-5", return_details: bool = False, max_refine_attempts: int = 5) -> str | dict:
+def partial_answer(text: str) -> str:
+    """
+    Extracts the "output" value from a possibly incomplete `database_interpreter` JSON reply,
+    so the answer can be shown while it is still streaming.
+    """
+    match = re.search(r'"output"\s*:\s*"((?:[^"\\]|\\.)*)', text)
+    if not match:
+        return ""
+    value = match.group(1)
+    for end in (len(value), len(value) - 1):
+        try:
+            return json.loads(f'"{value[:end]}"')
+        except json.JSONDecodeError:
+            continue
+    return value
+
+
+@run_scope()
+@span("database_agent")
+def database_agent(query: str, model: str = "gpt-5", return_details: bool = False, max_refine_attempts: int = 5,
+                   runtime: RuntimeContext | None = None) -> str | dict:
     """
     Processes natural language database queries using a two-stage SQL generation and refinement workflow.
 
@@ -203,14 +226,17 @@ def database_agent(query: str, model: str = "gpt-5", return_details: bool = Fals
         query (str): The user's natural language question about the database.
         model (str, optional): The language model to use for SQL generation and interpretation.
         return_details (bool, optional): If True, returns a dict with all intermediate steps. Defaults to False.
+        max_refine_attempts (int, optional): Maximum number of evaluate-and-refine rounds.
+        runtime (RuntimeContext, optional): Client and cache settings; defaults to the current runtime.
 
     Returns:
         str or dict: If return_details is False, returns natural language answer.
                      If return_details is True, returns dict with 'answer', 'sql_v1', 'sql_v2',
-                     'feedback', 'results_v1', 'results_v2'.
+                     'feedback', 'results_v1', 'results_v2', 'iterations', 'used_tokens'.
     """
-    # Get client from session state
-    client = st.session_state.get("client") or OpenAI()
+    runtime = runtime or current_runtime()
+    ledger = current_ledger()
+    start_tokens = ledger.total_tokens
 
     #Initialize DB and get metadata
     conn = sqlite3.connect(PATH)
@@ -233,12 +259,13 @@ Do NOT include ```sql``` tags or any other text - just the raw SQL query.
 
 Now generate the SQL query for the user's question above:
 """
-    response = client.chat.completions.create(
+    response = runtime.chat(
+        [{"role": "user", "content": prompt}],
         model=model,
-        messages=[{"role": "user", "content": prompt}],
+        agent="database_agent",
     )
 
-    sql_gen_1 = response.choices[0].message.content.strip()
+    sql_gen_1 = response.content.strip()
 
     # Execute the first SQL query to get initial results
     q1 = sql_gen_1.strip().removeprefix("```sql").removesuffix("```").strip()
@@ -254,7 +281,9 @@ Now generate the SQL query for the user's question above:
                 'sql_v2': q1,
                 'feedback': 'Question is not related to the database schema',
                 'results_v1': pd.DataFrame(),
-                'results_v2': pd.DataFrame()
+                'results_v2': pd.DataFrame(),
+                'iterations': 0,
+                'used_tokens': ledger.total_tokens - start_tokens
             }
         return irrelevant_msg
 
@@ -269,7 +298,7 @@ Now generate the SQL query for the user's question above:
     for i in range(max_refine_attempts):
         # Evaluate and refine the SQL based on initial results
         if i == 0:
-            refined_sql=sql_gen_1,
+            refined_sql=sql_gen_1
             sql_gen_ref=sql_gen_orig
         feedback, refined_sql = evaluate_and_refine_sql(
                 question=query,
@@ -277,7 +306,8 @@ Now generate the SQL query for the user's question above:
                 df=sql_gen_ref,
                 schema=meta_schema,
                 model=model,
-                sql_error = sql_error
+                sql_error = sql_error,
+                runtime=runtime
             )
         # Execute the refined SQL query
         q2 = refined_sql.strip().removeprefix("```sql").removesuffix("```").strip()
@@ -287,7 +317,7 @@ Now generate the SQL query for the user's question above:
         except Exception as e:
             print(f"❌ Error executing refined query: {e}")
             sql_error = e
-        output, success = database_interpreter(query, sql_gen_ref, metadata=meta_schema, model=model)
+        output, success = database_interpreter(query, sql_gen_ref, metadata=meta_schema, model=model, runtime=runtime)
 
         print("Refinement Attempt", i+1)
         print("Success or not: ", success)
@@ -308,6 +338,8 @@ Now generate the SQL query for the user's question above:
             'sql_v2': q2,
             'feedback': feedback,
             'results_v1': sql_gen_orig,
-            'results_v2': sql_gen_ref
+            'results_v2': sql_gen_ref,
+            'iterations': i + 1,
+            'used_tokens': ledger.total_tokens - start_tokens
         }
     return output
@@ -1,17 +1,14 @@
-import streamlit as st
-from openai import OpenAI
+from utils.runtime import RuntimeContext, current_runtime
 from dotenv import find_dotenv, load_dotenv
 
 # Load environment variables
 load_dotenv(find_dotenv())
 
-def editor_agent(task: str, model: str = "gpt-5-mini") -> str:
+def editor_agent(task: str, model: str = "gpt-5-mini", runtime: RuntimeContext | None = None) -> str:
     """
     Executes editorial tasks such as reflection, critique, or revision.
     """
-    # Get client from session state
-    client = st.session_state.get("client") or OpenAI()
-
+    runtime = runtime or current_runtime()
     print("==================================")
     print("🧠 Editor Agent")
     print("==================================")
@@ -20,11 +17,8 @@ def editor_agent(task: str, model: str = "gpt-5-mini") -> str:
         {"role": "user", "content": task}
     ]
 
-    response = client.chat.completions.create(
-        model=model,
-        messages=messages
-    )
-    used_tokens = response.usage.total_tokens
+    response = runtime.chat(messages, model=model, agent="editor_agent", stream=True)
+    used_tokens = response.total_tokens
     print("Used Tokens:\n", used_tokens)
-    return response.choices[0].message.content, used_tokens
+    return response.content, used_tokens
 
@@ -1,19 +1,30 @@
-
+import contextvars
 import json
 import re
-from datetime import datetime
-import streamlit as st
-from .research_agent import research_agent
-from .editor_agent import editor_agent
-from .writer_agent import writer_agent
-from .medical_agent import medical_agent
 import time
-from openai import OpenAI
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
 from dotenv import find_dotenv, load_dotenv
 
+from .editor_agent import editor_agent
+from .medical_agent import medical_agent
+from .planner_agent import normalize_plan
+from .research_agent import research_agent
+from .router import route
+from .writer_agent import writer_agent
+from utils.budget import MODEL_BUDGETS, OPTIONAL_AGENTS, BudgetExceeded
+from utils.checkpoint import get_store as get_checkpoints
+from utils.ledger import record_routing
+from utils.run_store import RunStore
+from utils.runtime import RuntimeContext, current_runtime
+from utils.tracing import span
+
 # Load environment variables
 load_dotenv(find_dotenv())
 
+# Report returned when the planner produced no steps
+EMPTY_PLAN_MESSAGE = "⚠️ The planner returned no steps, so there was nothing to run. Try rephrasing the topic."
+
 
 def agent_register(page):
     if page == "researcher":
@@ -41,55 +52,71 @@ def clean_json_block(raw: str) -> str:
     return raw.strip()
 
 
-def executor_agent(plan_steps: list[str], model: str = "gpt-5-mini", page: str = "researcher"):
-    # Get client from session state
-    client = st.session_state.get("client") or OpenAI()
-
-    history = []
-
-    print("==================================")
-    print("🎯 Execution Agent")
-    print("==================================")
-    if "steps" not in st.session_state:
-        st.session_state.steps = [container1, container2, container3, container4, container5] = [None]*5
-        st.session_state.expanders = st.expander("Agent Steps", expanded=True)
+def route_step(step: str, runtime: RuntimeContext) -> tuple[str, str, int]:
+    """
+    Asks the model which agent should perform a step, for steps the planner did not assign
+    to a known agent and the local router could not decide.
 
-    total_used_token = 0
-    with st.session_state.expanders:
-        for i, step in enumerate(plan_steps):
-            st.session_state.steps[i] = st.container(border=True)
-            st.session_state.steps[i].write(f"Step {i+1}: {step}")
-    
-    for i, step in enumerate(plan_steps):
-        agent_decision_prompt = f"""
+    Returns:
+        tuple[str, str, int]: The agent name, the cleaned task and the tokens used.
+    """
+    agent_decision_prompt = f"""
         You are an execution manager for a multi-agent research team.
         
         Given the following instruction, identify which agent should perform it and extract the clean task.
         
         Return only a valid JSON object with two keys:
-        - "agent": one of {list(agent_register(page).keys())}
+        - "agent": one of {list(agent_register(runtime.page).keys())}
         - "task": a string with the instruction that the agent should follow
         
         Only respond with a valid JSON object. Do not include explanations or markdown formatting.
         
         Instruction: "{step}"
         """
-        response = client.chat.completions.create(
-            model=model,
-            messages=[{"role": "user", "content": agent_decision_prompt}]
+    with span("route"):
+        response = runtime.chat(
+            [{"role": "user", "content": agent_decision_prompt}],
+            model=runtime.router_model,
+            agent="executor_agent",
             )
-        
-        raw_content = response.choices[0].message.content
-        cleaned_json = clean_json_block(raw_content)
-        agent_info = json.loads(cleaned_json)
-        
-        agent_name = agent_info["agent"]
-        task = agent_info["task"]
+    try:
+        agent_info = json.loads(clean_json_block(response.content))
+        agent_name, task = agent_info["agent"], agent_info["task"]
+    except (json.JSONDecodeError, KeyError, TypeError) as e:
+        # Fallback if the model does not return the expected JSON: the writer works from the context so far
+        print(f"❌ JSON parsing error in route_step: {e}")
+        print(f"Raw response: {response.content}")
+        agent_name, task = "writer_agent", step
+    return agent_name, task, response.total_tokens
+
+
+def run_step(index: int, step: dict, store: RunStore, runtime: RuntimeContext) -> tuple[str, str, int, float]:
+    """
+    Runs one plan step on its agent. Called from worker threads.
+
+    Returns:
+        tuple[str, str, int, float]: The agent name, its output, the tokens used and the elapsed seconds.
+    """
+    start_time = time.time()
+    with span(f"step {index+1}", step=step["task"]) as step_span:
+        agent_registry = agent_register(runtime.page)
+        agent_name, task, used_token = step["agent"], step["task"], 0
+        source = "planner"
+        if agent_name not in agent_registry:
+            agent_name = route(task, list(agent_registry))
+            source = "rules"
+        if agent_name is None:
+            try:
+                agent_name, task, used_token = route_step(step["task"], runtime)
+                source = "llm"
+            except BudgetExceeded:
+                # No budget left to ask the model; the step is skipped below
+                agent_name = "writer_agent"
+        record_routing(source)
+        step_span.set("agent", agent_name)
+        step_span.set("routing", source)
+        context = store.context_for(index, agent_name)
 
-        context = "\n".join([
-            f"Step {j+1} executed by {a}:\n{r}" 
-            for j, (s, a, r) in enumerate(history)
-        ])
         enriched_task = f"""You are {agent_name}.
         
         Here is the context of what has been done so far:
@@ -100,32 +127,107 @@ def executor_agent(plan_steps: list[str], model: str = "gpt-5-mini", page: str =
         """
 
         print(f"\n🛠️ Executing with agent: `{agent_name}` on task: {task}")
-        agent_registry = agent_register(page)
-        if agent_name in agent_registry:
-            with st.session_state.steps[i]:
-                start_time = time.time()
-                with st.spinner(f"Executing... ", show_time=True):
-                    output, used_token = agent_registry[agent_name](enriched_task, model=st.session_state.model)
-                    history.append((step, agent_name, output))
-                    total_used_token += used_token
-                    print(f"✅ Agent Used Tokens:\n{used_token}")
-                    elapsed_time = time.time() - start_time
-                    print(f"✅ Elapsed Time: {elapsed_time:.2f} seconds")
-                    st.success(f"✅ Completed with {used_token} token used in {elapsed_time:.2f} seconds!")
+        agent_tokens = 0
+        if runtime.budget.exhausted(MODEL_BUDGETS):
+            # Out of budget: carry the latest draft forward so the run still ends with a report
+            runtime.budget.record("skip_step", agent_name, "run budget exhausted")
+            output = store.fallback_output(index)
+        elif agent_name in OPTIONAL_AGENTS and not runtime.budget.allow_optional(agent_name):
+            output = store.fallback_output(index)
+        elif agent_name in agent_registry:
+            try:
+                output, agent_tokens = agent_registry[agent_name](enriched_task, model=runtime.agent_model, runtime=runtime.for_step(index))
+            except BudgetExceeded:
+                output = store.fallback_output(index)
         else:
-            with st.session_state.steps[i]:
-                start_time = time.time()
-                with st.spinner(f"Executing... ", show_time=True):
-                    output, used_token = f"⚠️ Unknown agent: {agent_name}"
-                    history.append((step, agent_name, output))
-                    total_used_token += used_token
-                    print(f"✅ Agent Used Tokens:\n{used_token}")
-                    elapsed_time = time.time() - start_time
-                    print(f"✅ Elapsed Time: {elapsed_time:.2f} seconds")
-                    st.success(f"✅ Completed with {used_token} token used in {elapsed_time:.2f} seconds!")
-            
-    print(f"✅ Output:\n{output}")
+            output, agent_tokens = f"⚠️ Unknown agent: {agent_name}", 0
+        print(f"✅ Agent Used Tokens:\n{agent_tokens}")
+    return agent_name, output, used_token + agent_tokens, time.time() - start_time
+
+
+def executor_agent(plan_steps: list, runtime: RuntimeContext | None = None):
+    """
+    Executes a plan, running steps whose dependencies are complete concurrently.
+
+    Steps run on a thread pool of `runtime.max_workers`. Full step outputs are
+    kept in a `RunStore`, and each step receives compacted context built from
+    the steps it depends on (see `RunStore.context_for`). The history is
+    returned in plan order regardless of completion order.
+
+    With a `runtime.run_id`, every completed step is checkpointed (see
+    `utils.checkpoint`) and steps already completed under that id are restored
+    instead of re-run.
+
+    Progress is reported through `runtime.emit` with "plan", "step_started",
+    "step_restored" and "step_completed" events, and agents that stream their
+    output add "stream_started" and "delta" events tagged with the step index.
+    The executor has no UI of its own, so it runs the same in Streamlit,
+    background jobs and benchmarks.
+
+    Args:
+        plan_steps (list): Steps from `planner_agent`, or a flat list of step strings.
+        runtime (RuntimeContext, optional): Client, models, page, budgets and progress
+            callback; defaults to the current runtime.
+
+    Returns:
+        tuple[list, int]: History of (task, agent, output) in plan order and the total tokens used;
+            an empty history when the plan has no steps.
+    """
+    runtime = runtime or current_runtime()
+    run_id = runtime.run_id
+    steps = normalize_plan(plan_steps)
+    runtime.emit("plan", steps=steps)
+    if not steps:
+        print(EMPTY_PLAN_MESSAGE)
+        return [], 0
+
+    print("==================================")
+    print("🎯 Execution Agent")
+    print("==================================")
+
+    total_used_token = 0
+    start_time = time.time()
+    store = RunStore(steps, runtime.context_budgets)
+    outputs, running = {}, {}
+    checkpoints = get_checkpoints() if run_id else None
+    saved = checkpoints.load(run_id) if checkpoints else None
+    if checkpoints and saved is None:
+        checkpoints.start(run_id, runtime.page, "", runtime.agent_model, steps)
+    restored_tokens = 0
+    for i, step in enumerate(steps):
+        previous = saved["steps"].get(step["id"]) if saved else None
+        if previous and previous["task"] == step["task"]:
+            outputs[step["id"]] = (previous["agent"], previous["output"])
+            store.add(i, previous["agent"], previous["output"])
+            restored_tokens += previous["tokens"]
+            print(f"♻️ Step {i+1} restored from checkpoint")
+            runtime.emit("step_restored", index=i, agent=previous["agent"], tokens=previous["tokens"], elapsed=previous["elapsed"])
+
+    with ThreadPoolExecutor(max_workers=max(1, runtime.max_workers), thread_name_prefix="executor") as pool:
+        while len(outputs) < len(steps):
+            for i, step in enumerate(steps):
+                if step["id"] in outputs or i in running.values() or not all(d in outputs for d in step["depends_on"]):
+                    continue
+                # Copy the context per step so the run ledger and tracer follow the step onto its worker
+                ctx = contextvars.copy_context()
+                running[pool.submit(ctx.run, run_step, i, step, store, runtime)] = i
+                runtime.emit("step_started", index=i)
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                i = running.pop(future)
+                agent_name, output, used_token, elapsed_time = future.result()
+                outputs[steps[i]["id"]] = (agent_name, output)
+                store.add(i, agent_name, output)
+                total_used_token += used_token
+                print(f"✅ Step {i+1} Elapsed Time: {elapsed_time:.2f} seconds")
+                if checkpoints:
+                    checkpoints.save_step(run_id, steps[i], agent_name, output, used_token, elapsed_time)
+                runtime.emit("step_completed", index=i, agent=agent_name, tokens=used_token, elapsed=elapsed_time)
+
+    history = [(step["task"], *outputs[step["id"]]) for step in steps]
+    if checkpoints:
+        checkpoints.complete(run_id, restored_tokens + total_used_token, time.time() - start_time)
+    print(f"✅ Output:\n{history[-1][2]}")
     print(f"✅ Total Tokens Used:\n{total_used_token}")
         
     return history, total_used_token
-
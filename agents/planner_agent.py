@@ -1,5 +1,8 @@
-import streamlit as st
-from openai import OpenAI
+import ast
+import json
+import re
+from utils.runtime import RuntimeContext, current_runtime
+from utils.tracing import span
 from dotenv import find_dotenv, load_dotenv
 
 # Load environment variables
@@ -8,46 +11,149 @@ load_dotenv(find_dotenv())
 def agent_prompt(page):
     if page == "researcher":
         agent_prompts = """
-        - A research agent who can search the web, Wikipedia, and arXiv.
-        - A writer agent who can draft research summaries.
-        - An editor agent who can reflect, critique and improve existing drafts. 
+        - research_agent: A research agent who can search the web, Wikipedia, and arXiv.
+        - writer_agent: A writer agent who can draft research summaries.
+        - editor_agent: An editor agent who can reflect, critique and improve existing drafts. 
         """
     elif page == "medical":
         agent_prompts = """
-        - A medical agent who can search the medical publication websites.
-        - A writer agent who can draft research summaries.
-        - An editor agent who can reflect, critique and improve existing drafts. 
+        - medical_agent: A medical agent who can search the medical publication websites.
+        - writer_agent: A writer agent who can draft research summaries.
+        - editor_agent: An editor agent who can reflect, critique and improve existing drafts. 
         """
     return agent_prompts
 
-def planner_agent(topic: str, model: str = "gpt-5", max_steps: int = 5, page: str = "researcher") -> list[str]:
+def _chain(tasks: list[str], agents: list | None = None) -> list[dict]:
+    agents = agents or [None] * len(tasks)
+    return [
+        {"id": i + 1, "agent": agent, "task": str(task), "depends_on": [i] if i else []}
+        for i, (task, agent) in enumerate(zip(tasks, agents))
+    ]
+
+
+def _has_cycle(steps: list[dict]) -> bool:
+    done, remaining = set(), {s["id"]: set(s["depends_on"]) for s in steps}
+    while remaining:
+        ready = [i for i, deps in remaining.items() if deps <= done]
+        if not ready:
+            return True
+        for i in ready:
+            done.add(i)
+            del remaining[i]
+    return False
+
+
+def _as_int(value) -> int | None:
+    try:
+        return int(str(value).strip())
+    except ValueError:
+        return None
+
+
+def _lines(raw: str) -> list[str]:
+    # Non-empty lines without list markers ("-", "*", "1.", "2)")
+    lines = [re.sub(r"^\s*(?:[-*•]|\d+[.)])\s*", "", line).strip() for line in raw.splitlines()]
+    return [line for line in lines if line]
+
+
+def normalize_plan(plan) -> list[dict]:
     """
-    Generates a plan as a Python list of steps (strings) for a research workflow.
+    Turns a plan into a list of steps {"id", "agent", "task", "depends_on"} in plan order.
+
+    Accepts the planner's JSON dependency graph, or a flat list of step strings
+    (older plans), which is chained so every step depends on the previous one.
+    Output that is not a list at all (e.g. prose) is chained line by line.
+    Steps whose ids are not integers are renumbered in plan order, unknown
+    dependencies are dropped, and a plan with a dependency cycle falls back
+    to running its steps in order.
+
+    Args:
+        plan (list | str): Steps as dicts or strings, or the raw planner output.
+
+    Returns:
+        list[dict]: Normalized steps with integer ids.
+    """
+    if isinstance(plan, str):
+        raw = plan.strip()
+        if raw.startswith("```"):
+            raw = re.sub(r"^```(?:json|python)?\n?", "", raw)
+            raw = re.sub(r"\n?```$", "", raw)
+        try:
+            plan = json.loads(raw)
+        except json.JSONDecodeError:
+            try:
+                plan = ast.literal_eval(raw)
+            except (ValueError, SyntaxError):
+                return _chain(_lines(raw))
+        if isinstance(plan, str):
+            return _chain(_lines(plan))
+    if isinstance(plan, dict):
+        plan = plan.get("steps", [])
+    if not isinstance(plan, (list, tuple)):
+        return _chain(_lines(str(plan)))
+    if not all(isinstance(step, dict) for step in plan):
+        return _chain([step if isinstance(step, str) else step.get("task", "") for step in plan])
+
+    raw_ids = [step.get("id", i + 1) for i, step in enumerate(plan)]
+    ids = [_as_int(step_id) for step_id in raw_ids]
+    if None in ids:
+        # Ids like "step 1": number the steps in plan order and map dependencies by the original ids
+        ids = list(range(1, len(plan) + 1))
+    by_raw_id = {str(step_id).strip(): new_id for step_id, new_id in zip(raw_ids, ids)}
+
+    steps = []
+    for step, step_id in zip(plan, ids):
+        depends_on = step.get("depends_on") or []
+        depends_on = depends_on if isinstance(depends_on, list) else [depends_on]
+        steps.append({
+            "id": step_id,
+            "agent": step.get("agent"),
+            "task": str(step.get("task", "")),
+            "depends_on": [by_raw_id.get(str(d).strip(), _as_int(d)) for d in depends_on],
+        })
+    if len(set(ids)) != len(steps):
+        return _chain([s["task"] for s in steps], [s["agent"] for s in steps])
+    for s in steps:
+        s["depends_on"] = [d for d in s["depends_on"] if d in by_raw_id.values() and d != s["id"]]
+    if _has_cycle(steps):
+        return _chain([s["task"] for s in steps], [s["agent"] for s in steps])
+    return steps
+
+
+def planner_agent(topic: str, model: str = "gpt-5", max_steps: int = 5, page: str = "researcher",
+                  runtime: RuntimeContext | None = None) -> list[dict]:
+    """
+    Generates a research plan as a dependency graph of steps.
 
     Args:
         topic (str): Research topic to investigate.
         model (str): Language model to use.
+        max_steps (int): Maximum number of steps in the plan.
+        page (str): "researcher" or "medical", selects the available agents.
+        runtime (RuntimeContext, optional): Client and cache settings; defaults to the current runtime.
 
     Returns:
-        List[str]: A list of executable step strings.
+        list[dict]: Steps {"id", "agent", "task", "depends_on"}, see `normalize_plan`.
     """
-    # Get client from session state
-    client = st.session_state.get("client") or OpenAI()
-
     prompt = f"""
 You are a planning agent responsible for organizing a research workflow with multiple intelligent agents.
 
 🧠 Available agents:
 {agent_prompt(page)}
 
-🎯 Your job is to write a clear, step-by-step research plan **as a valid Python list**, where each step is a string.
+🎯 Your job is to write a clear research plan **as a valid JSON list**, where each step is an object with:
+- "id": a unique integer step number
+- "agent": the name of the agent that performs the step
+- "task": the instruction for that agent
+- "depends_on": a list of ids of the steps whose output this step needs ([] if none)
 Each step should be atomic, executable, and must rely only on the capabilities of the above agents.
+Steps that do not need each other's output (e.g. searches of different sources) must not depend on each other, so they can run in parallel.
 
 🚫 DO NOT include irrelevant tasks like "create CSV", "set up a repo", "install packages", etc.
 ✅ DO include real research-related tasks (e.g., search, summarize, draft, revise).
 ✅ DO limit the search from few relevant sources.
 ✅ DO assume tool use is available.
-🚫 DO NOT include explanation text — return ONLY the Python list.
+🚫 DO NOT include explanation text — return ONLY the JSON list.
 ✅ The final step should be to generate a Markdown document containing the complete and concise research report with topic title, introduction, findings, conclusion, references (APA format citation showing full links). 
 🚫 DO NOT ask any questions on the next steps at the end of the final Markdown document.
 
@@ -56,15 +162,17 @@ Topic: "{topic}"
 Limit planning into {max_steps} steps.
 """
 
-    response = client.chat.completions.create(
-        model=model,
-        messages=[{"role": "user", "content": prompt}],
-        temperature=1,
-    )
+    with span("planner_agent", page=page) as trace_span:
+        response = (runtime or current_runtime()).chat(
+            [{"role": "user", "content": prompt}],
+            model=model,
+            agent="planner_agent",
+            temperature=1,
+        )
 
-    # ⚠️ Evaluate only if the environment is safe
-    steps = eval(response.choices[0].message.content.strip())
-    used_tokens = response.usage.total_tokens
+        steps = normalize_plan(response.content)
+        trace_span.set("steps", len(steps))
+    used_tokens = response.total_tokens
     print("Used Tokens:\n", used_tokens)
     return steps
 
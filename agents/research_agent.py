@@ -1,15 +1,20 @@
 import json
+import time
 from datetime import datetime
 from tools import research_tools
 from tools import medical_tools
-import streamlit as st
-from openai import OpenAI
+from tools.parallel import TOOL_TIMEOUT, run_parallel
+from tools.postprocess import compact_results
+from utils.ledger import record_tool_call
+from utils.budget import BudgetExceeded
+from utils.runtime import RuntimeContext, current_runtime
+from utils.tracing import span
 from dotenv import find_dotenv, load_dotenv
 
 # Load environment variables
 load_dotenv(find_dotenv())
 
-def run_tool(name, args):
+def _dispatch_tool(name, args):
     if name == "arxiv_search_tool":
         return research_tools.arxiv_search_tool(**args)
     if name == "tavily_search_tool":
@@ -18,13 +23,22 @@ def run_tool(name, args):
         return research_tools.wikipedia_search_tool(**args)
     return {"error": f"Unknown tool: {name}"}
 
-def research_agent(task: str, model: str = "gpt-4o-mini", max_tool_call: int = 3):
+def run_tool(name, args, runtime=None):
+    runtime = runtime or current_runtime()
+    if not runtime.budget.allow_tool(name):
+        return {"error": "Tool call skipped: run budget exhausted"}
+    with span(f"tool {name}", args=json.dumps(args)):
+        start = time.perf_counter()
+        result = _dispatch_tool(name, args)
+        record_tool_call(name, args, result, time.perf_counter() - start)
+    return result
+
+def research_agent(task: str, model: str = "gpt-4o-mini", max_tool_call: int = 3, runtime: RuntimeContext | None = None):
     """
     Execute a research task using tools with aisuite (without manual loop).
     """
-    # Get client from session state
-    client = st.session_state.get("client") or OpenAI()
-
+    runtime = runtime or current_runtime()
+    max_tool_call = runtime.budget.search_breadth("research_agent", max_tool_call)
     print("==================================")
     print("🔍 Research Agent")
     print("==================================")
@@ -52,51 +66,62 @@ Limit tool calling into {max_tool_call} maximum.
         {"role": "user", "content":prompt.strip()}]
     tools = [research_tools.arxiv_tool_def, research_tools.tavily_tool_def, research_tools.wikipedia_tool_def]
     try:
-        response = client.chat.completions.create(
+        response = runtime.chat(
+            messages,
             model=model,
-            messages=messages,
+            agent="research_agent",
             tools=tools,
             tool_choice="auto"
         )
 
-        msg = response.choices[0].message
+        if not response.tool_calls:
+            # The model answered directly without using any tool
+            print("✅ Output:\n", response.content)
+            print("Used Tokens:\n", response.total_tokens)
+            return response.content, response.total_tokens
 
-        # messages.append(msg)
-        kept = msg.tool_calls[:max_tool_call]
+        kept = response.tool_calls[:max_tool_call]
         sanitized_assistant = {
             "role": "assistant",
-            "content": msg.content,
+            "content": response.content,
             "tool_calls": kept,
         }
         messages.append(sanitized_assistant)
-        for call in msg.tool_calls:
+        for call in response.tool_calls:
             tool_calls += 1
-            print(call.function.name, call.function.arguments)
-            if tool_calls <= max_tool_call:
-                result = run_tool(call.function.name, json.loads(call.function.arguments))
-                messages.append({
-                    "role": "tool",
-                    "tool_call_id": call.id,
-                    "name": call.function.name,
-                    "content": json.dumps(result)
-                })
-        if tool_calls > 3:
+            print(call["function"]["name"], call["function"]["arguments"])
+        # Run the turn's tool calls concurrently; results are appended in call order
+        calls = [(call["function"]["name"], json.loads(call["function"]["arguments"])) for call in kept]
+        results = run_parallel(
+            calls,
+            lambda name, args: run_tool(name, args, runtime),
+            timeout=runtime.budget.timeout(TOOL_TIMEOUT),
+        )
+        # Drop duplicate hits across sources and trim the rest to the result token budget
+        results = compact_results(calls, results, agent="research_agent")
+        for call, result in zip(kept, results):
+            messages.append({
+                "role": "tool",
+                "tool_call_id": call["id"],
+                "name": call["function"]["name"],
+                "content": json.dumps(result)
+            })
+        if tool_calls > max_tool_call:
             messages.append({
                 "role": "assistant",
                 "content": "I have reached the maximum tool usage as instructed. ",
             })
             
-        final_response = client.chat.completions.create(
-            model=model,
-            messages=messages,
-        )
+        final_response = runtime.chat(messages, model=model, agent="research_agent")
         
-        content = final_response.choices[0].message.content
+        content = final_response.content
         print("✅ Output:\n", content)
-        used_tokens = response.usage.total_tokens
+        used_tokens = response.total_tokens + final_response.total_tokens
         print("Used Tokens:\n", used_tokens)
         return content, used_tokens
 
+    except BudgetExceeded:
+        raise
     except Exception as e:
         print("❌ Error:", e)
         return f"[Model Error: {str(e)}]", 0
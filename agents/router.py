@@ -0,0 +1,54 @@
+import re
+
+# Keyword stems that identify the work of each agent. A keyword at the start of the
+# task (its leading verb) counts three times, so "Search ... and summarize" goes to the searcher.
+AGENT_KEYWORDS = {
+    "research_agent": ["search", "find", "look up", "gather", "collect", "retrieve", "browse",
+                       "arxiv", "wikipedia", "web", "papers", "literature", "sources"],
+    "medical_agent": ["search", "find", "look up", "gather", "collect", "retrieve",
+                      "pubmed", "cochrane", "clinical", "trials", "medical", "literature", "sources"],
+    "writer_agent": ["draft", "writ", "summar", "compose", "compile",
+                     "generate", "markdown", "report", "document", "outline"],
+    "editor_agent": ["critique", "revise", "edit", "review", "proofread", "refine",
+                     "improve", "polish", "reflect", "feedback"],
+}
+
+_PATTERNS = {
+    agent: [re.compile(rf"\b{re.escape(k)}\w*", re.I) for k in keywords]
+    for agent, keywords in AGENT_KEYWORDS.items()
+}
+
+
+def score(task: str, agents: list[str]) -> dict[str, int]:
+    """Keyword score of `task` for each of `agents`."""
+    # Patterns are case-insensitive; matching against the whole task lets multi-word keywords ("look up") lead
+    leading = task.strip()
+    scores = {}
+    for agent in agents:
+        total = 0
+        for pattern in _PATTERNS.get(agent, []):
+            if pattern.search(task):
+                total += 3 if pattern.match(leading) else 1
+        scores[agent] = total
+    return scores
+
+
+def route(task: str, agents: list[str], margin: int = 1) -> str | None:
+    """
+    Picks the agent for a task with keyword rules, without a model call.
+
+    Args:
+        task (str): The step instruction.
+        agents (list[str]): Agent names available on the page.
+        margin (int): How far the best agent must lead the runner-up.
+
+    Returns:
+        str | None: The agent name, or None when no rule matches or the match is
+        ambiguous, in which case the caller should fall back to LLM routing.
+    """
+    ranked = sorted(score(task, agents).items(), key=lambda item: item[1], reverse=True)
+    if not ranked or ranked[0][1] == 0:
+        return None
+    if len(ranked) > 1 and ranked[0][1] - ranked[1][1] < margin:
+        return None
+    return ranked[0][0]
@@ -0,0 +1,47 @@
+from dataclasses import replace
+from typing import Callable
+from .planner_agent import planner_agent
+from .execution_agent import EMPTY_PLAN_MESSAGE, executor_agent
+from utils.checkpoint import get_store as get_checkpoints
+from utils.runtime import RuntimeContext
+from dotenv import find_dotenv, load_dotenv
+
+# Load environment variables
+load_dotenv(find_dotenv())
+
+# Trace name of each page's workflow
+TRACE_NAMES = {"researcher": "research_assistant", "medical": "clinical_evidence"}
+
+
+def research_workflow(topic: str, runtime: RuntimeContext | None = None, progress: Callable | None = None) -> dict:
+    """
+    Plans and executes a research or clinical evidence workflow without any UI.
+
+    Runs as a background job (see `utils.jobs`): progress is reported through
+    `progress(event, **data)`, and with a `runtime.run_id` the plan and completed
+    steps are checkpointed so an interrupted run resumes where it stopped.
+
+    Args:
+        topic (str): Research topic.
+        runtime (RuntimeContext, optional): Client, models, page and budgets of the run.
+        progress (Callable, optional): Receives progress events; overrides `runtime.progress`.
+
+    Returns:
+        dict: "report" (final Markdown), "history", "total_tokens" and "ledger" (the run's `RunLedger`).
+    """
+    runtime = runtime or RuntimeContext()
+    if progress is not None:
+        runtime = replace(runtime, progress=progress)
+    checkpoints = get_checkpoints() if runtime.run_id else None
+    with runtime.activate(TRACE_NAMES.get(runtime.page, runtime.page)) as runtime:
+        saved = checkpoints.load(runtime.run_id) if checkpoints else None
+        if saved and saved["plan"]:
+            steps = saved["plan"]
+        else:
+            runtime.emit("planning")
+            steps = planner_agent(topic, model=runtime.planner_model, page=runtime.page, runtime=runtime)
+            if checkpoints:
+                checkpoints.start(runtime.run_id, runtime.page, topic, runtime.agent_model, steps)
+        history, total_used_token = executor_agent(steps, runtime)
+    report = history[-1][2] if history else EMPTY_PLAN_MESSAGE
+    return {"report": report, "history": history, "total_tokens": total_used_token, "ledger": runtime.ledger}
@@ -1,17 +1,14 @@
-import streamlit as st
-from openai import OpenAI
+from utils.runtime import RuntimeContext, current_runtime
 from dotenv import find_dotenv, load_dotenv
 
 # Load environment variables
 load_dotenv(find_dotenv())
 
-def writer_agent(task: str, model: str = "gpt-5-mini") -> str:
+def writer_agent(task: str, model: str = "gpt-5-mini", runtime: RuntimeContext | None = None) -> str:
     """
     Executes writing tasks, such as drafting, expanding, or summarizing text.
     """
-    # Get client from session state
-    client = st.session_state.get("client") or OpenAI()
-
+    runtime = runtime or current_runtime()
     print("==================================")
     print("✍️ Writer Agent")
     print("==================================")
@@ -20,10 +17,7 @@ def writer_agent(task: str, model: str = "gpt-5-mini") -> str:
         {"role": "user", "content": task}
     ]
 
-    response = client.chat.completions.create(
-        model=model,
-        messages=messages
-    )
-    used_tokens = response.usage.total_tokens
+    response = runtime.chat(messages, model=model, agent="writer_agent", stream=True)
+    used_tokens = response.total_tokens
     print("Used Tokens:\n", used_tokens)
-    return response.choices[0].message.content, used_tokens
+    return response.content, used_tokens
@@ -0,0 +1,194 @@
+# --- Standard library ---
+import json
+import math
+import os
+import re
+import shutil
+import tempfile
+
+
+def configure_offline(mode: str = "fake", llm_latency: str = "0", tool_latency: str = "0", seed: int = 0) -> None:
+    """
+    Points the LLM gateway and search tools at the offline stand-ins.
+
+    Must run before any agent module is imported, because the backends read
+    their settings from the environment at import time.
+    """
+    os.environ["LLM_BACKEND"] = mode
+    os.environ["SEARCH_BACKEND"] = "fake" if mode in ("fake", "replay") else "live"
+    os.environ["FAKE_LLM_LATENCY"] = llm_latency
+    os.environ["FAKE_TOOL_LATENCY"] = tool_latency
+    os.environ["FAKE_LLM_SEED"] = str(seed)
+    os.environ["FAKE_TOOL_SEED"] = str(seed)
+
+
+def isolate_database(db: str | None = None, generate_rows: int = 0, seed: int = 0) -> str:
+    """
+    Points the RCA agent at the database a benchmark runs against, so runs never touch data/rca_data.db.
+
+    Args:
+        db (str, optional): Existing database to use in place, e.g. one written by utils.rca_generator.
+        generate_rows (int): When set, generates a fresh database with this many synthetic rows instead.
+        seed (int): Generator seed.
+
+    Returns:
+        str: Path of the database in use.
+    """
+    if db:
+        path = db
+    else:
+        path = os.path.join(tempfile.mkdtemp(prefix="rca_bench_"), "rca_data.db")
+        if generate_rows:
+            # Imported here so the common helpers stay light for the other benchmarks
+            from utils.rca_generator import write_sqlite
+            print(f"🏭 Generating {generate_rows:,} RCA rows into {path}")
+            write_sqlite(path, generate_rows, seed)
+        else:
+            shutil.copyfile("data/rca_data.db", path)
+    os.environ["RCA_DB_PATH"] = path
+    return path
+
+
+def add_database_arguments(parser) -> None:
+    """Adds the --db / --generate-rows options shared by the benchmarks that query the RCA database."""
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument("--db", help="Run against this RCA database in place (e.g. from utils.rca_generator)")
+    group.add_argument("--generate-rows", type=int, default=0, help="Run against a fresh synthetic database with this many rows")
+
+
+def percentile(values: list[float], pct: float) -> float:
+    """Nearest-rank percentile of `values` (0 for an empty list)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def stage_name(span_name: str) -> str:
+    """Groups spans into stages, e.g. "step 3" -> "step" and "llm writer_agent" stays as is."""
+    return re.sub(r"\s+\d+$", "", span_name)
+
+
+def stage_durations(tracer) -> dict:
+    """
+    Wall-clock seconds spent per stage in one traced run.
+
+    Spans of a stage that overlap, such as parallel steps or tool calls, are
+    merged first, so a stage counts the time it was running rather than the
+    sum of its concurrent spans.
+    """
+    intervals = {}
+    for s in tracer.spans:
+        intervals.setdefault(stage_name(s.name), []).append((s.start_ns, s.end_ns))
+    totals = {}
+    for name, spans in intervals.items():
+        total, covered_until = 0, None
+        for start, end in sorted(spans):
+            if covered_until is not None and start < covered_until:
+                start = covered_until
+            if end > start:
+                total += end - start
+                covered_until = end if covered_until is None else max(covered_until, end)
+        totals[name] = total / 1e9
+    return totals
+
+
+def summarize(samples: list[dict]) -> dict:
+    """Turns per-run stage durations into p50/p95 per stage."""
+    stages = sorted({name for sample in samples for name in sample})
+    return {
+        name: {
+            "p50": percentile([s.get(name, 0.0) for s in samples], 50),
+            "p95": percentile([s.get(name, 0.0) for s in samples], 95),
+        }
+        for name in stages
+    }
+
+
+def load_baseline(path: str) -> dict | None:
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_baseline(path: str, results: dict) -> None:
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2, sort_keys=True)
+
+
+def compare(results: dict, baseline: dict, threshold: float, metrics: list[str], min_delta: float = 0.05) -> list[str]:
+    """
+    Compares numeric metrics of every entry in `results` against `baseline`.
+
+    Args:
+        results (dict): {entry: {metric path: value}} flattened with `flatten`.
+        baseline (dict): Same structure as `results`.
+        threshold (float): Allowed relative increase (0.2 = 20% slower or bigger).
+        metrics (list[str]): Suffixes of metric paths to check (e.g. "p95", "model_calls").
+        min_delta (float): Absolute increases below this are ignored, to avoid flagging noise on tiny values.
+
+    Returns:
+        list[str]: Human-readable regressions; empty if none.
+    """
+    regressions = []
+    flat_results, flat_baseline = flatten(results), flatten(baseline)
+    for key, old in flat_baseline.items():
+        if not any(key.endswith(m) for m in metrics) or key not in flat_results:
+            continue
+        new = flat_results[key]
+        if new - old > min_delta and new > old * (1 + threshold):
+            regressions.append(f"{key}: {old:.3f} -> {new:.3f} (+{(new / old - 1) * 100 if old else float('inf'):.0f}%)")
+    return regressions
+
+
+def spread(values: list[float]) -> float:
+    """Median absolute deviation of `values`, a noise estimate that ignores a single outlier run."""
+    if not values:
+        return 0.0
+    middle = percentile(values, 50)
+    return percentile([abs(v - middle) for v in values], 50)
+
+
+def compare_wall_time(results: dict, baseline: dict, threshold: float, sigmas: float = 3.0) -> list[str]:
+    """
+    Compares the median end-to-end wall time of every workflow against `baseline`.
+
+    An increase counts as a regression only when it exceeds both `threshold` of
+    the old median and `sigmas` times the run-to-run spread of either run, so a
+    noisy machine widens the tolerance instead of failing the gate.
+
+    Args:
+        results (dict): {workflow: {"wall_seconds": {"p50": ..., "spread": ...}}}.
+        baseline (dict): Same structure as `results`.
+        threshold (float): Allowed relative increase (0.2 = 20% slower).
+        sigmas (float): Multiples of the spread treated as noise.
+
+    Returns:
+        list[str]: Human-readable regressions; empty if none.
+    """
+    regressions = []
+    for workflow, result in results.items():
+        old, new = baseline.get(workflow, {}).get("wall_seconds"), result.get("wall_seconds")
+        if not old or not new:
+            continue
+        tolerance = max(old["p50"] * threshold, sigmas * max(old["spread"], new["spread"]))
+        if new["p50"] - old["p50"] > tolerance:
+            regressions.append(f"{workflow}.wall_seconds: {old['p50']:.3f} -> {new['p50']:.3f} "
+                               f"(+{new['p50'] - old['p50']:.3f}s, tolerance {tolerance:.3f}s)")
+    return regressions
+
+
+def flatten(data: dict, prefix: str = "") -> dict:
+    flat = {}
+    for key, value in data.items():
+        path = f"{prefix}.{key}" if prefix else str(key)
+        if isinstance(value, dict):
+            flat.update(flatten(value, path))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[path] = value
+    return flat
@@ -0,0 +1,153 @@
+"""
+Concurrent-session load generator.
+
+Simulates N users, each on its own thread like a Streamlit script run, issuing
+OpenRCA questions and research topics through the same agent code paths
+against the offline model and search stand-ins. Concurrency is ramped through
+the given levels and each level reports throughput, latency percentiles,
+error rate and time spent waiting for the SQLite write lock.
+
+Usage:
+    python -m benchmarks.load_test --concurrency 1,2,4,8,16 --requests 3
+    python -m benchmarks.load_test --workflows rca --concurrency 8,32 --llm-latency fixed:0.2
+"""
+# --- Standard library ---
+import argparse
+import contextlib
+import io
+import sys
+import threading
+import time
+from collections import Counter
+
+# --- Local ---
+from benchmarks.common import add_database_arguments, configure_offline, isolate_database, percentile, save_baseline
+from benchmarks.workflow_bench import TOPICS
+
+
+def _request(workflow: str, topic: str) -> None:
+    from agents.database_agent import database_agent
+    from agents.execution_agent import executor_agent
+    from agents.planner_agent import planner_agent
+    from utils.runtime import RuntimeContext
+
+    page = {"research": "researcher", "clinical": "medical"}.get(workflow, workflow)
+    with RuntimeContext(page=page).activate() as runtime:
+        if workflow == "rca":
+            database_agent(topic, model=runtime.agent_model, max_refine_attempts=2, runtime=runtime)
+        else:
+            steps = planner_agent(topic, model=runtime.planner_model, page=page, runtime=runtime)
+            executor_agent(steps, runtime)
+
+
+def simulate_user(user: int, workflows: list[str], requests: int, think_time: float, samples: list, lock: threading.Lock) -> None:
+    """One simulated session: opens a client like `init_chatbot` and issues `requests` requests back to back."""
+    from utils.llm_gateway import get_client
+
+    # Sessions share the pooled gateway client; kept here so client setup is part of the load
+    get_client()
+    for i in range(requests):
+        workflow = workflows[(user + i) % len(workflows)]
+        topics = TOPICS[workflow]
+        start = time.perf_counter()
+        error = None
+        try:
+            _request(workflow, topics[(user + i) % len(topics)])
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+        with lock:
+            samples.append({"workflow": workflow, "latency": time.perf_counter() - start, "error": error})
+        if think_time:
+            time.sleep(think_time)
+
+
+def run_level(users: int, workflows: list[str], requests: int, think_time: float) -> dict:
+    from utils.database import lock_stats, reset_lock_stats
+
+    reset_lock_stats()
+    samples, lock = [], threading.Lock()
+    threads = [
+        threading.Thread(target=simulate_user, args=(u, workflows, requests, think_time, samples, lock), name=f"user-{u}")
+        for u in range(users)
+    ]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+
+    latencies = [s["latency"] for s in samples if not s["error"]]
+    errors = Counter(s["error"].split(":")[0] for s in samples if s["error"])
+    locks = lock_stats()
+    return {
+        "users": users,
+        "requests": len(samples),
+        "elapsed": elapsed,
+        "throughput": (len(samples) - sum(errors.values())) / elapsed if elapsed else 0.0,
+        "p50": percentile(latencies, 50),
+        "p95": percentile(latencies, 95),
+        "p99": percentile(latencies, 99),
+        "error_rate": sum(errors.values()) / len(samples) if samples else 0.0,
+        "errors": dict(errors),
+        "lock_writes": locks["writes"],
+        "lock_wait_total": locks["wait_seconds"],
+        "lock_wait_max": locks["max_wait_seconds"],
+        "lock_timeouts": locks["timeouts"],
+    }
+
+
+def saturation_point(levels: list[dict], gain: float = 0.1) -> int | None:
+    """First concurrency level after which throughput improves by less than `gain` (10%)."""
+    for previous, current in zip(levels, levels[1:]):
+        if current["throughput"] < previous["throughput"] * (1 + gain):
+            return previous["users"]
+    return None
+
+
+def print_report(levels: list[dict]) -> None:
+    print(f"\n{'users':>6}{'reqs':>6}{'req/s':>8}{'p50 (s)':>9}{'p95 (s)':>9}{'p99 (s)':>9}{'errors':>8}"
+          f"{'lock wait (s)':>15}{'max wait (s)':>14}")
+    for r in levels:
+        print(f"{r['users']:>6}{r['requests']:>6}{r['throughput']:>8.2f}{r['p50']:>9.2f}{r['p95']:>9.2f}{r['p99']:>9.2f}"
+              f"{r['error_rate']:>8.0%}{r['lock_wait_total']:>15.2f}{r['lock_wait_max']:>14.2f}")
+        for error, count in r["errors"].items():
+            print(f"{'':>6}⚠️ {count} x {error}")
+    knee = saturation_point(levels)
+    if knee:
+        print(f"\n📉 Throughput stops scaling beyond {knee} concurrent users")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workflows", default="rca,research", help="Comma separated: research, clinical, rca")
+    parser.add_argument("--concurrency", default="1,2,4,8,16", help="Comma separated concurrency levels to ramp through")
+    parser.add_argument("--requests", type=int, default=3, help="Requests per user at each level")
+    parser.add_argument("--think-time", type=float, default=0.0, help="Seconds a user waits between requests")
+    parser.add_argument("--llm-latency", default="lognormal:0.8,0.4", help="Simulated model latency spec")
+    parser.add_argument("--tool-latency", default="lognormal:0.5,0.5", help="Simulated tool latency spec")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write the per-level results as JSON")
+    parser.add_argument("--verbose", action="store_true", help="Show the agents' own console output")
+    add_database_arguments(parser)
+    args = parser.parse_args(argv)
+
+    configure_offline("fake", args.llm_latency, args.tool_latency, args.seed)
+    isolate_database(args.db, args.generate_rows, args.seed)
+
+    workflows = args.workflows.split(",")
+    levels = []
+    for users in (int(c) for c in args.concurrency.split(",")):
+        print(f"🚀 {users} concurrent users x {args.requests} requests")
+        # Agent progress prints from many threads would drown the report
+        with contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(io.StringIO()):
+            levels.append(run_level(users, workflows, args.requests, args.think_time))
+    print_report(levels)
+    if args.output:
+        save_baseline(args.output, {"levels": levels})
+        print(f"\n💾 Results written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,186 @@
+"""
+Text-to-SQL accuracy-versus-latency benchmark.
+
+Runs `database_agent` over a gold set of question / reference-SQL pairs on the
+RCA dataset and compares the final result set with the reference result set.
+Reports execution accuracy, refinement iterations, model calls, tokens and
+wall time per question, so speed optimizations can be checked for correctness.
+
+Modes:
+    fake    scripted offline model (measures overhead, accuracy is not meaningful)
+    replay  responses recorded with --mode record, scripted fallback on a miss
+    record  live OpenAI calls, saved to LLM_RECORDING for later replays
+    live    live OpenAI calls
+
+Usage:
+    python -m benchmarks.text2sql_bench --mode replay
+    python -m benchmarks.text2sql_bench --mode live --model gpt-4o-mini --output text2sql.json
+"""
+# --- Standard library ---
+import argparse
+import json
+import sqlite3
+import sys
+import time
+from collections import Counter
+
+# --- Third-party ---
+import pandas as pd
+
+# --- Local ---
+from benchmarks.common import add_database_arguments, configure_offline, isolate_database, percentile, save_baseline
+
+GOLD = "benchmarks/data/text2sql_gold.jsonl"
+NULL_QUERIES = ("SELECT NULL;", "SELECT NULL", "NULL")
+
+
+def load_gold(path: str) -> list[dict]:
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def _normalize(value):
+    # Compare numbers with a small tolerance and ignore int/float differences
+    if isinstance(value, (int, float)) and not pd.isna(value):
+        return round(float(value), 2)
+    if value is None or (isinstance(value, float) and pd.isna(value)):
+        return None
+    return str(value).strip()
+
+
+def _rows(df: pd.DataFrame) -> Counter:
+    return Counter(tuple(_normalize(v) for v in row) for row in df.itertuples(index=False))
+
+
+def _columns(df: pd.DataFrame) -> list[Counter]:
+    return [Counter(_normalize(v) for v in df.iloc[:, i].tolist()) for i in range(df.shape[1])]
+
+
+def compare_results(predicted: pd.DataFrame, reference: pd.DataFrame) -> dict:
+    """
+    Compares two result sets, ignoring row order.
+
+    Returns:
+        dict: "strict" is True when both have the same rows (as a multiset);
+              "relaxed" is True when every reference column appears in the
+              prediction with the same values, so extra columns are allowed.
+    """
+    if "error" in predicted.columns and "error" not in reference.columns:
+        return {"strict": False, "relaxed": False}
+    strict = predicted.shape[1] == reference.shape[1] and _rows(predicted) == _rows(reference)
+    available = _columns(predicted)
+    relaxed = len(predicted) == len(reference)
+    for column in _columns(reference):
+        if column in available:
+            available.remove(column)
+        else:
+            relaxed = False
+            break
+    return {"strict": strict, "relaxed": strict or relaxed}
+
+
+def run_question(item: dict, conn: sqlite3.Connection, model: str) -> dict:
+    from agents.database_agent import database_agent
+    from utils.runtime import RuntimeContext
+
+    reference_is_null = item["sql"].strip().upper() in NULL_QUERIES
+    reference = pd.DataFrame() if reference_is_null else pd.read_sql_query(item["sql"], conn)
+
+    start = time.perf_counter()
+    error = None
+    with RuntimeContext(agent_model=model, page="rca").activate() as runtime:
+        ledger = runtime.ledger
+        try:
+            details = database_agent(item["question"], model=model, return_details=True, runtime=runtime)
+        except Exception as e:
+            details, error = None, str(e)
+            print(f"❌ {item['id']} failed: {e}")
+    wall = time.perf_counter() - start
+
+    if details is None:
+        match = {"strict": False, "relaxed": False}
+    elif details["sql_v2"].strip().upper() in NULL_QUERIES or reference_is_null:
+        match = {"strict": reference_is_null and details["sql_v2"].strip().upper() in NULL_QUERIES}
+        match["relaxed"] = match["strict"]
+    else:
+        match = compare_results(details["results_v2"], reference)
+
+    summary = ledger.summary()
+    return {
+        "id": item["id"],
+        "question": item["question"],
+        "strict": match["strict"],
+        "relaxed": match["relaxed"],
+        "iterations": details["iterations"] if details else 0,
+        "model_calls": summary["model_calls"],
+        "total_tokens": summary["total_tokens"],
+        "wall": wall,
+        "sql": details["sql_v2"] if details else None,
+        "error": error,
+    }
+
+
+def aggregate(runs: list[dict]) -> dict:
+    n = len(runs) or 1
+    iterations = [r["iterations"] for r in runs]
+    walls = [r["wall"] for r in runs]
+    return {
+        "questions": len(runs),
+        "accuracy_strict": sum(r["strict"] for r in runs) / n,
+        "accuracy_relaxed": sum(r["relaxed"] for r in runs) / n,
+        "iterations_mean": sum(iterations) / n,
+        "iterations_p95": percentile(iterations, 95),
+        "model_calls": sum(r["model_calls"] for r in runs),
+        "total_tokens": sum(r["total_tokens"] for r in runs),
+        "wall_p50": percentile(walls, 50),
+        "wall_p95": percentile(walls, 95),
+        "errors": sum(1 for r in runs if r["error"]),
+    }
+
+
+def print_report(runs: list[dict], totals: dict) -> None:
+    print(f"\n{'id':<6}{'strict':>8}{'relaxed':>9}{'iters':>7}{'calls':>7}{'tokens':>9}{'wall (s)':>10}  question")
+    for r in runs:
+        print(f"{r['id']:<6}{'✓' if r['strict'] else '✗':>8}{'✓' if r['relaxed'] else '✗':>9}{r['iterations']:>7}"
+              f"{r['model_calls']:>7}{r['total_tokens']:>9}{r['wall']:>10.2f}  {r['question'][:60]}")
+    print(f"\nexecution accuracy: {totals['accuracy_strict']:.0%} strict, {totals['accuracy_relaxed']:.0%} relaxed")
+    print(f"iterations: mean {totals['iterations_mean']:.2f}, p95 {totals['iterations_p95']}")
+    print(f"model calls: {totals['model_calls']}  tokens: {totals['total_tokens']}  "
+          f"wall p50 {totals['wall_p50']:.2f}s, p95 {totals['wall_p95']:.2f}s  errors: {totals['errors']}")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--gold", default=GOLD, help="JSONL file with id, question and sql")
+    parser.add_argument("--questions", help="Comma separated question ids to run (default: all)")
+    parser.add_argument("--mode", default="replay", choices=["fake", "replay", "record", "live"])
+    parser.add_argument("--model", default="gpt-4o-mini")
+    parser.add_argument("--repeats", type=int, default=1, help="Runs per question")
+    parser.add_argument("--llm-latency", default="0", help="Simulated model latency spec (fake/replay)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write per-question results and totals as JSON")
+    add_database_arguments(parser)
+    args = parser.parse_args(argv)
+
+    configure_offline("openai" if args.mode == "live" else args.mode, args.llm_latency, "0", args.seed)
+    path = isolate_database(args.db, args.generate_rows, args.seed)
+
+    gold = load_gold(args.gold)
+    if args.questions:
+        wanted = set(args.questions.split(","))
+        gold = [item for item in gold if item["id"] in wanted]
+
+    conn = sqlite3.connect(path)
+    runs = [run_question(item, conn, args.model) for item in gold for _ in range(args.repeats)]
+    conn.close()
+
+    totals = aggregate(runs)
+    print_report(runs, totals)
+    if args.output:
+        save_baseline(args.output, {"mode": args.mode, "model": args.model, "totals": totals, "runs": runs})
+        print(f"\n💾 Results written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
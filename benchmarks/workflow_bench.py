@@ -0,0 +1,147 @@
+"""
+End-to-end workflow benchmark.
+
+Drives the Research Assistant, Clinical Evidence and OpenRCA workflows headlessly
+against simulated (or replayed) model and tool responses, reports p50/p95 per
+stage, model calls, tokens and peak memory, and fails when end-to-end wall time,
+model calls, tokens or memory regress beyond the threshold compared to the
+stored baseline.
+
+Usage:
+    python -m benchmarks.workflow_bench --iterations 5
+    python -m benchmarks.workflow_bench --update-baseline
+"""
+# --- Standard library ---
+import argparse
+import sys
+import time
+import tracemalloc
+
+# --- Local ---
+from benchmarks.common import (
+    add_database_arguments, compare, compare_wall_time, configure_offline, isolate_database, load_baseline, percentile, save_baseline,
+    spread, stage_durations, summarize,
+)
+
+BASELINE = "benchmarks/baselines/workflows.json"
+
+TOPICS = {
+    "research": ["graph neural networks for traffic forecasting", "retrieval augmented generation evaluation"],
+    "clinical": ["SGLT2 inhibitors in heart failure", "early mobilisation after hip fracture surgery"],
+    "rca": ["What are the top 3 most expensive failures?", "Which equipment has the longest downtime?"],
+}
+
+
+def run_once(workflow: str, topic: str) -> dict:
+    from agents.database_agent import database_agent
+    from agents.execution_agent import executor_agent
+    from agents.planner_agent import planner_agent
+    from utils.runtime import RuntimeContext
+
+    page = {"research": "researcher", "clinical": "medical"}.get(workflow, workflow)
+    tracemalloc.start()
+    start = time.perf_counter()
+    with RuntimeContext(page=page).activate(workflow) as runtime:
+        if workflow == "rca":
+            database_agent(topic, model=runtime.agent_model, runtime=runtime)
+        else:
+            steps = planner_agent(topic, model=runtime.planner_model, page=page, runtime=runtime)
+            executor_agent(steps, runtime)
+    ledger, tracer = runtime.ledger, runtime.tracer
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    summary = ledger.summary()
+    stages = stage_durations(tracer)
+    stages["total"] = elapsed
+    return {
+        "stages": stages,
+        "model_calls": summary["model_calls"],
+        "tool_calls": summary["tool_calls"],
+        "total_tokens": summary["total_tokens"],
+        "context_tokens_saved": summary["context"]["saved_tokens"],
+        "result_tokens_saved": summary["results"]["saved_tokens"],
+        "peak_memory_mb": peak / 1024 / 1024,
+    }
+
+
+def run_benchmark(workflows: list[str], iterations: int) -> dict:
+    results = {}
+    for workflow in workflows:
+        runs = [run_once(workflow, TOPICS[workflow][i % len(TOPICS[workflow])]) for i in range(iterations)]
+        results[workflow] = {
+            "stages": summarize([r["stages"] for r in runs]),
+            "wall_seconds": {
+                "p50": percentile([r["stages"]["total"] for r in runs], 50),
+                "spread": spread([r["stages"]["total"] for r in runs]),
+            },
+            "model_calls": percentile([r["model_calls"] for r in runs], 50),
+            "tool_calls": percentile([r["tool_calls"] for r in runs], 50),
+            "total_tokens": percentile([r["total_tokens"] for r in runs], 50),
+            "context_tokens_saved": percentile([r["context_tokens_saved"] for r in runs], 50),
+            "result_tokens_saved": percentile([r["result_tokens_saved"] for r in runs], 50),
+            "peak_memory_mb": max(r["peak_memory_mb"] for r in runs),
+        }
+    return results
+
+
+def print_report(results: dict) -> None:
+    for workflow, result in results.items():
+        print(f"\n=== {workflow} ===")
+        print(f"{'stage':<36}{'p50 (s)':>10}{'p95 (s)':>10}")
+        for stage, stats in result["stages"].items():
+            print(f"{stage:<36}{stats['p50']:>10.3f}{stats['p95']:>10.3f}")
+        print(f"model calls: {result['model_calls']}  tool calls: {result['tool_calls']}  "
+              f"tokens: {result['total_tokens']}  context tokens saved: {result['context_tokens_saved']}  "
+              f"result tokens saved: {result['result_tokens_saved']}  "
+              f"peak memory: {result['peak_memory_mb']:.1f} MB  "
+              f"wall: {result['wall_seconds']['p50']:.3f}s ± {result['wall_seconds']['spread']:.3f}s")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workflows", default="research,clinical,rca", help="Comma separated: research, clinical, rca")
+    parser.add_argument("--iterations", type=int, default=5)
+    parser.add_argument("--mode", default="fake", choices=["fake", "replay"], help="Model backend")
+    parser.add_argument("--llm-latency", default="lognormal:0.8,0.4", help="Simulated model latency spec")
+    parser.add_argument("--tool-latency", default="lognormal:0.5,0.5", help="Simulated tool latency spec")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--baseline", default=BASELINE)
+    parser.add_argument("--threshold", type=float, default=0.2, help="Allowed relative regression (0.2 = 20%%)")
+    parser.add_argument("--update-baseline", action="store_true", help="Store these results as the new baseline")
+    parser.add_argument("--output", help="Also write the results JSON here")
+    add_database_arguments(parser)
+    args = parser.parse_args(argv)
+
+    configure_offline(args.mode, args.llm_latency, args.tool_latency, args.seed)
+    isolate_database(args.db, args.generate_rows, args.seed)
+
+    results = run_benchmark(args.workflows.split(","), args.iterations)
+    print_report(results)
+    if args.output:
+        save_baseline(args.output, results)
+
+    if args.update_baseline:
+        save_baseline(args.baseline, results)
+        print(f"\n💾 Baseline written to {args.baseline}")
+        return 0
+
+    baseline = load_baseline(args.baseline)
+    if baseline is None:
+        print(f"\nℹ️ No baseline at {args.baseline}; run with --update-baseline to create one.")
+        return 0
+    # Per-stage timings are reported but not gated: only end-to-end wall time, with a noise-aware
+    # tolerance, and the deterministic call, token and memory figures can fail the run
+    regressions = compare_wall_time(results, baseline, args.threshold)
+    regressions += compare(results, baseline, args.threshold, ["model_calls", "total_tokens", "peak_memory_mb"])
+    if regressions:
+        print("\n❌ Regressions over threshold:")
+        print("\n".join(f"  - {r}" for r in regressions))
+        return 1
+    print("\n✅ No regressions over threshold")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
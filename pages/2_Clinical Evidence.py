@@ -8,8 +8,12 @@ from agents.research_agent import research_agent
 from agents.writer_agent import writer_agent
 from agents.editor_agent import editor_agent
 from agents.execution_agent import executor_agent
+from agents.workflow import research_workflow
 import agents  # Import the package to access set_client
-from openai import OpenAI
+from utils.llm_gateway import get_client
+from utils.checkpoint import get_store as get_checkpoints, run_key
+from utils.jobs import get_runner
+from utils.runtime import RuntimeContext
 from datetime import datetime
 import re
 from IPython.display import Markdown, display
@@ -22,7 +26,7 @@ load_dotenv(find_dotenv())
 def init_chatbot():
 
     if "client" not in st.session_state:
-        st.session_state.client = OpenAI()
+        st.session_state.client = get_client()
     if "model" not in st.session_state:
         st.session_state.model = "gpt-4o-mini"
     if "page" not in st.session_state:
@@ -45,6 +49,79 @@ def scroll_to_element(element_id):
         height=0,
     )
 
+def render_ledger_summary(container, ledger):
+    """Show token and call totals for a run, with the full ledger as a JSON download"""
+    summary = ledger.summary()
+    container.write(
+        f"Total Tokens Used: {summary['total_tokens']} "
+        f"({summary['model_calls']} model calls, {summary['cached_model_calls']} cached, {summary['tool_calls']} tool calls, "
+        f"{summary['routing']['calls_avoided']} routing calls avoided, "
+        f"{summary['context']['saved_tokens']} context tokens saved by compaction, "
+        f"{summary['results']['saved_tokens']} search result tokens saved by deduplication)"
+    )
+    if summary["ttft"]["streamed_calls"]:
+        container.write(f"Time to First Token: {summary['ttft']['mean']:.2f} seconds on average")
+    for d in summary["degradations"]:
+        container.warning(f"⚠️ Budget: {d['action'].replace('_', ' ')} ({d['agent']}, {d['reason']})" + (f" x{d['count']}" if d["count"] > 1 else ""))
+    container.json({"by_agent": summary["by_agent"], "by_tool": summary["by_tool"], "routing": summary["routing"], "context": summary["context"], "results": summary["results"]}, expanded=False)
+    container.download_button(
+        "Download run ledger (JSON)",
+        data=ledger.to_json(),
+        file_name=f"ledger_{ledger.run_id}.json",
+        mime="application/json",
+    )
+
+def follow_job(job, container, report):
+    """Polls a workflow job and renders its progress events until it finishes, streaming agent output as it arrives"""
+    status = container.empty()
+    steps, previews, drafts = {}, {}, {}
+    final_step = None
+    seen = 0
+    with st.spinner("Running workflow...", show_time=True):
+        while True:
+            done = job.done
+            changed = set()
+            for event in job.events_since(seen):
+                seen += 1
+                name = event["event"]
+                if name == "queued":
+                    status.info("⏳ Waiting for a free worker...")
+                elif name == "planning":
+                    status.info("🧭 Planning tasks...")
+                elif name == "plan":
+                    status.empty()
+                    final_step = len(event["steps"]) - 1
+                    for i, step in enumerate(event["steps"]):
+                        after = f" (after step {', '.join(str(d) for d in step['depends_on'])})" if step["depends_on"] else ""
+                        box = container.container(border=True)
+                        box.write(f"Step {i+1}: {step['task']}{after}")
+                        steps[i] = box.empty()
+                        previews[i] = box.empty()
+                elif name == "step_started":
+                    steps[event["index"]].info("⏳ Executing...")
+                elif name == "stream_started":
+                    drafts[event["index"]] = ""
+                    changed.add(event["index"])
+                elif name == "delta":
+                    drafts[event["index"]] += event["text"]
+                    changed.add(event["index"])
+                elif name == "step_restored":
+                    steps[event["index"]].success(f"♻️ Restored from checkpoint ({event['tokens']} tokens, {event['elapsed']:.2f} seconds)")
+                elif name == "step_completed":
+                    steps[event["index"]].success(f"✅ Completed with {event['tokens']} token used in {event['elapsed']:.2f} seconds!")
+                    if event["index"] != final_step:
+                        previews[event["index"]].empty()
+                        drafts.pop(event["index"], None)
+                        changed.discard(event["index"])
+            # Render streamed text once per poll; the final step streams straight into the report
+            for i in changed:
+                target = report if i == final_step else previews[i]
+                target.container(border=True).markdown(drafts[i].strip("`"))
+            if done:
+                break
+            time.sleep(0.5)
+
+
 def main():
     init_chatbot()
     # st.title("", )
@@ -57,16 +134,41 @@ def main():
     st.info("⚕️ This tool is for informational purposes only. Always consult a qualified healthcare professional for medical advice. Typical workflow takes 2-3 minutes.")
     topic = st.text_input("Enter your medical topic.", key="research_topic")
     if topic:
-        start_time = time.time()
-        with st.spinner("Planning tasks...", show_time=True):
-            steps = planner_agent(topic, page=st.session_state.page)
-        executor_history, total_used_token = executor_agent(steps, page=st.session_state.page)
-        st.session_state.expanders.write(f"Total Tokens Used: {total_used_token}")
-        elapsed_time = time.time() - start_time
-        st.session_state.expanders.write(f"Total Elapsed Time: {elapsed_time:.2f} seconds")
-        st.markdown('<div id="report"></div>', unsafe_allow_html=True)
-        st.container(border=True).markdown(executor_history[-1][-1].strip("`"))
-        scroll_to_element("report")
+        checkpoints = get_checkpoints()
+        run_id = run_key(st.session_state.page, topic, st.session_state.model)
+        if st.button("🔄 Re-run", help="Discard the saved results for this topic and run the workflow again"):
+            # Stop a run still in progress first, or it would keep writing to the discarded checkpoint
+            if get_runner().cancel_key(run_id):
+                checkpoints.delete(run_id)
+            else:
+                st.warning("The previous run is still stopping. Try Re-run again in a moment.")
+        saved = checkpoints.load(run_id)
+        if saved and saved["status"] == "completed" and saved["plan"]:
+            # Widget interactions rerun the script; show the finished report instead of running again
+            final = saved["steps"][saved["plan"][-1]["id"]]["output"]
+            st.caption(
+                f"Saved report from {datetime.fromtimestamp(saved['updated_at']):%Y-%m-%d %H:%M} "
+                f"({saved['total_tokens']} tokens). Use Re-run to generate a new one."
+            )
+            st.container(border=True).markdown(final.strip("`"))
+        else:
+            # The workflow runs on a background worker, so closing the tab does not stop it
+            runtime = RuntimeContext(
+                client=st.session_state.client, agent_model=st.session_state.model,
+                page=st.session_state.page, run_id=run_id,
+            )
+            job = get_runner().submit(run_id, research_workflow, topic=topic, runtime=runtime)
+            expander = st.expander("Agent Steps", expanded=True)
+            st.markdown('<div id="report"></div>', unsafe_allow_html=True)
+            report = st.empty()
+            follow_job(job, expander, report)
+            if job.status != "completed":
+                st.error(f"❌ Workflow {job.status}: {job.error or ''}")
+                return
+            render_ledger_summary(expander, job.result["ledger"])
+            expander.write(f"Total Elapsed Time: {job.finished_at - job.started_at:.2f} seconds")
+            report.container(border=True).markdown(job.result["report"].strip("`"))
+            scroll_to_element("report")
     # Sidebar footer - GitHub link at bottom
     st.sidebar.markdown(
         """
@@ -1,25 +1,28 @@
 import streamlit as st
 import sys
 import os
-from openai import OpenAI
 from dotenv import find_dotenv, load_dotenv
 import pandas as pd
 import sqlite3
+import json
 
 # Add parent directory to path to import agents
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
-from agents.database_agent import database_agent
+from agents.database_agent import database_agent, partial_answer
+from utils.llm_gateway import get_client
+from utils.database import PATH
+from utils.runtime import RuntimeContext
 
 # Load environment variables
 load_dotenv(find_dotenv())
 
 # Database path
-DB_PATH = 'data/rca_data.db'
+DB_PATH = PATH
 
 def init_chatbot():
     """Initialize session state for the chatbot"""
     if "client" not in st.session_state:
-        st.session_state.client = OpenAI()
+        st.session_state.client = get_client()
     if "model" not in st.session_state:
         st.session_state.model = "gpt-4o-mini"
     if "messages" not in st.session_state:
@@ -155,19 +158,52 @@ def show_database_browser():
         else:
             st.warning(f"No data found in table: {selected_table}")
 
-def process_query(prompt):
-    """Process a query and generate a response"""
+def process_query(prompt, answer=None):
+    """Process a query and generate a response, streaming the answer into `answer` as it is written"""
+    streamed = {"text": ""}
+
+    def progress(event, **data):
+        if event == "stream_started":
+            streamed["text"] = ""
+        elif event == "delta" and answer is not None:
+            streamed["text"] += data["text"]
+            answer.markdown(partial_answer(streamed["text"]))
+
     try:
         # Call database_agent with return_details=True
-        result = database_agent(
-            query=prompt,
-            model=st.session_state.model,
-            return_details=True
+        runtime = RuntimeContext(
+            client=st.session_state.client, agent_model=st.session_state.model, page="rca", progress=progress
         )
+        with runtime.activate("open_rca") as runtime:
+            result = database_agent(
+                query=prompt,
+                model=runtime.agent_model,
+                return_details=True,
+                runtime=runtime
+            )
+        result['ledger'] = runtime.ledger.to_dict()
         return result, None
     except Exception as e:
         return None, str(e)
 
+def render_ledger_summary(ledger):
+    """Display token usage and model/tool call counts for a query"""
+    summary = ledger["summary"]
+    st.markdown(
+        f"**Usage:** {summary['total_tokens']} tokens across {summary['model_calls']} model calls "
+        f"({summary['cached_model_calls']} cached) in {summary['elapsed']:.1f} seconds"
+        + (f", first token after {summary['ttft']['mean']:.2f} seconds" if summary["ttft"]["streamed_calls"] else "")
+    )
+    for d in summary["degradations"]:
+        st.warning(f"⚠️ Budget: {d['action'].replace('_', ' ')} ({d['agent']}, {d['reason']})" + (f" x{d['count']}" if d["count"] > 1 else ""))
+    st.download_button(
+        "Download run ledger (JSON)",
+        data=json.dumps(ledger, indent=2),
+        file_name=f"ledger_{summary['run_id']}.json",
+        mime="application/json",
+        key=f"ledger_{summary['run_id']}",
+    )
+
 def display_chat_message(role, content, details=None):
     """Display a chat message with optional expandable details"""
     with st.chat_message(role):
@@ -191,6 +227,9 @@ def display_chat_message(role, content, details=None):
                 st.markdown("**Final Results:**")
                 st.dataframe(details['results_v2'], use_container_width=True)
 
+                if 'ledger' in details:
+                    render_ledger_summary(details['ledger'])
+
 def main():
     init_chatbot()
 
@@ -270,8 +309,9 @@ def main():
 
         # Process and display assistant response
         with st.chat_message("assistant"):
+            answer = st.empty()
             with st.spinner("Analyzing your question and querying the database...", show_time=True):
-                result, error = process_query(prompt)
+                result, error = process_query(prompt, answer)
 
             if error:
                 error_msg = f"An error occurred: {error}"
@@ -282,7 +322,7 @@ def main():
                 })
             else:
                 # Display the answer
-                st.markdown(result['answer'])
+                answer.markdown(result['answer'])
 
                 # Show SQL details if enabled
                 if st.session_state.show_sql_details:
@@ -302,6 +342,8 @@ def main():
                         st.markdown("**Final Results:**")
                         st.dataframe(result['results_v2'], use_container_width=True)
 
+                        render_ledger_summary(result['ledger'])
+
                 # Add to chat history
                 st.session_state.messages.append({
                     "role": "assistant",
@@ -0,0 +1,99 @@
+# --- Standard library ---
+import os
+import threading
+
+# --- Third-party ---
+import requests
+from dotenv import find_dotenv, load_dotenv
+from requests.adapters import HTTPAdapter
+from tavily import TavilyClient
+from urllib3.util.retry import Retry
+
+# Load environment variables
+load_dotenv(find_dotenv())
+
+# HTTP settings shared by the search tools
+# TOOL_POOL_SIZE: keep-alive connections per host and session, sized for parallel tool calls.
+# TOOL_CONNECT_TIMEOUT / TOOL_READ_TIMEOUT: seconds to connect and to wait for a response.
+TOOL_POOL_SIZE = int(os.getenv("TOOL_POOL_SIZE", "16"))
+TOOL_CONNECT_TIMEOUT = float(os.getenv("TOOL_CONNECT_TIMEOUT", "5"))
+TOOL_READ_TIMEOUT = float(os.getenv("TOOL_READ_TIMEOUT", "60"))
+HTTP_TIMEOUT = (TOOL_CONNECT_TIMEOUT, TOOL_READ_TIMEOUT)
+
+USER_AGENT = "LF-ADP-Agent/1.0 (mailto:your.email@example.com)"
+
+# Headers of each source's session. arXiv and Wikimedia ask API clients to identify
+# themselves with contact details; Tavily's client sets its own headers, so its
+# session starts without any and other sources keep the requests defaults.
+SESSION_HEADERS = {
+    "arxiv": {"User-Agent": USER_AGENT},
+    "wikipedia": {"User-Agent": f"{USER_AGENT} python-requests/{requests.__version__}"},
+}
+
+_sessions: dict[str, requests.Session] = {}
+_tavily = None
+_lock = threading.Lock()
+
+
+def _new_session(name: str) -> requests.Session:
+    session = requests.Session()
+    session.headers.update(SESSION_HEADERS.get(name, {}))
+    # Idempotent requests are retried on connection errors, 429 and 5xx; Tavily POSTs are not
+    retry = Retry(total=2, backoff_factor=0.5, status_forcelist=(429, 500, 502, 503, 504),
+                  allowed_methods=frozenset({"GET", "HEAD"}), respect_retry_after_header=True)
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=TOOL_POOL_SIZE, max_retries=retry)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def get_session(name: str = "default") -> requests.Session:
+    """
+    Returns the process-wide HTTP session `name`, creating it on first use.
+
+    Each backend gets its own session with its own headers (SESSION_HEADERS), so
+    per-service headers never leak between them, while all requests to a backend
+    share one keep-alive connection pool.
+    Sessions are safe to share between the threads of parallel tool calls.
+    """
+    session = _sessions.get(name)
+    if session is None:
+        with _lock:
+            session = _sessions.get(name)
+            if session is None:
+                session = _sessions[name] = _new_session(name)
+    return session
+
+
+def get_tavily() -> TavilyClient:
+    """
+    Returns the process-wide Tavily client, reading TAVILY_API_KEY and DLAI_TAVILY_BASE_URL once.
+
+    Raises:
+        ValueError: If TAVILY_API_KEY is not set.
+    """
+    global _tavily
+    if _tavily is None:
+        with _lock:
+            if _tavily is None:
+                api_key = os.getenv("TAVILY_API_KEY")
+                if not api_key:
+                    raise ValueError("TAVILY_API_KEY not found in environment variables.")
+                _tavily = TavilyClient(
+                    api_key=api_key,
+                    api_base_url=os.getenv("DLAI_TAVILY_BASE_URL"),
+                    session=_new_session("tavily"),
+                )
+    return _tavily
+
+
+def close_clients() -> None:
+    """Closes every pooled connection; clients are recreated on next use."""
+    global _tavily
+    with _lock:
+        for session in _sessions.values():
+            session.close()
+        _sessions.clear()
+        if _tavily is not None:
+            _tavily.session.close()
+            _tavily = None
@@ -0,0 +1,115 @@
+# --- Standard library ---
+import functools
+import os
+import random
+import time
+
+# --- Third-party ---
+from dotenv import find_dotenv, load_dotenv
+
+# --- Local ---
+from utils.cache import make_key
+from utils.fake_llm import parse_latency
+
+# Load environment variables
+load_dotenv(find_dotenv())
+
+# SEARCH_BACKEND: "live" (default) or "fake" to serve every search tool from the
+# deterministic stand-ins below. FAKE_TOOL_LATENCY uses the same spec as FAKE_LLM_LATENCY.
+FAKE_TOOL_LATENCY = os.getenv("FAKE_TOOL_LATENCY", "0")
+FAKE_TOOL_SEED = int(os.getenv("FAKE_TOOL_SEED", "0"))
+
+_sample_latency = parse_latency(FAKE_TOOL_LATENCY, FAKE_TOOL_SEED)
+
+_WORDS = (
+    "analysis method model evidence trial outcome cohort dataset benchmark framework "
+    "approach performance evaluation review systematic clinical learning network system"
+).split()
+
+
+def enabled() -> bool:
+    return os.getenv("SEARCH_BACKEND", "live") == "fake"
+
+
+def _rng(tool: str, query: str) -> random.Random:
+    # Seed from the tool and query so the same search always returns the same results
+    return random.Random(make_key(tool, query.lower().strip(), FAKE_TOOL_SEED))
+
+
+def _sentence(rng: random.Random, query: str, words: int = 14) -> str:
+    body = " ".join(rng.choice(_WORDS) for _ in range(words))
+    return f"{query.capitalize()} {body}."
+
+
+def _slug(query: str) -> str:
+    return "-".join(query.lower().split())[:60] or "result"
+
+
+def arxiv_search_tool(query: str, max_results: int = 5) -> list[dict]:
+    rng = _rng("arxiv", query)
+    results = []
+    for i in range(min(max_results, 5)):
+        paper_id = f"{rng.randint(2001, 2512)}.{rng.randint(10000, 99999)}"
+        results.append({
+            "title": f"{query.title()}: study {i + 1}",
+            "authors": [f"Author {rng.randint(1, 500)}" for _ in range(rng.randint(1, 4))],
+            "published": f"20{rng.randint(15, 25)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+            "url": f"http://arxiv.org/abs/{paper_id}v1",
+            "summary": " ".join(_sentence(rng, query) for _ in range(4)),
+            "link_pdf": f"http://arxiv.org/pdf/{paper_id}v1",
+        })
+    return results
+
+
+def tavily_search_tool(query: str, max_results: int = 5, include_images: bool = False) -> list[dict]:
+    rng = _rng("tavily", query)
+    results = [{
+        "title": f"{query.title()} - overview {i + 1}",
+        "content": " ".join(_sentence(rng, query) for _ in range(3)),
+        "url": f"https://example.com/{_slug(query)}/{i + 1}",
+    } for i in range(min(max_results, 5))]
+    if include_images:
+        results.append({"image_url": f"https://example.com/{_slug(query)}.png"})
+    return results
+
+
+def wikipedia_search_tool(query: str, sentences: int = 5, top_k: int = 1) -> list[dict]:
+    rng = _rng("wikipedia", query)
+    titles = [query.title()] + [f"{query.title()} ({rng.choice(_WORDS)})" for _ in range(min(top_k, 5) - 1)]
+    return [{
+        "title": title,
+        "summary": " ".join(_sentence(rng, query) for _ in range(min(sentences, 5))),
+        "url": f"https://en.wikipedia.org/wiki/{title.replace(' ', '_')}",
+    } for title in titles]
+
+
+def _medical(tool: str, domain: str, query: str, max_results: int) -> list[dict]:
+    rng = _rng(tool, query)
+    return [{
+        "title": f"{query.title()}: {rng.choice(['randomized trial', 'cohort study', 'systematic review'])} {i + 1}",
+        "content": " ".join(_sentence(rng, query) for _ in range(3)),
+        "url": f"https://{domain}/{rng.randint(10000000, 39999999)}/",
+        "score": round(rng.uniform(0.3, 0.95), 3),
+    } for i in range(min(max_results, 5))]
+
+
+def pubmed_search_tool(query: str, max_results: int = 5) -> list[dict]:
+    return _medical("pubmed", "pubmed.ncbi.nlm.nih.gov", query, max_results)
+
+
+def cochrane_search_tool(query: str, max_results: int = 5) -> list[dict]:
+    return _medical("cochrane", "www.cochranelibrary.com/cdsr/doi", query, max_results)
+
+
+def offline_capable(func):
+    """
+    Serves `func` from the fake of the same name when SEARCH_BACKEND=fake.
+    The backend is checked on every call so it can be switched at runtime.
+    """
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if enabled():
+            time.sleep(_sample_latency(func.__name__, args, kwargs))
+            return globals()[func.__name__](*args, **kwargs)
+        return func(*args, **kwargs)
+    return wrapper
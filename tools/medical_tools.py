@@ -1,14 +1,29 @@
 # --- Standard library ---
+import contextvars
 import os
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import TimeoutError as FuturesTimeout
 
 # --- Third-party ---
 from dotenv import load_dotenv
-from tavily import TavilyClient
+
+# --- Local ---
+from tools.clients import TOOL_READ_TIMEOUT, get_tavily
+from tools.fake_tools import offline_capable
+from tools.resilience import call
+from tools.search_cache import cached
+from utils.tracing import span
 
 # Init env
 load_dotenv()
 
+# Seconds medical_search_tool waits for all sources before returning what has arrived
+MEDICAL_SEARCH_DEADLINE = float(os.getenv("MEDICAL_SEARCH_DEADLINE", "20"))
+
 
+@offline_capable
+@cached("pubmed")
 def pubmed_search_tool(query: str, max_results: int = 5) -> list[dict]:
     """
     Searches PubMed for medical research papers and publications matching the given query.
@@ -22,26 +37,18 @@ def pubmed_search_tool(query: str, max_results: int = 5) -> list[dict]:
     """
     max_results = min(max_results, 5)  # Limit to reasonable number
 
-    api_key = os.getenv("TAVILY_API_KEY")
-    if not api_key:
-        raise ValueError("TAVILY_API_KEY not found in environment variables.")
-
-    # Get optional base URL for Tavily
-    api_base_url = os.getenv("DLAI_TAVILY_BASE_URL")
-
-    # Initialize Tavily client
-    params = {'api_key': api_key}
-    if api_base_url:
-        params['api_base_url'] = api_base_url
-
-    client = TavilyClient(**params)
+    # Shared Tavily client with a pooled connection, see tools/clients.py
+    client = get_tavily()
 
     try:
         # Search with domain restriction to PubMed
-        response = client.search(
+        response = call(
+            "tavily",
+            client.search,
             query=query,
             max_results=max_results,
-            include_domains=["pubmed.ncbi.nlm.nih.gov"]
+            include_domains=["pubmed.ncbi.nlm.nih.gov"],
+            timeout=TOOL_READ_TIMEOUT
         )
 
         results = []
@@ -83,6 +90,8 @@ pubmed_tool_def = {
 }
 
 
+@offline_capable
+@cached("cochrane")
 def cochrane_search_tool(query: str, max_results: int = 5) -> list[dict]:
     """
     Searches Cochrane Library for systematic reviews and evidence-based medical information.
@@ -96,26 +105,18 @@ def cochrane_search_tool(query: str, max_results: int = 5) -> list[dict]:
     """
     max_results = min(max_results, 5)  # Limit to reasonable number
 
-    api_key = os.getenv("TAVILY_API_KEY")
-    if not api_key:
-        raise ValueError("TAVILY_API_KEY not found in environment variables.")
-
-    # Get optional base URL for Tavily
-    api_base_url = os.getenv("DLAI_TAVILY_BASE_URL")
-
-    # Initialize Tavily client
-    params = {'api_key': api_key}
-    if api_base_url:
-        params['api_base_url'] = api_base_url
-
-    client = TavilyClient(**params)
+    # Shared Tavily client with a pooled connection, see tools/clients.py
+    client = get_tavily()
 
     try:
         # Search with domain restriction to Cochrane Library
-        response = client.search(
+        response = call(
+            "tavily",
+            client.search,
             query=query,
             max_results=max_results,
-            include_domains=["cochranelibrary.com"]
+            include_domains=["cochranelibrary.com"],
+            timeout=TOOL_READ_TIMEOUT
         )
 
         results = []
@@ -157,32 +158,63 @@ cochrane_tool_def = {
 }
 
 
-def medical_search_tool(query: str, max_results: int = 5) -> list[dict]:
+def _timed_search(source: str, search, query: str, max_results: int) -> tuple[str, list[dict], float]:
+    start = time.perf_counter()
+    with span(f"source {source}", query=query) as source_span:
+        try:
+            results = search(query, max_results)
+        except Exception as e:
+            results = [{"error": f"{source} search failed: {e}"}]
+        source_span.set("results", len(results))
+    return source, results, time.perf_counter() - start
+
+
+def medical_search_tool(query: str, max_results: int = 5, deadline: float = MEDICAL_SEARCH_DEADLINE) -> list[dict]:
     """
     Searches both PubMed and Cochrane Library for comprehensive medical information.
 
+    Both sources are queried concurrently and their results merged as they
+    arrive. Sources that have not answered within `deadline` seconds are
+    left out, so a slow backend yields partial results instead of a slow
+    search. The time taken by each source is printed and traced.
+
     Args:
         query (str): Medical topic or search keywords.
         max_results (int): Maximum number of results per source (default 5).
+        deadline (float): Seconds to wait for all sources.
 
     Returns:
         list[dict]: Combined results from both PubMed and Cochrane Library.
     """
-    results = []
-
-    # Search PubMed
-    pubmed_results = pubmed_search_tool(query, max_results)
-    for result in pubmed_results:
-        if "error" not in result and "message" not in result:
-            result["source"] = "PubMed"
-            results.append(result)
-
-    # Search Cochrane Library
-    cochrane_results = cochrane_search_tool(query, max_results)
-    for result in cochrane_results:
-        if "error" not in result and "message" not in result:
-            result["source"] = "Cochrane Library"
-            results.append(result)
+    sources = {"PubMed": pubmed_search_tool, "Cochrane Library": cochrane_search_tool}
+    results, timings = [], {}
+
+    with span("medical_search_tool", query=query) as search_span:
+        pool = ThreadPoolExecutor(max_workers=len(sources), thread_name_prefix="medical-search")
+        futures = {
+            pool.submit(contextvars.copy_context().run, _timed_search, source, search, query, max_results): source
+            for source, search in sources.items()
+        }
+        try:
+            for future in as_completed(futures, timeout=deadline):
+                source, found, elapsed = future.result()
+                timings[source] = round(elapsed, 3)
+                for result in found:
+                    if "error" not in result and "message" not in result:
+                        result["source"] = source
+                        results.append(result)
+        except FuturesTimeout:
+            for future, source in futures.items():
+                if not future.done():
+                    timings[source] = None
+                    print(f"⏱️ {source} did not answer within {deadline:g}s, returning partial results")
+        finally:
+            pool.shutdown(wait=False, cancel_futures=True)
+        search_span.set("timings", timings)
+
+    print("⏱️ Source timings: " + ", ".join(
+        f"{source} {'timed out' if t is None else f'{t:.2f}s'}" for source, t in timings.items()
+    ))
 
     if not results:
         return [{"message": "No results found on PubMed or Cochrane Library for this query."}]
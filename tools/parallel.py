@@ -0,0 +1,88 @@
+# --- Standard library ---
+import contextvars
+import os
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable
+
+# --- Third-party ---
+from dotenv import find_dotenv, load_dotenv
+
+# Load environment variables
+load_dotenv(find_dotenv())
+
+# Tool calls of one model turn run at the same time, each limited to TOOL_TIMEOUT seconds from its start
+TOOL_MAX_WORKERS = int(os.getenv("TOOL_MAX_WORKERS", "4"))
+TOOL_TIMEOUT = float(os.getenv("TOOL_TIMEOUT", "60"))
+# TOOL_POOL_WORKERS: threads shared by the tool calls of every run in the process
+TOOL_POOL_WORKERS = int(os.getenv("TOOL_POOL_WORKERS", "16"))
+
+_tool_pool = ThreadPoolExecutor(max_workers=max(1, TOOL_POOL_WORKERS), thread_name_prefix="tool")
+
+
+def run_parallel(
+    calls: list[tuple[str, dict]],
+    run: Callable[[str, dict], object],
+    max_workers: int = TOOL_MAX_WORKERS,
+    timeout: float = TOOL_TIMEOUT,
+) -> list:
+    """
+    Runs the tool calls of one model turn concurrently and returns their results in call order.
+
+    Calls run on a process-wide pool of TOOL_POOL_WORKERS threads, at most
+    `max_workers` of this turn's at once, each in a copy of the caller's
+    context so the run ledger, tracer and runtime follow it. Every call gets
+    `timeout` seconds counted from when it starts running, so calls queued
+    behind others get their full time too. A call still running at its
+    deadline is abandoned rather than waited for and gets an error result
+    naming the tool; one still waiting for a pool thread after `timeout`
+    seconds is cancelled instead.
+
+    Args:
+        calls (list[tuple[str, dict]]): (tool name, arguments) pairs.
+        run (Callable): Runs one tool call and returns its result.
+        max_workers (int): Maximum number of this turn's tools running at once.
+        timeout (float): Seconds each call may run.
+
+    Returns:
+        list: One result per call, in the same order as `calls`.
+    """
+    results = [None] * len(calls)
+    queued = deque(range(len(calls)))
+    pending, started = {}, {}
+
+    def task(i: int):
+        started[i] = time.perf_counter()
+        name, args = calls[i]
+        return run(name, args)
+
+    def deadline(i: int, submitted: float) -> float:
+        # Counted from the start of the call, or from submission while it waits for a pool thread
+        return started.get(i, submitted) + timeout
+
+    while queued or pending:
+        while queued and len(pending) < max(1, max_workers):
+            i = queued.popleft()
+            pending[_tool_pool.submit(contextvars.copy_context().run, task, i)] = (i, time.perf_counter())
+        wait(pending, timeout=max(0.0, min(deadline(*entry) for entry in pending.values()) - time.perf_counter()),
+             return_when=FIRST_COMPLETED)
+        now = time.perf_counter()
+        for future, (i, submitted) in list(pending.items()):
+            name = calls[i][0]
+            if future.done():
+                error = future.exception()
+                results[i] = {"error": f"{name} failed: {error}"} if error else future.result()
+            elif now < deadline(i, submitted):
+                continue
+            elif future.cancel():
+                results[i] = {"error": f"{name} timed out after {timeout:g} seconds waiting for a free worker"}
+                print(f"⏱️ {name} cancelled, no worker free within {timeout:g}s")
+            elif now < deadline(i, submitted):
+                # Started just now, between the check above and the cancel
+                continue
+            else:
+                results[i] = {"error": f"{name} timed out after {timeout:g} seconds"}
+                print(f"⏱️ {name} abandoned after its {timeout:g}s timeout")
+            del pending[future]
+    return results
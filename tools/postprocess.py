@@ -0,0 +1,184 @@
+# --- Standard library ---
+import hashlib
+import json
+import os
+import re
+from collections import Counter
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+# --- Third-party ---
+import numpy as np
+from dotenv import find_dotenv, load_dotenv
+
+# --- Local ---
+from utils.ledger import record_results
+from utils.run_store import estimate_tokens
+
+# Load environment variables
+load_dotenv(find_dotenv())
+
+# Search result post-processing settings
+# RESULT_POSTPROCESS: "1" (default) deduplicates, reranks and trims tool results, "0" sends them verbatim.
+# RESULT_TOKEN_BUDGET: tokens all tool results of one model turn may take together.
+# RESULT_FIELD_TOKENS: longest a content/summary field may be after trimming.
+# RESULT_DUPLICATE_BITS: SimHash bits two results may differ by and still count as near duplicates (of 64).
+RESULT_POSTPROCESS = os.getenv("RESULT_POSTPROCESS", "1").lower() not in ("0", "false", "off")
+RESULT_TOKEN_BUDGET = int(os.getenv("RESULT_TOKEN_BUDGET", "2500"))
+RESULT_FIELD_TOKENS = int(os.getenv("RESULT_FIELD_TOKENS", "160"))
+RESULT_DUPLICATE_BITS = int(os.getenv("RESULT_DUPLICATE_BITS", "6"))
+
+TEXT_FIELDS = ("content", "summary", "raw_content", "snippet")
+TRACKING_PARAMS = re.compile(r"^(utm_.*|fbclid|gclid|mc_cid|mc_eid|ref|ref_src|source)$")
+_WORD = re.compile(r"\w+")
+
+
+def canonical_url(url: str) -> str:
+    """
+    Normalizes a URL so the same page found by different sources compares equal:
+    lower-cased host without "www.", https, no fragment, tracking parameters or
+    trailing slash, sorted query, and arXiv PDF/versioned links mapped to the abstract.
+    """
+    if not url:
+        return ""
+    parts = urlsplit(url.strip())
+    host = parts.netloc.lower().removeprefix("www.")
+    path = parts.path.rstrip("/") or "/"
+    if host.endswith("arxiv.org"):
+        path = re.sub(r"^/pdf/", "/abs/", path)
+        path = re.sub(r"(v\d+)?(\.pdf)?$", "", path)
+    query = urlencode(sorted((k, v) for k, v in parse_qsl(parts.query) if not TRACKING_PARAMS.match(k.lower())))
+    return urlunsplit(("https", host, path, query, ""))
+
+
+def _words(text: str) -> list[str]:
+    return _WORD.findall(text.lower())
+
+
+def _text(item: dict) -> str:
+    return " ".join(str(item.get(field, "")) for field in ("title", *TEXT_FIELDS))
+
+
+def simhash(texts: list[str]) -> np.ndarray:
+    """64-bit SimHash fingerprint of each text, from its word 3-shingles."""
+    fingerprints = np.zeros(len(texts), dtype=np.uint64)
+    for i, text in enumerate(texts):
+        words = _words(text)
+        shingles = [" ".join(words[j:j + 3]) for j in range(max(1, len(words) - 2))]
+        hashes = np.frombuffer(b"".join(hashlib.blake2b(s.encode(), digest_size=8).digest() for s in shingles), dtype=np.uint8)
+        # Each bit is set in the fingerprint when it is set in most shingle hashes
+        bits = np.unpackbits(hashes.reshape(-1, 8), axis=1, bitorder="little")
+        majority = 2 * bits.sum(axis=0, dtype=np.int32) > len(shingles)
+        fingerprints[i] = np.packbits(majority, bitorder="little").view(np.uint64)[0]
+    return fingerprints
+
+
+def _hamming(fingerprint: np.uint64, others: np.ndarray) -> np.ndarray:
+    xor = np.bitwise_xor(others, fingerprint)
+    return np.unpackbits(xor.view(np.uint8).reshape(-1, 8), axis=1).sum(axis=1)
+
+
+def bm25(query: str, texts: list[str], k1: float = 1.2, b: float = 0.75) -> np.ndarray:
+    """BM25 relevance of each text to the query, scored for all texts at once."""
+    terms = sorted(set(_words(query)))
+    if not terms or not texts:
+        return np.zeros(len(texts))
+    counts = [Counter(_words(text)) for text in texts]
+    tf = np.array([[c[t] for t in terms] for c in counts], dtype=float)
+    length = np.array([sum(c.values()) for c in counts], dtype=float)
+    df = (tf > 0).sum(axis=0)
+    idf = np.log(1 + (len(texts) - df + 0.5) / (df + 0.5))
+    norm = k1 * (1 - b + b * length / max(length.mean(), 1.0))
+    return (idf * tf * (k1 + 1) / (tf + norm[:, None])).sum(axis=1)
+
+
+def trim(text: str, max_tokens: int = RESULT_FIELD_TOKENS) -> str:
+    """Cuts text to about `max_tokens`, at a sentence end when one is close enough."""
+    text = " ".join(str(text).split())
+    limit = max_tokens * 4
+    if len(text) <= limit:
+        return text
+    cut = text[:limit]
+    end = max(cut.rfind(". "), cut.rfind("? "), cut.rfind("! "))
+    return (cut[:end + 1] if end > limit // 2 else cut.rsplit(" ", 1)[0]) + " …"
+
+
+def compact_results(
+    calls: list[tuple[str, dict]],
+    results: list,
+    agent: str = "",
+    budget: int = RESULT_TOKEN_BUDGET,
+) -> list:
+    """
+    Deduplicates, reranks and trims the results of one model turn's tool calls.
+
+    Results of all calls are pooled so duplicates across sources are caught:
+    identical canonical URLs first, then near duplicates by SimHash of the
+    title and text. The rest are ranked by BM25 against the calls' queries,
+    their long text fields trimmed, and kept best first until `budget` tokens
+    are used. Errors and messages pass through untouched. The tokens before
+    and after are recorded in the run ledger.
+
+    Args:
+        calls (list[tuple[str, dict]]): (tool name, arguments) of each call.
+        results (list): Result of each call, in the same order.
+        agent (str): Agent the results are for, for the ledger.
+        budget (int): Tokens all results may take together.
+
+    Returns:
+        list: One compacted result per call, in the same order.
+    """
+    raw_tokens = sum(estimate_tokens(json.dumps(result, default=str)) for result in results)
+    if not RESULT_POSTPROCESS:
+        record_results(agent, raw_tokens, raw_tokens, 0, 0)
+        return results
+
+    # Pool the search hits of every call; everything else is passed through
+    hits, passthrough = [], [[] for _ in results]
+    for i, result in enumerate(results):
+        for item in result if isinstance(result, list) else [result]:
+            if isinstance(item, dict) and (item.get("url") or item.get("title")) and "error" not in item:
+                hits.append((i, item))
+            else:
+                passthrough[i].append(item)
+
+    query = " ".join(str(args.get("query", "")) for _, args in calls)
+    texts = [_text(item) for _, item in hits]
+    order = np.argsort(-bm25(query, texts), kind="stable")
+
+    # Walk the hits best first, dropping those that repeat a better one
+    seen_urls, kept, kept_prints = set(), [], []
+    fingerprints = simhash(texts)
+    for j in order:
+        i, item = hits[j]
+        url = canonical_url(item.get("url", ""))
+        if url and url in seen_urls:
+            continue
+        if kept_prints and _hamming(fingerprints[j], np.array(kept_prints)).min() <= RESULT_DUPLICATE_BITS:
+            continue
+        seen_urls.add(url)
+        kept_prints.append(fingerprints[j])
+        kept.append((i, item))
+
+    used = sum(estimate_tokens(json.dumps(items, default=str)) for items in passthrough if items)
+    compacted, dropped = [[] for _ in results], 0
+    for i, item in kept:
+        item = {k: trim(v) if k in TEXT_FIELDS and isinstance(v, str) else v for k, v in item.items()}
+        cost = estimate_tokens(json.dumps(item, default=str))
+        if used + cost > budget and any(compacted):
+            dropped += 1
+            continue
+        compacted[i].append(item)
+        used += cost
+
+    output = []
+    for i, result in enumerate(results):
+        items = compacted[i] + passthrough[i]
+        if not items:
+            items = [{"message": "Results repeated other searches or ranked too low to fit the context budget."}]
+        output.append(items if isinstance(result, list) or len(items) != 1 else items[0])
+
+    sent_tokens = sum(estimate_tokens(json.dumps(result, default=str)) for result in output)
+    record_results(agent, raw_tokens, sent_tokens, len(hits), len(kept) - dropped)
+    print(f"🧹 {len(hits)} results -> {len(kept) - dropped} ({len(hits) - len(kept)} duplicates, {dropped} over budget), "
+          f"{raw_tokens} -> {sent_tokens} tokens")
+    return output
@@ -1,65 +1,157 @@
 # --- Standard library ---
 import os
+import re
+import threading
 import xml.etree.ElementTree as ET
+from collections import OrderedDict
 
 # --- Third-party ---
 import requests
 from dotenv import load_dotenv
-from tavily import TavilyClient
-import wikipedia
+
+# --- Local ---
+from tools.clients import HTTP_TIMEOUT, TOOL_READ_TIMEOUT, get_session, get_tavily
+from tools.fake_tools import offline_capable
+from tools.resilience import ToolUnavailable, call, guard
+from tools.search_cache import cached
 
 # Init env
 load_dotenv()  # load variables 
 
-# Set user-agent for requests to arXiv
-session = requests.Session()
-session.headers.update({
-    "User-Agent": "LF-ADP-Agent/1.0 (mailto:your.email@example.com)"
-})
+WIKIPEDIA_API = "https://en.wikipedia.org/w/api.php"
+
+## arXiv search tool
+
+ARXIV_API = "https://export.arxiv.org/api/query"
+# arXiv paging settings
+# ARXIV_PAGE_SIZE: entries requested per page; ARXIV_MAX_RESULTS: most results one search may return.
+# Requests are spaced ARXIV_REQUEST_DELAY apart by the shared rate limiter, see tools/resilience.py.
+ARXIV_PAGE_SIZE = int(os.getenv("ARXIV_PAGE_SIZE", "25"))
+ARXIV_MAX_RESULTS = int(os.getenv("ARXIV_MAX_RESULTS", "50"))
+
+ATOM = "{http://www.w3.org/2005/Atom}"
+
+
+def _parse_entry(entry: ET.Element) -> dict:
+    link_pdf = None
+    for link in entry.findall(f"{ATOM}link"):
+        if link.attrib.get("title") == "pdf":
+            link_pdf = link.attrib.get("href")
+            break
+
+    return {
+        "title": " ".join(entry.findtext(f"{ATOM}title", "").split()),
+        "authors": [author.findtext(f"{ATOM}name") for author in entry.findall(f"{ATOM}author")],
+        "published": entry.findtext(f"{ATOM}published", "")[:10],
+        "url": entry.findtext(f"{ATOM}id"),
+        "summary": entry.findtext(f"{ATOM}summary", "").strip(),
+        "link_pdf": link_pdf
+    }
+
+
+def _fetch_arxiv_page(session, params: dict) -> list[dict]:
+    """
+    Fetches and parses one page of arXiv results as a single guarded request.
+
+    The Atom response is parsed while it downloads, and each entry is removed
+    from the document root once parsed, so the XML tree never holds more than
+    the entry being read.
+    """
+    entries = []
+    with guard("arxiv"), session.get(ARXIV_API, params=params, stream=True, timeout=HTTP_TIMEOUT) as response:
+        response.raise_for_status()
+        response.raw.decode_content = True
+        root = None
+        for event, element in ET.iterparse(response.raw, events=("start", "end")):
+            if root is None:
+                # The first start event is the <feed> element, the parent of every entry
+                root = element
+            elif event == "end" and element.tag == f"{ATOM}entry":
+                entries.append(_parse_entry(element))
+                root.remove(element)
+    return entries
+
+
+def iter_arxiv_entries(query: str, limit: int = ARXIV_MAX_RESULTS, page_size: int = ARXIV_PAGE_SIZE):
+    """
+    Yields arXiv entries matching the query, best match first, page by page.
+
+    Results are requested page by page (`start` / `max_results`), so at most
+    one page of parsed entries is held in memory (see `_fetch_arxiv_page`).
+    The next page is only requested once the caller asks for more entries,
+    so stopping early saves both requests and the arXiv rate-limit delay
+    between them.
+
+    Args:
+        query (str): Search query for arXiv.
+        limit (int): Maximum number of entries to yield.
+        page_size (int): Number of entries requested per page.
 
+    Yields:
+        dict: Title, authors, published date, abstract URL, summary and PDF link of one paper.
+
+    Raises:
+        requests.exceptions.RequestException: If a page cannot be fetched.
+        ToolUnavailable: If arXiv is failing or its rate limit would make the caller wait too long.
+        xml.etree.ElementTree.ParseError: If a response is not valid Atom XML.
+    """
+    session = get_session("arxiv")
+    start = 0
+    while start < limit:
+        size = min(page_size, limit - start)
+        params = {"search_query": f"all:{query}", "start": start, "max_results": size}
+        page = _fetch_arxiv_page(session, params)
+        yield from page
+        # A short page means there are no more results
+        if len(page) < size:
+            return
+        start += len(page)
+
+
+def _is_relevant(entry: dict, terms: set[str]) -> bool:
+    text = f"{entry['title']} {entry['summary']}".lower()
+    return not terms or any(term in text for term in terms)
+
+
+@offline_capable
+@cached("arxiv")
 def arxiv_search_tool(query: str, max_results: int = 5) -> list[dict]:
     """
     Searches arXiv for research papers matching the given query.
-    """
-    max_results = min(max_results, 5)
-    url = f"https://export.arxiv.org/api/query?search_query=all:{query}&start=0&max_results={max_results}"
 
-    try:
-        response = session.get(url, timeout=60)
-        response.raise_for_status()
-    except requests.exceptions.RequestException as e:
-        return [{"error": str(e)}]
+    Entries that mention none of the query's terms in their title or abstract
+    are skipped, and paging stops as soon as `max_results` relevant papers
+    have been seen or twice that many entries have been scanned.
 
-    try:
-        root = ET.fromstring(response.content)
-        ns = {'atom': 'http://www.w3.org/2005/Atom'}
+    Args:
+        query (str): Search query for arXiv.
+        max_results (int): Number of papers to return, at most ARXIV_MAX_RESULTS.
 
-        results = []
-        for entry in root.findall('atom:entry', ns):
-            title = entry.find('atom:title', ns).text.strip()
-            authors = [author.find('atom:name', ns).text for author in entry.findall('atom:author', ns)]
-            published = entry.find('atom:published', ns).text[:10]
-            url_abstract = entry.find('atom:id', ns).text
-            summary = entry.find('atom:summary', ns).text.strip()
-
-            link_pdf = None
-            for link in entry.findall('atom:link', ns):
-                if link.attrib.get('title') == 'pdf':
-                    link_pdf = link.attrib.get('href')
-                    break
+    Returns:
+        list[dict]: Title, authors, published date, URL, summary and PDF link per paper.
+    """
+    max_results = max(1, min(max_results, ARXIV_MAX_RESULTS))
+    terms = {term for term in re.findall(r"\w+", query.lower()) if len(term) > 2}
+    entries = iter_arxiv_entries(query, limit=min(2 * max_results, ARXIV_MAX_RESULTS))
 
-            results.append({
-                "title": title,
-                "authors": authors,
-                "published": published,
-                "url": url_abstract,
-                "summary": summary,
-                "link_pdf": link_pdf
-            })
+    results = []
+    try:
+        for entry in entries:
+            if _is_relevant(entry, terms):
+                results.append(entry)
+                if len(results) >= max_results:
+                    break
+    except (requests.exceptions.RequestException, ToolUnavailable) as e:
+        # Keep the papers from pages that did arrive
+        if not results:
+            return [{"error": str(e)}]
+    except ET.ParseError as e:
+        if not results:
+            return [{"error": f"Parsing failed: {str(e)}"}]
+    finally:
+        entries.close()
 
-        return results
-    except Exception as e:
-        return [{"error": f"Parsing failed: {str(e)}"}]
+    return results
 
 
 arxiv_tool_def = {
@@ -76,7 +168,7 @@ arxiv_tool_def = {
                 },
                 "max_results": {
                     "type": "integer",
-                    "description": "Maximum number of results to return.",
+                    "description": "Maximum number of results to return (up to 50 for literature reviews).",
                     "default": 5
                 }
             },
@@ -87,6 +179,8 @@ arxiv_tool_def = {
 
 
 
+@offline_capable
+@cached("tavily")
 def tavily_search_tool(query: str, max_results: int = 5, include_images: bool = False) -> list[dict]:
     """
     Perform a search using the Tavily API.
@@ -100,25 +194,16 @@ def tavily_search_tool(query: str, max_results: int = 5, include_images: bool =
         list[dict]: A list of dictionaries with keys like 'title', 'content', and 'url'.
     """
     max_results = min(max_results, 5)
-    params = {}
-    api_key = os.getenv("TAVILY_API_KEY")
-    if not api_key:
-        raise ValueError("TAVILY_API_KEY not found in environment variables.")
-    params['api_key'] = api_key
-
-    #client = TavilyClient(api_key)
-
-    api_base_url = os.getenv("DLAI_TAVILY_BASE_URL")
-    if api_base_url:
-        params['api_base_url'] = api_base_url
-
-    client = TavilyClient(api_key=api_key, api_base_url=api_base_url)
+    client = get_tavily()
 
     try:
-        response = client.search(
+        response = call(
+            "tavily",
+            client.search,
             query=query,
             max_results=max_results,
-            include_images=include_images
+            include_images=include_images,
+            timeout=TOOL_READ_TIMEOUT
         )
 
         results = []
@@ -169,29 +254,84 @@ tavily_tool_def = {
 
 ## Wikipedia search tool
 
-def wikipedia_search_tool(query: str, sentences: int = 5) -> list[dict]:
+# Titles already resolved for a normalized query, so repeat lookups skip the full-text search
+RESOLVED_TITLES_MAX = 1024
+_resolved_titles: OrderedDict[str, list[str]] = OrderedDict()
+_titles_lock = threading.Lock()
+
+
+def _remember_titles(key: str, titles: list[str]) -> None:
+    with _titles_lock:
+        _resolved_titles[key] = titles
+        _resolved_titles.move_to_end(key)
+        while len(_resolved_titles) > RESOLVED_TITLES_MAX:
+            _resolved_titles.popitem(last=False)
+
+
+def _known_titles(key: str, top_k: int) -> list[str] | None:
+    with _titles_lock:
+        titles = _resolved_titles.get(key)
+        if titles is None or len(titles) < top_k:
+            return None
+        _resolved_titles.move_to_end(key)
+        return titles[:top_k]
+
+
+def _wikipedia_query(params: dict) -> dict:
+    response = get_session("wikipedia").get(WIKIPEDIA_API, params=params, timeout=HTTP_TIMEOUT)
+    response.raise_for_status()
+    return response.json()
+
+
+@offline_capable
+@cached("wikipedia")
+def wikipedia_search_tool(query: str, sentences: int = 5, top_k: int = 1) -> list[dict]:
     """
-    Searches Wikipedia for a summary of the given query.
+    Searches Wikipedia for summaries of the articles best matching the given query.
+
+    The search, lead-section extracts and URLs of all `top_k` articles come back
+    in a single MediaWiki API request. Queries whose titles were already resolved
+    are fetched by title instead of searched again.
 
     Args:
         query (str): Search query for Wikipedia.
-        sentences (int): Number of sentences to include in the summary.
+        sentences (int): Number of sentences to include in each summary.
+        top_k (int): Number of matching articles to return.
 
     Returns:
-        list[dict]: A list with a single dictionary containing title, summary, and URL.
+        list[dict]: Up to `top_k` dictionaries containing title, summary, and URL, best match first.
     """
-    sentences = min(sentences, 5)
+    sentences = max(1, min(sentences, 5))
+    top_k = max(1, min(top_k, 5))
+    key = " ".join(query.lower().split())
+    params = {
+        "action": "query", "prop": "extracts|info", "redirects": 1, "exintro": 1, "explaintext": 1,
+        "exsentences": sentences, "exlimit": top_k, "inprop": "url", "format": "json",
+    }
+    titles = _known_titles(key, top_k)
+    if titles:
+        params["titles"] = "|".join(titles)
+    else:
+        params.update({"generator": "search", "gsrsearch": query, "gsrlimit": top_k})
+
     try:
-        page_title = wikipedia.search(query)[0]
-        page = wikipedia.page(page_title)
-        summary = wikipedia.summary(page_title, sentences=sentences)
+        data = call("wikipedia", _wikipedia_query, params)
+        pages = [page for page in data.get("query", {}).get("pages", {}).values() if "missing" not in page]
+        if not pages:
+            return [{"error": f"No Wikipedia article found for '{query}'."}]
+
+        # Search results carry their rank in `index`; title lookups keep the remembered order
+        order = {title: i for i, title in enumerate(titles or [])}
+        pages.sort(key=lambda page: page.get("index", order.get(page["title"], len(order))))
+        if not titles:
+            _remember_titles(key, [page["title"] for page in pages])
 
         return [{
-            "title": page.title,
-            "summary": summary,
-            "url": page.url
-        }]
-    except Exception as e:
+            "title": page["title"],
+            "summary": page.get("extract", ""),
+            "url": page["fullurl"]
+        } for page in pages]
+    except (requests.exceptions.RequestException, ToolUnavailable, KeyError, ValueError) as e:
         return [{"error": str(e)}]
 
 # Tool definition
@@ -209,8 +349,13 @@ wikipedia_tool_def = {
                 },
                 "sentences": {
                     "type": "integer",
-                    "description": "Number of sentences in the summary.",
+                    "description": "Number of sentences in each summary.",
                     "default": 5
+                },
+                "top_k": {
+                    "type": "integer",
+                    "description": "Number of matching articles to return.",
+                    "default": 1
                 }
             },
             "required": ["query"]
@@ -0,0 +1,290 @@
+# --- Standard library ---
+import contextvars
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, as_completed, wait
+from contextlib import contextmanager
+
+# --- Third-party ---
+import requests
+from dotenv import find_dotenv, load_dotenv
+
+# --- Local ---
+from utils.tracing import span
+
+# Load environment variables
+load_dotenv(find_dotenv())
+
+
+def _pairs(name: str, default: str) -> dict[str, str]:
+    pairs = {}
+    for item in os.getenv(name, default).split(","):
+        endpoint, _, value = item.partition("=")
+        if endpoint.strip() and value.strip():
+            pairs[endpoint.strip()] = value.strip()
+    return pairs
+
+
+# Rate limits per external endpoint, shared by every session in the process
+# TOOL_RATE_LIMITS: "endpoint=rate/burst" in requests per second, e.g. "tavily=5/10,wikipedia=20/20".
+# ARXIV_REQUEST_DELAY: seconds between arXiv requests, arXiv asks for at least 3.
+# TOOL_RATE_WAIT: longest a call waits for its turn before failing instead.
+ARXIV_REQUEST_DELAY = float(os.getenv("ARXIV_REQUEST_DELAY", "3"))
+RATE_LIMITS = _pairs("TOOL_RATE_LIMITS", f"arxiv={1 / max(ARXIV_REQUEST_DELAY, 0.001):g}/1,tavily=5/10,wikipedia=20/20")
+TOOL_RATE_WAIT = float(os.getenv("TOOL_RATE_WAIT", "30"))
+# Circuit breaker: open after CIRCUIT_FAILURES consecutive failures, probe again after CIRCUIT_RESET seconds
+CIRCUIT_FAILURES = int(os.getenv("CIRCUIT_FAILURES", "5"))
+CIRCUIT_RESET = float(os.getenv("CIRCUIT_RESET", "30"))
+# TOOL_HEDGE: "endpoint=seconds", send a second request when the first has not answered in time
+HEDGE_AFTER = {endpoint: float(value) for endpoint, value in _pairs("TOOL_HEDGE", "wikipedia=2").items()}
+
+_lock = threading.Lock()
+_endpoints = {}
+_hedge_pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix="hedge")
+
+
+class ToolUnavailable(Exception):
+    """Raised instead of calling an endpoint that is rate limited or failing."""
+
+
+class CircuitOpen(ToolUnavailable):
+    """Raised while an endpoint's circuit breaker is open."""
+
+
+class RateLimited(ToolUnavailable):
+    """Raised when a call would wait longer than TOOL_RATE_WAIT for its turn."""
+
+
+class TokenBucket:
+    """
+    Allows `rate` calls per second on average and bursts of up to `capacity` calls.
+
+    Args:
+        rate (float): Tokens added per second.
+        capacity (float): Most tokens the bucket holds.
+    """
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = max(1.0, capacity)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self, max_wait: float | None = None) -> float | None:
+        """
+        Takes a token, returning how long the caller must wait before using it,
+        or None (taking nothing) when that would be longer than `max_wait`.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            delay = max(0.0, (1 - self.tokens) / self.rate)
+            if max_wait is not None and delay > max_wait:
+                return None
+            # Tokens may go negative: callers queue up behind earlier reservations
+            self.tokens -= 1
+            return delay
+
+
+class CircuitBreaker:
+    """
+    Fails fast while an endpoint is unhealthy.
+
+    Closed, it lets every call through and counts consecutive failures. After
+    `failures` of them it opens and rejects calls for `reset_after` seconds,
+    then lets a single probe through (half open): success closes it again,
+    failure reopens it.
+
+    Args:
+        name (str): Endpoint name, used in messages.
+        failures (int): Consecutive failures that open the circuit.
+        reset_after (float): Seconds the circuit stays open before probing.
+    """
+    def __init__(self, name: str, failures: int = CIRCUIT_FAILURES, reset_after: float = CIRCUIT_RESET):
+        self.name = name
+        self.failures = failures
+        self.reset_after = reset_after
+        self.state = "closed"
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> None:
+        """Raises `CircuitOpen` if the call must not be made."""
+        with self._lock:
+            if self.state == "open" and time.monotonic() - self.opened_at >= self.reset_after:
+                self.state = "half_open"
+            if self.state == "closed":
+                return
+            if self.state == "half_open" and not self._probing:
+                self._probing = True
+                return
+            retry_in = max(0.0, self.reset_after - (time.monotonic() - self.opened_at))
+        raise CircuitOpen(f"{self.name} is failing, skipped without calling it (retry in {retry_in:.0f}s)")
+
+    def release(self) -> None:
+        """Gives up a half-open probe that was allowed but never sent."""
+        with self._lock:
+            self._probing = False
+
+    def record(self, ok: bool) -> None:
+        with self._lock:
+            self._probing = False
+            if ok:
+                if self.state != "closed":
+                    print(f"🔌 {self.name} recovered, circuit closed")
+                self.state, self.consecutive_failures = "closed", 0
+                return
+            self.consecutive_failures += 1
+            if self.state == "half_open" or self.consecutive_failures >= self.failures:
+                if self.state != "open":
+                    print(f"🔌 {self.name} circuit open after {self.consecutive_failures} consecutive failures")
+                self.state, self.opened_at = "open", time.monotonic()
+
+
+class Endpoint:
+    """Rate limiter, circuit breaker and counters of one external endpoint."""
+    def __init__(self, name: str):
+        rate, _, burst = RATE_LIMITS.get(name, "10/10").partition("/")
+        rate, burst = float(rate), float(burst or rate)
+        self.name = name
+        self.bucket = TokenBucket(rate, burst)
+        self.breaker = CircuitBreaker(name)
+        self.hedge_after = HEDGE_AFTER.get(name)
+        self.counts = {"calls": 0, "failures": 0, "rejected": 0, "throttled": 0, "hedges": 0, "hedge_wins": 0}
+        self.waited = 0.0
+        self._lock = threading.Lock()
+
+    def count(self, key: str, waited: float = 0.0) -> None:
+        with self._lock:
+            self.counts[key] += 1
+            self.waited += waited
+
+    def metrics(self) -> dict:
+        with self._lock:
+            return {
+                "state": self.breaker.state,
+                "tokens": round(self.bucket.tokens, 2),
+                **self.counts,
+                "rate_wait_seconds": round(self.waited, 3),
+            }
+
+
+def is_outage(error: Exception) -> bool:
+    """
+    Whether `error` means the endpoint itself is unhealthy: a 5xx answer, a timeout or a
+    connection failure. Other errors, such as a 4xx answer to a bad request, say nothing
+    about the endpoint's health.
+    """
+    if isinstance(error, (requests.exceptions.Timeout, requests.exceptions.ConnectionError, TimeoutError, ConnectionError)):
+        return True
+    # Timeouts of other clients, e.g. tavily.errors.TimeoutError or httpx.ReadTimeout
+    if "Timeout" in type(error).__name__:
+        return True
+    status = getattr(getattr(error, "response", None), "status_code", None)
+    return isinstance(status, int) and status >= 500
+
+
+def get_endpoint(name: str) -> Endpoint:
+    endpoint = _endpoints.get(name)
+    if endpoint is None:
+        with _lock:
+            endpoint = _endpoints.setdefault(name, Endpoint(name))
+    return endpoint
+
+
+@contextmanager
+def guard(name: str, max_wait: float = TOOL_RATE_WAIT):
+    """
+    Runs the block as one request to endpoint `name`: fails fast with `CircuitOpen`
+    while the endpoint is unhealthy, waits for a rate-limit token (or raises
+    `RateLimited` if that would take longer than `max_wait`), and records
+    whether the request succeeded. Any exception raised by the block counts
+    as a failed call, but only outages (see `is_outage`) count towards the
+    circuit breaker; a 4xx answer means the endpoint is up.
+    """
+    endpoint = get_endpoint(name)
+    try:
+        endpoint.breaker.allow()
+    except CircuitOpen:
+        endpoint.count("rejected")
+        raise
+    delay = endpoint.bucket.reserve(max_wait)
+    if delay is None:
+        endpoint.breaker.release()
+        endpoint.count("rejected")
+        raise RateLimited(f"{name} rate limit reached, more than {max_wait:g}s wait for a request slot")
+    if delay > 0:
+        endpoint.count("throttled", delay)
+        time.sleep(delay)
+
+    with span(f"endpoint {name}", circuit=endpoint.breaker.state, rate_wait=round(delay, 3)):
+        endpoint.count("calls")
+        try:
+            yield
+        except Exception as e:
+            endpoint.count("failures")
+            endpoint.breaker.record(not is_outage(e))
+            raise
+        except BaseException:
+            # The caller stopped reading (e.g. a closed generator), the endpoint did answer
+            endpoint.breaker.record(True)
+            raise
+        endpoint.breaker.record(True)
+
+
+def call(name: str, func, *args, **kwargs):
+    """
+    Calls `func(*args, **kwargs)` as a guarded request to endpoint `name`, see `guard`.
+
+    If the endpoint has a hedge delay (TOOL_HEDGE) and the call has not returned
+    that long after its request was sent, an identical second request is sent
+    when a rate-limit token is free right away, and whichever answers first
+    wins; the other is abandoned. Only use it for idempotent reads.
+
+    Raises:
+        ToolUnavailable: If the endpoint is failing or rate limited.
+    """
+    endpoint = get_endpoint(name)
+    if endpoint.hedge_after is None:
+        with guard(name):
+            return func(*args, **kwargs)
+
+    def attempt(max_wait: float, sent: Future | None = None):
+        with guard(name, max_wait):
+            if sent is not None:
+                sent.set_result(time.perf_counter())
+            return func(*args, **kwargs)
+
+    # The hedge delay counts from when the first request goes out, not from when it
+    # was queued for a pool thread or waited for a rate-limit token
+    sent = Future()
+    first = _hedge_pool.submit(contextvars.copy_context().run, attempt, TOOL_RATE_WAIT, sent)
+    wait([first, sent], return_when=FIRST_COMPLETED)
+    if not first.done():
+        wait([first], timeout=max(0.0, sent.result() + endpoint.hedge_after - time.perf_counter()))
+    if first.done():
+        return first.result()
+
+    # The hedge only goes out if it does not have to wait for a rate-limit token
+    second = _hedge_pool.submit(contextvars.copy_context().run, attempt, 0.0)
+    endpoint.count("hedges")
+    for future in as_completed([first, second]):
+        if future.exception() is None:
+            if future is second:
+                endpoint.count("hedge_wins")
+            return future.result()
+    raise first.exception()
+
+
+def metrics() -> dict:
+    """Returns circuit state, available tokens and call counters for every endpoint used so far."""
+    with _lock:
+        endpoints = list(_endpoints.values())
+    return {endpoint.name: endpoint.metrics() for endpoint in endpoints}
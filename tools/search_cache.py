@@ -0,0 +1,120 @@
+# --- Standard library ---
+import functools
+import inspect
+import os
+import threading
+
+# --- Third-party ---
+from dotenv import find_dotenv, load_dotenv
+
+# --- Local ---
+from utils.cache import SQLiteCache, make_key
+
+# Load environment variables
+load_dotenv(find_dotenv())
+
+# Search result cache settings
+# SEARCH_CACHE: "1" (default) caches live search results, "0" disables the cache.
+# SEARCH_CACHE_TTLS overrides the per-source TTLs in seconds, e.g. "tavily=600,wikipedia=86400".
+SEARCH_CACHE = os.getenv("SEARCH_CACHE", "1").lower() not in ("0", "false", "off")
+CACHE_PATH = os.getenv("SEARCH_CACHE_PATH", "data/search_cache.db")
+CACHE_MAX_ENTRIES = int(os.getenv("SEARCH_CACHE_MAX_ENTRIES", "20000"))
+CACHE_MAX_BYTES = int(os.getenv("SEARCH_CACHE_MAX_BYTES", str(100 * 1024 * 1024)))
+
+# Encyclopedic and archival sources change slowly, web results quickly
+DEFAULT_TTLS = {
+    "wikipedia": 30 * 24 * 3600,
+    "arxiv": 7 * 24 * 3600,
+    "cochrane": 7 * 24 * 3600,
+    "pubmed": 24 * 3600,
+    "tavily": 6 * 3600,
+}
+DEFAULT_TTL = 24 * 3600
+
+_counters = {}
+_cache = None
+_lock = threading.Lock()
+
+
+def _ttls() -> dict:
+    ttls = dict(DEFAULT_TTLS)
+    for item in os.getenv("SEARCH_CACHE_TTLS", "").split(","):
+        source, _, value = item.partition("=")
+        if source.strip() and value.strip():
+            ttls[source.strip()] = float(value)
+    return ttls
+
+
+TTLS = _ttls()
+
+
+def get_cache() -> SQLiteCache:
+    global _cache
+    if _cache is None:
+        with _lock:
+            if _cache is None:
+                _cache = SQLiteCache(CACHE_PATH, max_entries=CACHE_MAX_ENTRIES, max_bytes=CACHE_MAX_BYTES, default_ttl=DEFAULT_TTL)
+    return _cache
+
+
+def normalize_query(query: str) -> str:
+    """Lower-cases the query and collapses whitespace, so trivially different queries share an entry."""
+    return " ".join(str(query).lower().split())
+
+
+def _count(source: str, hit: bool) -> None:
+    with _lock:
+        hits, misses = _counters.get(source, (0, 0))
+        _counters[source] = (hits + 1, misses) if hit else (hits, misses + 1)
+
+
+def cached(source: str):
+    """
+    Caches a search tool's results in SQLite, keyed by `source`, the normalized query and
+    the other arguments (defaults included), for the source's TTL.
+
+    Results containing an error are not cached. Apply it under `offline_capable`
+    so offline runs never read or write the cache.
+    """
+    def decorator(func):
+        signature = inspect.signature(func)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not SEARCH_CACHE:
+                return func(*args, **kwargs)
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            params = dict(bound.arguments)
+            params["query"] = normalize_query(params.get("query", ""))
+            key = make_key("search", source, params)
+
+            value = get_cache().get(key)
+            _count(source, value is not None)
+            if value is not None:
+                return value
+            value = func(*args, **kwargs)
+            items = value if isinstance(value, list) else [value]
+            if not any(isinstance(item, dict) and "error" in item for item in items):
+                get_cache().set(key, value, ttl=TTLS.get(source, DEFAULT_TTL))
+            return value
+        return wrapper
+    return decorator
+
+
+def stats() -> dict:
+    """Returns hit/miss counters and hit rates per source, plus the size of the cache."""
+    with _lock:
+        sources = {
+            source: {"hits": h, "misses": m, "hit_rate": h / (h + m) if h + m else 0.0}
+            for source, (h, m) in _counters.items()
+        }
+    hits = sum(s["hits"] for s in sources.values())
+    lookups = hits + sum(s["misses"] for s in sources.values())
+    cache = get_cache().stats()
+    return {
+        "hit_rate": hits / lookups if lookups else 0.0,
+        "entries": cache["entries"],
+        "bytes": cache["bytes"],
+        "by_source": sources,
+    }
@@ -0,0 +1,163 @@
+# --- Standard library ---
+import os
+import time
+from dataclasses import dataclass, replace
+
+# --- Third-party ---
+from dotenv import find_dotenv, load_dotenv
+
+# --- Local ---
+from utils.ledger import current_ledger, record_degradation
+
+# Load environment variables
+load_dotenv(find_dotenv())
+
+
+def _limit(name: str, cast=int):
+    value = cast(os.getenv(name) or 0)
+    return value if value > 0 else None
+
+
+# Per-run limits; unset or 0 means unlimited
+RUN_DEADLINE = _limit("RUN_DEADLINE", float)
+RUN_MAX_TOKENS = _limit("RUN_MAX_TOKENS")
+RUN_MAX_MODEL_CALLS = _limit("RUN_MAX_MODEL_CALLS")
+RUN_MAX_TOOL_CALLS = _limit("RUN_MAX_TOOL_CALLS")
+# Degrade once less than this fraction of any budget is left, switching to FALLBACK_MODEL
+BUDGET_LOW_FRACTION = float(os.getenv("BUDGET_LOW_FRACTION", "0.25"))
+BUDGET_FALLBACK_MODEL = os.getenv("BUDGET_FALLBACK_MODEL", "gpt-4o-mini")
+
+# Agents whose passes can be skipped when the budget runs low
+OPTIONAL_AGENTS = {"editor_agent"}
+
+# Budgets that limit model calls and searches respectively
+MODEL_BUDGETS = ("deadline", "tokens", "model_calls")
+TOOL_BUDGETS = ("deadline", "tool_calls")
+
+
+class BudgetExceeded(Exception):
+    """Raised before a model call when a run budget is used up."""
+
+
+@dataclass
+class RunBudget:
+    """
+    Wall-clock, token, model call and tool call limits for one workflow run.
+
+    Spending is read from the run ledger, so every call made through the
+    runtime counts, whichever agent makes it. When less than `low_fraction`
+    of any limit is left the run degrades (smaller model, fewer searches,
+    optional editor passes skipped); once a limit is reached further model
+    calls raise `BudgetExceeded`. Every degradation is recorded in the ledger,
+    one entry per kind and agent with a count of the calls it affected.
+    Limits are checked before each call, so calls already in flight in
+    parallel steps can overshoot them slightly.
+
+    Args:
+        deadline (float, optional): Seconds the run may take.
+        max_tokens (int, optional): Uncached tokens the run may spend.
+        max_model_calls (int, optional): Uncached model calls the run may make.
+        max_tool_calls (int, optional): Tool calls the run may make.
+        low_fraction (float): Remaining fraction below which the run degrades.
+        fallback_model (str): Model used instead of larger ones when the budget is low.
+    """
+    deadline: float | None = None
+    max_tokens: int | None = None
+    max_model_calls: int | None = None
+    max_tool_calls: int | None = None
+    low_fraction: float = BUDGET_LOW_FRACTION
+    fallback_model: str = BUDGET_FALLBACK_MODEL
+    started_at: float | None = None
+
+    @classmethod
+    def from_env(cls) -> "RunBudget":
+        return cls(RUN_DEADLINE, RUN_MAX_TOKENS, RUN_MAX_MODEL_CALLS, RUN_MAX_TOOL_CALLS)
+
+    def start(self) -> "RunBudget":
+        """Returns a copy whose deadline counts from now."""
+        return replace(self, started_at=time.time())
+
+    def time_left(self) -> float | None:
+        if self.deadline is None:
+            return None
+        elapsed = time.time() - self.started_at if self.started_at else 0.0
+        return self.deadline - elapsed
+
+    def remaining(self) -> dict[str, float]:
+        """Fraction left of each limited budget (negative once overspent)."""
+        ledger = current_ledger()
+        used = ledger.usage() if ledger is not None else {"tokens": 0, "model_calls": 0, "tool_calls": 0}
+        left = {}
+        if self.deadline is not None:
+            left["deadline"] = self.time_left() / self.deadline
+        for name, limit in (("tokens", self.max_tokens), ("model_calls", self.max_model_calls),
+                            ("tool_calls", self.max_tool_calls)):
+            if limit is not None:
+                left[name] = 1 - used[name] / limit
+        return left
+
+    def _lowest(self, names: tuple | None = None) -> tuple[str, float] | None:
+        left = {k: v for k, v in self.remaining().items() if names is None or k in names}
+        if not left:
+            return None
+        return min(left.items(), key=lambda item: item[1])
+
+    def exhausted(self, names: tuple | None = None) -> str | None:
+        """Name of a used-up budget among `names` (all when None), or None."""
+        lowest = self._lowest(names)
+        return lowest[0] if lowest and lowest[1] <= 0 else None
+
+    def low(self, names: tuple | None = None) -> str | None:
+        """Name of a budget among `names` (all when None) below `low_fraction`, or None."""
+        lowest = self._lowest(names)
+        return lowest[0] if lowest and lowest[1] < self.low_fraction else None
+
+    def record(self, action: str, agent: str, reason: str) -> bool:
+        """Records a degradation in the run ledger; True the first time `action` is recorded for `agent` this run."""
+        return record_degradation(action, agent, reason)
+
+    def check(self, agent: str) -> None:
+        """Raises `BudgetExceeded` if the run may not make another model call."""
+        name = self.exhausted(MODEL_BUDGETS)
+        if name:
+            self.record("stop", agent, f"{name} budget exhausted")
+            raise BudgetExceeded(f"{name} budget exhausted")
+
+    def model_for(self, agent: str, model: str) -> str:
+        """Returns the model to use for a call, switching to `fallback_model` when the budget is low."""
+        name = self.low(MODEL_BUDGETS)
+        if name and model != self.fallback_model:
+            if self.record("smaller_model", agent, f"{name} budget low: {model} -> {self.fallback_model}"):
+                print(f"⚠️ {name} budget low, {agent} uses {self.fallback_model} instead of {model}")
+            return self.fallback_model
+        return model
+
+    def timeout(self, default: float) -> float:
+        """Per-request timeout that does not outlive the deadline."""
+        left = self.time_left()
+        return default if left is None else max(1.0, min(default, left))
+
+    def allow_optional(self, agent: str) -> bool:
+        """False when an optional pass (e.g. the editor) should be skipped to save budget."""
+        name = self.low(MODEL_BUDGETS)
+        if agent in OPTIONAL_AGENTS and name:
+            if self.record("skip_step", agent, f"{name} budget low"):
+                print(f"⚠️ {name} budget low, skipping {agent}")
+            return False
+        return True
+
+    def search_breadth(self, agent: str, max_tool_call: int) -> int:
+        """Number of searches an agent may run, reduced to one when the budget is low."""
+        name = self.low()
+        if name and max_tool_call > 1:
+            self.record("reduce_breadth", agent, f"{name} budget low: {max_tool_call} -> 1 searches")
+            return 1
+        return max_tool_call
+
+    def allow_tool(self, name: str) -> bool:
+        """False once the tool call budget (or the deadline) is used up."""
+        exhausted = self.exhausted(TOOL_BUDGETS)
+        if exhausted:
+            self.record("skip_tool", name, f"{exhausted} budget exhausted")
+            return False
+        return True
@@ -0,0 +1,131 @@
+# --- Standard library ---
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+
+def make_key(*parts) -> str:
+    """
+    Builds a content-addressed key from JSON-serializable parts.
+
+    Dictionaries are serialized with sorted keys so that logically identical
+    requests always hash to the same key.
+    """
+    payload = json.dumps(parts, sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class SQLiteCache:
+    """
+    Small persistent key/value cache backed by SQLite.
+
+    Values are stored as JSON. Entries expire after their TTL and the least
+    recently used entries are evicted once the cache exceeds `max_entries`
+    or `max_bytes`.
+
+    Args:
+        path (str): SQLite file path.
+        max_entries (int): Maximum number of stored entries.
+        max_bytes (int, optional): Maximum total size of stored values.
+        default_ttl (float, optional): Default time-to-live in seconds; None keeps entries forever.
+    """
+
+    def __init__(self, path: str, max_entries: int = 10000, max_bytes: int | None = None, default_ttl: float | None = None):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS cache (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    created_at REAL NOT NULL,
+                    expires_at REAL,
+                    last_access REAL NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_cache_last_access ON cache (last_access)")
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def get(self, key: str):
+        """Returns the cached value for `key`, or None if missing or expired."""
+        now = time.time()
+        with self._lock, self._connect() as conn:
+            row = conn.execute("SELECT value, expires_at FROM cache WHERE key = ?", (key,)).fetchone()
+            if row is None or (row[1] is not None and row[1] < now):
+                if row is not None:
+                    conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+                self.misses += 1
+                return None
+            conn.execute("UPDATE cache SET last_access = ? WHERE key = ?", (now, key))
+            self.hits += 1
+        return json.loads(row[0])
+
+    def set(self, key: str, value, ttl: float | None = None) -> None:
+        """Stores `value` under `key`, then evicts expired and least recently used entries."""
+        now = time.time()
+        ttl = self.default_ttl if ttl is None else ttl
+        data = json.dumps(value, ensure_ascii=False, default=str)
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO cache (key, value, size, created_at, expires_at, last_access) VALUES (?, ?, ?, ?, ?, ?)",
+                (key, data, len(data), now, now + ttl if ttl else None, now),
+            )
+            self._evict(conn, now)
+
+    def _evict(self, conn: sqlite3.Connection, now: float) -> None:
+        conn.execute("DELETE FROM cache WHERE expires_at IS NOT NULL AND expires_at < ?", (now,))
+        count, total = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM cache").fetchone()
+        if count > self.max_entries:
+            conn.execute(
+                "DELETE FROM cache WHERE key IN (SELECT key FROM cache ORDER BY last_access LIMIT ?)",
+                (count - self.max_entries,),
+            )
+        if self.max_bytes is not None and total > self.max_bytes:
+            excess = total - self.max_bytes
+            rows = conn.execute("SELECT key, size FROM cache ORDER BY last_access").fetchall()
+            doomed = []
+            for key, size in rows:
+                if excess <= 0:
+                    break
+                doomed.append((key,))
+                excess -= size
+            conn.executemany("DELETE FROM cache WHERE key = ?", doomed)
+
+    def clear(self) -> None:
+        with self._lock, self._connect() as conn:
+            conn.execute("DELETE FROM cache")
+        self.hits = self.misses = 0
+
+    def stats(self) -> dict:
+        """Returns hit/miss counters and the current number of entries."""
+        with self._lock, self._connect() as conn:
+            entries, size = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM cache").fetchone()
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": entries,
+            "bytes": size,
+        }
@@ -0,0 +1,145 @@
+# --- Standard library ---
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+# --- Third-party ---
+from dotenv import find_dotenv, load_dotenv
+
+# --- Local ---
+from utils.cache import make_key
+
+# Load environment variables
+load_dotenv(find_dotenv())
+
+CHECKPOINT_PATH = os.getenv("CHECKPOINT_PATH", "data/checkpoints.db")
+
+_store = None
+_lock = threading.Lock()
+
+
+def run_key(page: str, topic: str, model: str) -> str:
+    """Checkpoint id of a workflow run: the same page, topic and model resume the same run."""
+    return make_key(page, topic.strip().lower(), model)[:16]
+
+
+class CheckpointStore:
+    """
+    Persists workflow plans and completed step outputs in SQLite so runs can resume.
+
+    Args:
+        path (str): SQLite file path.
+    """
+
+    def __init__(self, path: str = CHECKPOINT_PATH):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS runs (
+                    run_id TEXT PRIMARY KEY,
+                    page TEXT,
+                    topic TEXT,
+                    model TEXT,
+                    plan TEXT,
+                    status TEXT NOT NULL,
+                    total_tokens INTEGER NOT NULL DEFAULT 0,
+                    elapsed REAL NOT NULL DEFAULT 0,
+                    created_at REAL NOT NULL,
+                    updated_at REAL NOT NULL
+                )
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS steps (
+                    run_id TEXT NOT NULL,
+                    step_id INTEGER NOT NULL,
+                    task TEXT NOT NULL,
+                    agent TEXT NOT NULL,
+                    output TEXT NOT NULL,
+                    tokens INTEGER NOT NULL,
+                    elapsed REAL NOT NULL,
+                    completed_at REAL NOT NULL,
+                    PRIMARY KEY (run_id, step_id)
+                )
+            """)
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def start(self, run_id: str, page: str, topic: str, model: str, plan: list[dict]) -> None:
+        """Records the plan of a new (or restarted) run."""
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute("""
+                INSERT INTO runs (run_id, page, topic, model, plan, status, created_at, updated_at)
+                VALUES (?, ?, ?, ?, ?, 'running', ?, ?)
+                ON CONFLICT(run_id) DO UPDATE SET plan = excluded.plan, status = 'running', updated_at = excluded.updated_at
+            """, (run_id, page, topic, model, json.dumps(plan), now, now))
+
+    def save_step(self, run_id: str, step: dict, agent: str, output: str, tokens: int, elapsed: float) -> None:
+        """Saves a completed step; skipped if the run was deleted meanwhile, so no orphaned steps are left behind."""
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO steps SELECT ?, ?, ?, ?, ?, ?, ?, ? WHERE EXISTS (SELECT 1 FROM runs WHERE run_id = ?)",
+                (run_id, step["id"], step["task"], agent, output, tokens, elapsed, time.time(), run_id),
+            )
+            conn.execute("UPDATE runs SET updated_at = ? WHERE run_id = ?", (time.time(), run_id))
+
+    def complete(self, run_id: str, total_tokens: int, elapsed: float) -> None:
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE runs SET status = 'completed', total_tokens = ?, elapsed = ?, updated_at = ? WHERE run_id = ?",
+                (total_tokens, elapsed, time.time(), run_id),
+            )
+
+    def load(self, run_id: str) -> dict | None:
+        """
+        Returns the saved run, or None if there is none.
+
+        Returns:
+            dict: "status" ("running" or "completed"), "plan", "total_tokens", "elapsed",
+                  "updated_at" and "steps" ({step id: {"task", "agent", "output", "tokens", "elapsed"}}).
+        """
+        with self._connect() as conn:
+            run = conn.execute(
+                "SELECT status, plan, total_tokens, elapsed, updated_at FROM runs WHERE run_id = ?", (run_id,)
+            ).fetchone()
+            if run is None:
+                return None
+            rows = conn.execute(
+                "SELECT step_id, task, agent, output, tokens, elapsed FROM steps WHERE run_id = ?", (run_id,)
+            ).fetchall()
+        return {
+            "status": run[0],
+            "plan": json.loads(run[1]) if run[1] else None,
+            "total_tokens": run[2],
+            "elapsed": run[3],
+            "updated_at": run[4],
+            "steps": {r[0]: {"task": r[1], "agent": r[2], "output": r[3], "tokens": r[4], "elapsed": r[5]} for r in rows},
+        }
+
+    def delete(self, run_id: str) -> None:
+        """Forgets a run so the next request starts from scratch."""
+        with self._connect() as conn:
+            conn.execute("DELETE FROM steps WHERE run_id = ?", (run_id,))
+            conn.execute("DELETE FROM runs WHERE run_id = ?", (run_id,))
+
+
+def get_store() -> CheckpointStore:
+    global _store
+    if _store is None:
+        with _lock:
+            if _store is None:
+                _store = CheckpointStore(CHECKPOINT_PATH)
+    return _store
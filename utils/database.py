@@ -1,7 +1,69 @@
+import os
 import sqlite3
+import threading
+import time
+from contextlib import contextmanager
 import pandas as pd 
+from dotenv import find_dotenv, load_dotenv
 
-PATH = 'data/rca_data.db'
+# Load environment variables
+load_dotenv(find_dotenv())
+
+PATH = os.getenv("RCA_DB_PATH", 'data/rca_data.db')
+CSV_PATH = os.getenv("RCA_CSV_PATH", 'data/equipment_failure_data.csv')
+LOCK_TIMEOUT = float(os.getenv("RCA_DB_LOCK_TIMEOUT", "30"))
+# RCA_DB_RELOAD: "1" reloads the CSV into rca_data on every query, "0" (default) only loads it into a missing or empty table
+RCA_DB_RELOAD = os.getenv("RCA_DB_RELOAD", "0").lower() in ("1", "true", "on")
+
+# Write-lock wait counters, read by the load tester
+_lock_stats = {"writes": 0, "wait_seconds": 0.0, "max_wait_seconds": 0.0, "timeouts": 0}
+_stats_lock = threading.Lock()
+
+
+@contextmanager
+def write_connection():
+    """
+    Opens a connection holding the database write lock and records how long it waited for it.
+
+    The write transaction is started with BEGIN IMMEDIATE so the wait happens up front,
+    where it can be measured, instead of at the first write statement.
+    """
+    conn = sqlite3.connect(PATH, timeout=LOCK_TIMEOUT, isolation_level=None)
+    start = time.perf_counter()
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+    except sqlite3.OperationalError:
+        with _stats_lock:
+            _lock_stats["timeouts"] += 1
+        conn.close()
+        raise
+    waited = time.perf_counter() - start
+    with _stats_lock:
+        _lock_stats["writes"] += 1
+        _lock_stats["wait_seconds"] += waited
+        _lock_stats["max_wait_seconds"] = max(_lock_stats["max_wait_seconds"], waited)
+    try:
+        yield conn
+        # pandas' to_sql commits on its own, so the transaction may already be closed
+        if conn.in_transaction:
+            conn.execute("COMMIT")
+    except Exception:
+        if conn.in_transaction:
+            conn.execute("ROLLBACK")
+        raise
+    finally:
+        conn.close()
+
+
+def lock_stats() -> dict:
+    """Returns the number of write transactions, total and max seconds spent waiting for the write lock, and lock timeouts."""
+    with _stats_lock:
+        return dict(_lock_stats)
+
+
+def reset_lock_stats() -> None:
+    with _stats_lock:
+        _lock_stats.update(writes=0, wait_seconds=0.0, max_wait_seconds=0.0, timeouts=0)
 
 def create_db():
     conn = sqlite3.connect(PATH)
@@ -9,110 +71,123 @@ def create_db():
     conn.close()
 
 
-def create_tables():
+def _has_rows(table: str) -> bool:
     conn = sqlite3.connect(PATH)
-    cursor = conn.cursor()
-    df = pd.read_csv('data/equipment_failure_data.csv')
-    df.to_sql('rca_data', conn, if_exists='replace', index=False)
-    conn.commit()
-    conn.close()
+    try:
+        if not conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table,)).fetchone():
+            return False
+        return conn.execute(f'SELECT 1 FROM "{table}" LIMIT 1').fetchone() is not None
+    finally:
+        conn.close()
+
+
+def create_tables():
+    """
+    Loads the CSV into the rca_data table when the table is missing or empty.
+
+    An existing table, such as one written by utils.rca_generator, is left as is
+    unless RCA_DB_RELOAD is set.
+    """
+    if not RCA_DB_RELOAD and _has_rows('rca_data'):
+        return
+    df = pd.read_csv(CSV_PATH)
+    with write_connection() as conn:
+        df.to_sql('rca_data', conn, if_exists='replace', index=False)
 
 def create_metadata():
-    conn = sqlite3.connect(PATH)
-    cursor = conn.cursor()    
-    # Create a metadata table for documentation
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS column_metadata (
-            table_name TEXT NOT NULL,
-            column_name TEXT NOT NULL,
-            description TEXT,
-            data_type TEXT,
-            constraints TEXT,
-            example_value TEXT,
-            notes TEXT,
-            PRIMARY KEY (table_name, column_name)
-        )
-    """)
+    with write_connection() as conn:
+        cursor = conn.cursor()    
+        # Create a metadata table for documentation
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS column_metadata (
+                table_name TEXT NOT NULL,
+                column_name TEXT NOT NULL,
+                description TEXT,
+                data_type TEXT,
+                constraints TEXT,
+                example_value TEXT,
+                notes TEXT,
+                PRIMARY KEY (table_name, column_name)
+            )
+        """)
                 
-    metadata = [    
-        ('rca_data', 'Asset', 
-        'Mine or facility name where the failure occurred', 
-        'TEXT', 
-        'NOT NULL', 
-        'Mine A, Mine B', 
-        'Identifies the specific mine/site asset; used for filtering investigations by location'),
+        metadata = [    
+            ('rca_data', 'Asset', 
+            'Mine or facility name where the failure occurred', 
+            'TEXT', 
+            'NOT NULL', 
+            'Mine A, Mine B', 
+            'Identifies the specific mine/site asset; used for filtering investigations by location'),
         
-        ('rca_data', 'Area', 
-        'Operational area or department within the asset', 
-        'TEXT', 
-        'NOT NULL', 
-        'Processing Plant, Rail Loading, Underground Operations, Tailings Dam, Haul Road', 
-        'Categorizes failures by operational zone; helps identify high-risk areas'),
+            ('rca_data', 'Area', 
+            'Operational area or department within the asset', 
+            'TEXT', 
+            'NOT NULL', 
+            'Processing Plant, Rail Loading, Underground Operations, Tailings Dam, Haul Road', 
+            'Categorizes failures by operational zone; helps identify high-risk areas'),
         
-        ('rca_data', 'Equipment', 
-        'Specific equipment name and identifier that experienced failure', 
-        'TEXT', 
-        'NOT NULL', 
-        'Crusher 1, Pump Station 2, Conveyor Belt 8, Dump Truck 15', 
-        'Equipment type and number for precise identification; includes both equipment category and unit number'),
+            ('rca_data', 'Equipment', 
+            'Specific equipment name and identifier that experienced failure', 
+            'TEXT', 
+            'NOT NULL', 
+            'Crusher 1, Pump Station 2, Conveyor Belt 8, Dump Truck 15', 
+            'Equipment type and number for precise identification; includes both equipment category and unit number'),
         
-        ('rca_data', 'RCA_ID', 
-        'Root Cause Analysis investigation unique identifier', 
-        'TEXT', 
-        'NOT NULL', 
-        'RCA 1, RCA 2, RCA 10, RCA 50', 
-        'Groups all root causes for a single failure event; multiple rows may share the same RCA_ID if the investigation identified multiple contributing root causes'),
+            ('rca_data', 'RCA_ID', 
+            'Root Cause Analysis investigation unique identifier', 
+            'TEXT', 
+            'NOT NULL', 
+            'RCA 1, RCA 2, RCA 10, RCA 50', 
+            'Groups all root causes for a single failure event; multiple rows may share the same RCA_ID if the investigation identified multiple contributing root causes'),
         
-        ('rca_data', 'Failure_Event', 
-        'Comprehensive narrative description of the failure incident', 
-        'TEXT', 
-        'NOT NULL', 
-        'At 1831H on 30th October, 2025, Equipment 1 started to trip on high torque...', 
-        'Includes timestamp (date and time), symptoms, sequence of events, investigation findings, and any secondary damage; provides complete context for understanding the failure'),
+            ('rca_data', 'Failure_Event', 
+            'Comprehensive narrative description of the failure incident', 
+            'TEXT', 
+            'NOT NULL', 
+            'At 1831H on 30th October, 2025, Equipment 1 started to trip on high torque...', 
+            'Includes timestamp (date and time), symptoms, sequence of events, investigation findings, and any secondary damage; provides complete context for understanding the failure'),
         
-        ('rca_data', 'Impact', 
-        'Total financial amount in Australian Dollars (AUD) of the impact of the failure', 
-        'INTEGER', 
-        'None', 
-        '1000000, 2500000, 850000, 420000', 
-        'Aggregate cost including production losses, repair costs, labor, parts, and any secondary damages; used for prioritizing corrective actions and calculating ROI'),
+            ('rca_data', 'Impact', 
+            'Total financial amount in Australian Dollars (AUD) of the impact of the failure', 
+            'INTEGER', 
+            'None', 
+            '1000000, 2500000, 850000, 420000', 
+            'Aggregate cost including production losses, repair costs, labor, parts, and any secondary damages; used for prioritizing corrective actions and calculating ROI'),
         
-        ('rca_data', 'Downtime', 
-        'Total equipment downtime duration in hours', 
-        'INTEGER', 
-        'None', 
-        '32, 96, 48, 18', 
-        'Measures operational impact; from failure initiation to equipment return to service; used for availability and reliability metrics'),
+            ('rca_data', 'Downtime', 
+            'Total equipment downtime duration in hours', 
+            'INTEGER', 
+            'None', 
+            '32, 96, 48, 18', 
+            'Measures operational impact; from failure initiation to equipment return to service; used for availability and reliability metrics'),
         
-        ('rca_data', 'Root_Cause', 
-        'Identified underlying cause of the failure', 
-        'TEXT', 
-        'NOT NULL', 
-        'Misalignment, Overloading, Inadequate lubrication schedule, Operator error', 
-        'Specific root cause identified through investigation; one failure event may have multiple root causes, each stored as a separate row with the same RCA ID'),
+            ('rca_data', 'Root_Cause', 
+            'Identified underlying cause of the failure', 
+            'TEXT', 
+            'NOT NULL', 
+            'Misalignment, Overloading, Inadequate lubrication schedule, Operator error', 
+            'Specific root cause identified through investigation; one failure event may have multiple root causes, each stored as a separate row with the same RCA ID'),
         
-        ('rca_data', 'Action', 
-        'Recommended corrective or preventive action', 
-        'TEXT', 
-        'NOT NULL', 
-        'Implement routine maintenance, Install monitoring system, Enhance operator training', 
-        'Specific action designed to address the identified root cause and prevent recurrence; each root cause has its own corresponding action'),
+            ('rca_data', 'Action', 
+            'Recommended corrective or preventive action', 
+            'TEXT', 
+            'NOT NULL', 
+            'Implement routine maintenance, Install monitoring system, Enhance operator training', 
+            'Specific action designed to address the identified root cause and prevent recurrence; each root cause has its own corresponding action'),
         
-        ('rca_data', 'Action_Status', 
-        'Current implementation status of the corrective action', 
-        'TEXT', 
-        'DEFAULT In Progress', 
-        'Completed, In Progress', 
-        'Tracks whether the corrective action has been fully implemented; defaults to "In Progress" for new entries')
-    ]
-
-    cursor.executemany("""
-        INSERT OR REPLACE INTO column_metadata 
-        (table_name, column_name, description, data_type, constraints, example_value, notes)
-        VALUES (?, ?, ?, ?, ?, ?, ?)
-    """, metadata)
-    conn.commit()
-    conn.close()
+            ('rca_data', 'Action_Status', 
+            'Current implementation status of the corrective action', 
+            'TEXT', 
+            'DEFAULT In Progress', 
+            'Completed, In Progress', 
+            'Tracks whether the corrective action has been fully implemented; defaults to "In Progress" for new entries')
+        ]
+
+        cursor.executemany("""
+            INSERT OR REPLACE INTO column_metadata 
+            (table_name, column_name, description, data_type, constraints, example_value, notes)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        """, metadata)
 
 
 def get_metaschema():
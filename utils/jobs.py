@@ -0,0 +1,211 @@
+# --- Standard library ---
+import contextvars
+import os
+import queue
+import threading
+import time
+import traceback
+import uuid
+from dataclasses import dataclass, field
+from typing import Callable
+
+# --- Third-party ---
+from dotenv import find_dotenv, load_dotenv
+
+# Load environment variables
+load_dotenv(find_dotenv())
+
+# Number of workflows run at the same time, and how long finished jobs are kept for polling
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "4"))
+JOB_TTL = float(os.getenv("JOB_TTL", "3600"))
+# Seconds `cancel_key` waits for a running job to reach its next progress event and stop
+JOB_CANCEL_WAIT = float(os.getenv("JOB_CANCEL_WAIT", "30"))
+
+QUEUED, RUNNING, COMPLETED, FAILED, CANCELLED = "queued", "running", "completed", "failed", "cancelled"
+
+_runner = None
+_lock = threading.Lock()
+
+
+class JobCancelled(BaseException):
+    """
+    Raised inside a job when cancellation was requested.
+
+    Derives from BaseException, like KeyboardInterrupt, so the agents'
+    `except Exception` handlers let it through instead of turning the
+    cancellation into an error message that gets checkpointed as step output.
+    """
+
+
+@dataclass
+class Job:
+    """
+    One workflow run submitted to the `JobRunner`.
+
+    The job function receives the job's `emit` method as its `progress`
+    callback; every event is appended to `events` so any number of UI
+    sessions can poll them with `events_since`.
+    """
+    id: str
+    key: str
+    func: Callable
+    params: dict
+    status: str = QUEUED
+    result: object = None
+    error: str | None = None
+    events: list = field(default_factory=list)
+    created_at: float = field(default_factory=time.time)
+    started_at: float | None = None
+    finished_at: float | None = None
+    cancel_requested: bool = False
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+    _done: threading.Event = field(default_factory=threading.Event, repr=False)
+
+    @property
+    def done(self) -> bool:
+        return self.status in (COMPLETED, FAILED, CANCELLED)
+
+    def emit(self, event: str, **data) -> None:
+        """Records a progress event. Raises `JobCancelled` if the job should stop."""
+        with self._lock:
+            self.events.append({"event": event, "time": time.time(), **data})
+        if self.cancel_requested:
+            raise JobCancelled(self.id)
+
+    def events_since(self, index: int) -> list[dict]:
+        with self._lock:
+            return self.events[index:]
+
+    def wait(self, timeout: float | None = None) -> bool:
+        return self._done.wait(timeout)
+
+
+class JobRunner:
+    """
+    Runs workflow jobs from a queue on a pool of worker threads, independently of any UI session.
+
+    Jobs are keyed (e.g. by checkpoint run id): submitting a key that is
+    already queued or running returns the existing job, so reruns and
+    multiple tabs follow the same work instead of starting it again.
+
+    Args:
+        workers (int): Number of worker threads.
+    """
+
+    def __init__(self, workers: int = JOB_WORKERS):
+        self.jobs: dict[str, Job] = {}
+        self._by_key: dict[str, Job] = {}
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._threads = [
+            threading.Thread(target=self._work, name=f"job-worker-{i}", daemon=True) for i in range(max(1, workers))
+        ]
+        for t in self._threads:
+            t.start()
+
+    def submit(self, key: str, func: Callable, **params) -> Job:
+        """
+        Queues `func(progress=job.emit, **params)` unless a job with `key` is still active.
+
+        Returns:
+            Job: The new job, or the active job with the same key.
+        """
+        with self._lock:
+            self._prune()
+            existing = self._by_key.get(key)
+            if existing is not None and not existing.done:
+                return existing
+            job = Job(id=uuid.uuid4().hex[:12], key=key, func=func, params=params)
+            self.jobs[job.id] = job
+            self._by_key[key] = job
+        job.emit("queued")
+        self._queue.put(job)
+        return job
+
+    def get(self, job_id: str) -> Job | None:
+        with self._lock:
+            return self.jobs.get(job_id)
+
+    def find(self, key: str) -> Job | None:
+        """Returns the latest job submitted with `key`."""
+        with self._lock:
+            return self._by_key.get(key)
+
+    def cancel(self, job_id: str) -> None:
+        """Requests cancellation; a queued job is cancelled at once, a running one stops at its next progress event."""
+        job = self.get(job_id)
+        if job is not None and not job.done:
+            job.cancel_requested = True
+            with job._lock:
+                queued = job.status == QUEUED
+            if queued:
+                self._finish(job, CANCELLED)
+
+    def cancel_key(self, key: str, timeout: float = JOB_CANCEL_WAIT) -> bool:
+        """
+        Cancels the active job with `key`, if any, and waits up to `timeout` seconds for it to stop.
+
+        Returns:
+            bool: True once no job with `key` is active, False if it is still stopping.
+        """
+        job = self.find(key)
+        if job is None or job.done:
+            return True
+        self.cancel(job.id)
+        job.wait(timeout)
+        return job.done
+
+    def stats(self) -> dict:
+        with self._lock:
+            jobs = list(self.jobs.values())
+        return {status: sum(j.status == status for j in jobs) for status in (QUEUED, RUNNING, COMPLETED, FAILED, CANCELLED)}
+
+    def _prune(self) -> None:
+        cutoff = time.time() - JOB_TTL
+        for job_id, job in list(self.jobs.items()):
+            if job.done and job.finished_at < cutoff:
+                del self.jobs[job_id]
+                if self._by_key.get(job.key) is job:
+                    del self._by_key[job.key]
+
+    def _work(self) -> None:
+        while True:
+            job = self._queue.get()
+            if job.cancel_requested:
+                self._finish(job, CANCELLED)
+                continue
+            with job._lock:
+                # Cancelled while queued
+                if job.done:
+                    continue
+                job.status, job.started_at = RUNNING, time.time()
+            try:
+                job.emit("started")
+                # Each job gets a fresh context so run ledgers and tracers never leak between jobs
+                job.result = contextvars.Context().run(job.func, progress=job.emit, **job.params)
+                self._finish(job, COMPLETED)
+            except JobCancelled:
+                self._finish(job, CANCELLED)
+            except Exception as e:
+                job.error = f"{type(e).__name__}: {e}"
+                print(f"❌ Job {job.id} failed:\n{traceback.format_exc()}")
+                self._finish(job, FAILED)
+
+    @staticmethod
+    def _finish(job: Job, status: str) -> None:
+        with job._lock:
+            if job.done:
+                return
+            job.status, job.finished_at = status, time.time()
+            job.events.append({"event": status, "time": job.finished_at, "error": job.error})
+        job._done.set()
+
+
+def get_runner() -> JobRunner:
+    """Returns the process-wide job runner shared by all Streamlit sessions."""
+    global _runner
+    if _runner is None:
+        with _lock:
+            if _runner is None:
+                _runner = JobRunner(JOB_WORKERS)
+    return _runner
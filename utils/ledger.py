@@ -0,0 +1,289 @@
+# --- Standard library ---
+import json
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass, field
+
+# --- Local ---
+from utils.cache import make_key
+
+_current = ContextVar("run_ledger", default=None)
+
+
+@dataclass
+class ModelCall:
+    agent: str
+    model: str
+    prompt_tokens: int
+    completion_tokens: int
+    total_tokens: int
+    latency: float
+    cached: bool
+    ttft: float | None = None
+    timestamp: float = field(default_factory=time.time)
+
+
+@dataclass
+class ToolCall:
+    name: str
+    args_hash: str
+    latency: float
+    payload_bytes: int
+    error: bool
+    timestamp: float = field(default_factory=time.time)
+
+
+class RunLedger:
+    """
+    Records every model call and tool call made during one workflow run.
+
+    Args:
+        run_id (str, optional): Identifier of the run; a random one is generated if omitted.
+    """
+
+    def __init__(self, run_id: str | None = None):
+        self.run_id = run_id or uuid.uuid4().hex[:12]
+        self.started_at = time.time()
+        self.model_calls: list[ModelCall] = []
+        self.tool_calls: list[ToolCall] = []
+        # How each plan step was assigned to an agent: by the planner, by local rules or by a routing model call
+        self.routing = {"planner": 0, "rules": 0, "llm": 0}
+        # Estimated tokens of step context before and after compaction, per agent
+        self.context = {}
+        # Estimated tokens and hit counts of search results before and after post-processing, per agent
+        self.results = {}
+        # Budget degradation decisions (see `utils.budget`), in the order they were made
+        self.degradations: list[dict] = []
+        self._lock = threading.Lock()
+
+    def record_model(self, agent: str, result) -> None:
+        """Records an `LLMResult` returned by the gateway."""
+        usage = result.usage
+        call = ModelCall(
+            agent=agent,
+            model=result.model,
+            prompt_tokens=usage.get("prompt_tokens", 0),
+            completion_tokens=usage.get("completion_tokens", 0),
+            total_tokens=usage.get("total_tokens", 0),
+            latency=result.latency,
+            cached=result.cached,
+            ttft=getattr(result, "ttft", None),
+        )
+        with self._lock:
+            self.model_calls.append(call)
+
+    def record_tool(self, name: str, args: dict, result, latency: float) -> None:
+        """Records one tool invocation with a hash of its arguments and its payload size."""
+        payload = json.dumps(result, default=str)
+        items = result if isinstance(result, list) else [result]
+        error = any(isinstance(r, dict) and "error" in r for r in items)
+        call = ToolCall(
+            name=name,
+            args_hash=make_key(name, args)[:16],
+            latency=latency,
+            payload_bytes=len(payload.encode("utf-8")),
+            error=error,
+        )
+        with self._lock:
+            self.tool_calls.append(call)
+
+    def record_routing(self, source: str) -> None:
+        """Counts one step routed by `source` ("planner", "rules" or "llm")."""
+        with self._lock:
+            self.routing[source] = self.routing.get(source, 0) + 1
+
+    def record_context(self, agent: str, full_tokens: int, sent_tokens: int) -> None:
+        """Records the context size a step would have received in full and what it was actually sent."""
+        with self._lock:
+            c = self.context.setdefault(agent, {"steps": 0, "full_tokens": 0, "sent_tokens": 0})
+            c["steps"] += 1
+            c["full_tokens"] += full_tokens
+            c["sent_tokens"] += sent_tokens
+
+    def record_results(self, agent: str, raw_tokens: int, sent_tokens: int, raw_items: int, sent_items: int) -> None:
+        """Records the size of one turn's search results before and after deduplication and trimming."""
+        with self._lock:
+            r = self.results.setdefault(agent, {"turns": 0, "raw_tokens": 0, "sent_tokens": 0, "raw_items": 0, "sent_items": 0})
+            r["turns"] += 1
+            r["raw_tokens"] += raw_tokens
+            r["sent_tokens"] += sent_tokens
+            r["raw_items"] += raw_items
+            r["sent_items"] += sent_items
+
+    def record_degradation(self, action: str, agent: str, reason: str) -> bool:
+        """
+        Records a budget degradation such as a skipped editor pass or a smaller model.
+
+        Repeats of an action for the same agent are added to its first entry's
+        `count` and `last_timestamp`, so every affected call is counted without
+        one entry per call.
+
+        Returns:
+            bool: True the first time `action` is recorded for `agent`.
+        """
+        now = time.time()
+        with self._lock:
+            for d in self.degradations:
+                if d["action"] == action and d["agent"] == agent:
+                    d["count"] += 1
+                    d["last_timestamp"] = now
+                    return False
+            self.degradations.append({"action": action, "agent": agent, "reason": reason, "count": 1,
+                                      "timestamp": now, "last_timestamp": now})
+            return True
+
+    def usage(self) -> dict:
+        """Tokens, uncached model calls and tool calls spent so far, as counted against run budgets."""
+        with self._lock:
+            fresh = [c for c in self.model_calls if not c.cached]
+            return {
+                "tokens": sum(c.total_tokens for c in fresh),
+                "model_calls": len(fresh),
+                "tool_calls": len(self.tool_calls),
+            }
+
+    @property
+    def total_tokens(self) -> int:
+        with self._lock:
+            return sum(c.total_tokens for c in self.model_calls if not c.cached)
+
+    def summary(self) -> dict:
+        """Aggregates the recorded calls per agent and per tool."""
+        with self._lock:
+            model_calls = list(self.model_calls)
+            tool_calls = list(self.tool_calls)
+            routing = dict(self.routing)
+            context = {agent: dict(c) for agent, c in self.context.items()}
+            results = {agent: dict(r) for agent, r in self.results.items()}
+            degradations = [dict(d) for d in self.degradations]
+
+        by_agent = {}
+        for c in model_calls:
+            a = by_agent.setdefault(c.agent, {"calls": 0, "cached": 0, "prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0, "latency": 0.0})
+            a["calls"] += 1
+            a["latency"] += c.latency
+            if c.cached:
+                a["cached"] += 1
+                continue
+            a["prompt_tokens"] += c.prompt_tokens
+            a["completion_tokens"] += c.completion_tokens
+            a["total_tokens"] += c.total_tokens
+
+        by_tool = {}
+        for c in tool_calls:
+            t = by_tool.setdefault(c.name, {"calls": 0, "errors": 0, "latency": 0.0, "payload_bytes": 0})
+            t["calls"] += 1
+            t["errors"] += int(c.error)
+            t["latency"] += c.latency
+            t["payload_bytes"] += c.payload_bytes
+
+        ttfts = sorted(c.ttft for c in model_calls if c.ttft is not None)
+        return {
+            "run_id": self.run_id,
+            "elapsed": time.time() - self.started_at,
+            "model_calls": len(model_calls),
+            "cached_model_calls": sum(c.cached for c in model_calls),
+            "tool_calls": len(tool_calls),
+            "prompt_tokens": sum(a["prompt_tokens"] for a in by_agent.values()),
+            "completion_tokens": sum(a["completion_tokens"] for a in by_agent.values()),
+            "total_tokens": sum(a["total_tokens"] for a in by_agent.values()),
+            "by_agent": by_agent,
+            "by_tool": by_tool,
+            "routing": {**routing, "calls_avoided": routing["planner"] + routing["rules"]},
+            "context": {
+                "full_tokens": sum(c["full_tokens"] for c in context.values()),
+                "sent_tokens": sum(c["sent_tokens"] for c in context.values()),
+                "saved_tokens": sum(c["full_tokens"] - c["sent_tokens"] for c in context.values()),
+                "by_agent": context,
+            },
+            "results": {
+                "raw_tokens": sum(r["raw_tokens"] for r in results.values()),
+                "sent_tokens": sum(r["sent_tokens"] for r in results.values()),
+                "saved_tokens": sum(r["raw_tokens"] - r["sent_tokens"] for r in results.values()),
+                "by_agent": results,
+            },
+            "degradations": degradations,
+            # Time to first token of streamed calls
+            "ttft": {
+                "streamed_calls": len(ttfts),
+                "mean": sum(ttfts) / len(ttfts) if ttfts else None,
+                "max": ttfts[-1] if ttfts else None,
+            },
+        }
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            model_calls = [asdict(c) for c in self.model_calls]
+            tool_calls = [asdict(c) for c in self.tool_calls]
+        return {"summary": self.summary(), "model_calls": model_calls, "tool_calls": tool_calls}
+
+    def to_json(self, path: str | None = None) -> str:
+        """Serializes the ledger to JSON, optionally writing it to `path`."""
+        data = json.dumps(self.to_dict(), indent=2)
+        if path:
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(data)
+        return data
+
+
+def current_ledger() -> RunLedger | None:
+    """Returns the ledger of the run in progress, if any."""
+    return _current.get()
+
+
+@contextmanager
+def run_scope(run_id: str | None = None):
+    """
+    Makes a ledger current for the duration of the block.
+
+    If a ledger is already active it is reused, so nested scopes (e.g. an agent
+    called from inside a page's run) all record into the outermost ledger.
+    """
+    ledger = _current.get()
+    if ledger is not None:
+        yield ledger
+        return
+    ledger = RunLedger(run_id)
+    token = _current.set(ledger)
+    try:
+        yield ledger
+    finally:
+        _current.reset(token)
+
+
+def record_model_call(agent: str, result) -> None:
+    ledger = _current.get()
+    if ledger is not None:
+        ledger.record_model(agent, result)
+
+
+def record_tool_call(name: str, args: dict, result, latency: float) -> None:
+    ledger = _current.get()
+    if ledger is not None:
+        ledger.record_tool(name, args, result, latency)
+
+
+def record_context(agent: str, full_tokens: int, sent_tokens: int) -> None:
+    ledger = _current.get()
+    if ledger is not None:
+        ledger.record_context(agent, full_tokens, sent_tokens)
+
+
+def record_results(agent: str, raw_tokens: int, sent_tokens: int, raw_items: int, sent_items: int) -> None:
+    ledger = _current.get()
+    if ledger is not None:
+        ledger.record_results(agent, raw_tokens, sent_tokens, raw_items, sent_items)
+
+
+def record_routing(source: str) -> None:
+    ledger = _current.get()
+    if ledger is not None:
+        ledger.record_routing(source)
+
+
+def record_degradation(action: str, agent: str, reason: str) -> bool:
+    ledger = _current.get()
+    return ledger.record_degradation(action, agent, reason) if ledger is not None else True
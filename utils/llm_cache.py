@@ -0,0 +1,73 @@
+# --- Standard library ---
+import os
+import threading
+
+# --- Third-party ---
+from dotenv import find_dotenv, load_dotenv
+
+# --- Local ---
+from utils.cache import SQLiteCache, make_key
+
+# Load environment variables
+load_dotenv(find_dotenv())
+
+# Opt-in response cache settings
+# LLM_CACHE: "all" (or "1") caches every agent, or a comma separated list of agent names.
+CACHE_PATH = os.getenv("LLM_CACHE_PATH", "data/llm_cache.db")
+CACHE_TTL = float(os.getenv("LLM_CACHE_TTL", str(7 * 24 * 3600)))
+CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "5000"))
+CACHE_MAX_BYTES = int(os.getenv("LLM_CACHE_MAX_BYTES", str(200 * 1024 * 1024)))
+
+_enabled_agents = {a.strip() for a in os.getenv("LLM_CACHE", "").split(",") if a.strip()}
+_counters = {}
+_cache = None
+_lock = threading.Lock()
+
+
+def get_cache() -> SQLiteCache:
+    global _cache
+    if _cache is None:
+        with _lock:
+            if _cache is None:
+                _cache = SQLiteCache(CACHE_PATH, max_entries=CACHE_MAX_ENTRIES, max_bytes=CACHE_MAX_BYTES, default_ttl=CACHE_TTL)
+    return _cache
+
+
+def enabled(agent: str) -> bool:
+    """Returns True if responses for `agent` should be served from the cache."""
+    return bool(_enabled_agents & {"all", "1", "true", agent})
+
+
+def set_enabled(agent: str, flag: bool = True) -> None:
+    """Enables or disables caching for one agent ("all" for every agent)."""
+    with _lock:
+        if flag:
+            _enabled_agents.add(agent)
+        else:
+            _enabled_agents.discard(agent)
+
+
+def request_key(model: str, messages: list[dict], params: dict) -> str:
+    """Hashes the model, messages, tools and sampling parameters of a request."""
+    return make_key(model, messages, params)
+
+
+def lookup(agent: str, key: str) -> dict | None:
+    value = get_cache().get(key)
+    with _lock:
+        hits, misses = _counters.get(agent, (0, 0))
+        _counters[agent] = (hits + 1, misses) if value is not None else (hits, misses + 1)
+    return value
+
+
+def store(key: str, value: dict) -> None:
+    get_cache().set(key, value)
+
+
+def stats() -> dict:
+    """Returns per-agent hit/miss counters and hit rates."""
+    with _lock:
+        return {
+            agent: {"hits": h, "misses": m, "hit_rate": h / (h + m) if h + m else 0.0}
+            for agent, (h, m) in _counters.items()
+        }
@@ -0,0 +1,400 @@
+# --- Standard library ---
+import asyncio
+import os
+import random
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Callable, Generator
+
+# --- Third-party ---
+import httpx
+import openai
+from openai import AsyncOpenAI, OpenAI
+from dotenv import find_dotenv, load_dotenv
+
+# --- Local ---
+from utils import llm_cache
+from utils import fake_llm
+from utils.ledger import record_model_call
+from utils.tracing import span
+
+# Load environment variables
+load_dotenv(find_dotenv())
+
+# Gateway settings (overridable through the environment)
+DEFAULT_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "120"))
+MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "4"))
+MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "16"))
+POOL_SIZE = int(os.getenv("LLM_POOL_SIZE", "32"))
+BACKOFF_BASE = 0.5
+BACKOFF_CAP = 20.0
+
+_client = None
+_async_client = None
+_client_lock = threading.Lock()
+_semaphore = threading.BoundedSemaphore(MAX_CONCURRENCY)
+
+
+@dataclass
+class LLMResult:
+    """
+    Uniform result of a chat completion made through the gateway.
+
+    Attributes:
+        content (str): Text content of the assistant message ("" if none).
+        tool_calls (list[dict]): Tool calls in OpenAI message format.
+        model (str): Model that produced the completion.
+        usage (dict): prompt_tokens, completion_tokens and total_tokens.
+        latency (float): Wall-clock seconds spent, including retries.
+        attempts (int): Number of requests made for this call.
+        cached (bool): True if the result was served from the response cache.
+        ttft (float): Seconds until the first streamed token, None if the call was not streamed.
+    """
+    content: str
+    tool_calls: list[dict] = field(default_factory=list)
+    model: str = ""
+    usage: dict = field(default_factory=dict)
+    latency: float = 0.0
+    attempts: int = 1
+    cached: bool = False
+    ttft: float | None = None
+
+    @property
+    def total_tokens(self) -> int:
+        return self.usage.get("total_tokens", 0)
+
+    @property
+    def message(self) -> dict:
+        """The assistant message, ready to be appended to a conversation."""
+        message = {"role": "assistant", "content": self.content}
+        if self.tool_calls:
+            message["tool_calls"] = self.tool_calls
+        return message
+
+
+def _openai_client() -> OpenAI:
+    limits = httpx.Limits(max_connections=POOL_SIZE, max_keepalive_connections=POOL_SIZE)
+    return OpenAI(
+        timeout=DEFAULT_TIMEOUT,
+        max_retries=0,
+        http_client=httpx.Client(limits=limits, timeout=DEFAULT_TIMEOUT),
+    )
+
+
+def _async_openai_client() -> AsyncOpenAI:
+    limits = httpx.Limits(max_connections=POOL_SIZE, max_keepalive_connections=POOL_SIZE)
+    return AsyncOpenAI(
+        timeout=DEFAULT_TIMEOUT,
+        max_retries=0,
+        http_client=httpx.AsyncClient(limits=limits, timeout=DEFAULT_TIMEOUT),
+    )
+
+
+def get_client() -> OpenAI:
+    """
+    Returns the process-wide OpenAI client, sharing one pooled HTTP connection pool.
+    Retries are handled by the gateway, so the SDK's own retries are disabled.
+    When LLM_BACKEND is "fake", "record" or "replay" an offline stand-in is returned instead.
+    """
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None and fake_llm.LLM_BACKEND != "openai":
+                real = _openai_client() if fake_llm.LLM_BACKEND == "record" else None
+                _client = fake_llm.FakeOpenAI(mode=fake_llm.LLM_BACKEND, real_client=real)
+            if _client is None:
+                _client = _openai_client()
+    return _client
+
+
+def get_async_client() -> AsyncOpenAI:
+    """Returns the process-wide AsyncOpenAI client."""
+    global _async_client
+    if _async_client is None:
+        with _client_lock:
+            if _async_client is None and fake_llm.LLM_BACKEND != "openai":
+                real = _async_openai_client() if fake_llm.LLM_BACKEND == "record" else None
+                _async_client = fake_llm.AsyncFakeOpenAI(mode=fake_llm.LLM_BACKEND, real_client=real)
+            if _async_client is None:
+                _async_client = _async_openai_client()
+    return _async_client
+
+
+def _is_retryable(error: Exception) -> bool:
+    if isinstance(error, (openai.RateLimitError, openai.APITimeoutError, openai.APIConnectionError)):
+        return True
+    if isinstance(error, openai.APIStatusError):
+        return error.status_code >= 500
+    return False
+
+
+def _backoff(attempt: int, error: Exception) -> float:
+    """Full-jitter exponential backoff, honouring a Retry-After header when present."""
+    response = getattr(error, "response", None)
+    retry_after = response.headers.get("retry-after") if response is not None else None
+    if retry_after:
+        try:
+            return min(float(retry_after), BACKOFF_CAP)
+        except ValueError:
+            pass
+    return random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * 2 ** attempt))
+
+
+def _to_result(response, model: str, latency: float, attempts: int) -> LLMResult:
+    msg = response.choices[0].message
+    tool_calls = [
+        {
+            "id": call.id,
+            "type": "function",
+            "function": {"name": call.function.name, "arguments": call.function.arguments},
+        }
+        for call in (msg.tool_calls or [])
+    ]
+    usage = response.usage
+    return LLMResult(
+        content=msg.content or "",
+        tool_calls=tool_calls,
+        model=getattr(response, "model", None) or model,
+        usage={
+            "prompt_tokens": getattr(usage, "prompt_tokens", 0) or 0,
+            "completion_tokens": getattr(usage, "completion_tokens", 0) or 0,
+            "total_tokens": getattr(usage, "total_tokens", 0) or 0,
+        },
+        latency=latency,
+        attempts=attempts,
+    )
+
+
+def _from_cache(agent: str, model: str, messages: list[dict], params: dict, cache: bool | None = None) -> tuple[str | None, LLMResult | None]:
+    """Returns (cache key, cached result) when the response cache is enabled for `agent` (or forced by `cache`)."""
+    if not (llm_cache.enabled(agent) if cache is None else cache):
+        return None, None
+    key = llm_cache.request_key(model, messages, params)
+    hit = llm_cache.lookup(agent, key)
+    if hit is None:
+        return key, None
+    return key, LLMResult(**{**hit, "latency": 0.0, "attempts": 0, "cached": True, "ttft": None})
+
+
+def _finish(agent: str, key: str | None, result: LLMResult, trace_span) -> LLMResult:
+    """Stores a fresh result in the cache and records it in the ledger and trace."""
+    if key is not None and not result.cached:
+        llm_cache.store(key, asdict(result))
+    record_model_call(agent, result)
+    trace_span.set("model", result.model)
+    trace_span.set("total_tokens", result.total_tokens)
+    trace_span.set("attempts", result.attempts)
+    trace_span.set("cached", result.cached)
+    if result.ttft is not None:
+        trace_span.set("ttft", result.ttft)
+    return result
+
+
+def chat(
+    messages: list[dict],
+    model: str,
+    agent: str = "",
+    timeout: float | None = None,
+    max_retries: int = MAX_RETRIES,
+    client=None,
+    cache: bool | None = None,
+    **params,
+) -> LLMResult:
+    """
+    Sends a chat completion through the shared client.
+
+    Args:
+        messages (list[dict]): Conversation messages.
+        model (str): Model name.
+        agent (str): Name of the calling agent, used for accounting.
+        timeout (float, optional): Per-request timeout in seconds.
+        max_retries (int): Retries for 429, 5xx, timeouts and connection errors.
+        client (optional): OpenAI-compatible client to use instead of the shared one.
+        cache (bool, optional): Force the response cache on or off; None follows LLM_CACHE.
+        **params: Extra completion parameters (tools, tool_choice, temperature, ...).
+
+    Returns:
+        LLMResult: The normalized completion.
+    """
+    with span(f"llm {agent or model}", agent=agent) as trace_span:
+        key, hit = _from_cache(agent, model, messages, params, cache)
+        if hit is not None:
+            return _finish(agent, key, hit, trace_span)
+
+        client = client or get_client()
+        start = time.perf_counter()
+        attempt = 0
+        while True:
+            attempt += 1
+            try:
+                with _semaphore:
+                    response = client.chat.completions.create(
+                        model=model,
+                        messages=messages,
+                        timeout=timeout or DEFAULT_TIMEOUT,
+                        **params,
+                    )
+                break
+            except Exception as e:
+                if attempt > max_retries or not _is_retryable(e):
+                    raise
+                delay = _backoff(attempt, e)
+                print(f"⚠️ {agent or 'LLM'} call failed ({type(e).__name__}), retrying in {delay:.1f}s")
+                time.sleep(delay)
+
+        result = _to_result(response, model, time.perf_counter() - start, attempt)
+        return _finish(agent, key, result, trace_span)
+
+
+async def achat(
+    messages: list[dict],
+    model: str,
+    agent: str = "",
+    timeout: float | None = None,
+    max_retries: int = MAX_RETRIES,
+    client=None,
+    cache: bool | None = None,
+    **params,
+) -> LLMResult:
+    """Async counterpart of `chat`, sharing the same concurrency limit."""
+    with span(f"llm {agent or model}", agent=agent) as trace_span:
+        key, hit = _from_cache(agent, model, messages, params, cache)
+        if hit is not None:
+            return _finish(agent, key, hit, trace_span)
+
+        client = client or get_async_client()
+        start = time.perf_counter()
+        attempt = 0
+        while True:
+            attempt += 1
+            while not _semaphore.acquire(blocking=False):
+                await asyncio.sleep(0.05)
+            try:
+                response = await client.chat.completions.create(
+                    model=model,
+                    messages=messages,
+                    timeout=timeout or DEFAULT_TIMEOUT,
+                    **params,
+                )
+                break
+            except Exception as e:
+                if attempt > max_retries or not _is_retryable(e):
+                    raise
+                delay = _backoff(attempt, e)
+            finally:
+                _semaphore.release()
+            print(f"⚠️ {agent or 'LLM'} call failed, retrying in {delay:.1f}s")
+            await asyncio.sleep(delay)
+
+        result = _to_result(response, model, time.perf_counter() - start, attempt)
+        return _finish(agent, key, result, trace_span)
+
+
+def stream(
+    messages: list[dict],
+    model: str,
+    agent: str = "",
+    timeout: float | None = None,
+    max_retries: int = MAX_RETRIES,
+    client=None,
+    cache: bool | None = None,
+    **params,
+) -> Generator[str, None, LLMResult]:
+    """
+    Streams a text completion through the shared client, yielding content deltas as they arrive.
+
+    Retries apply until the stream is opened; the request holds a concurrency
+    slot and its HTTP stream until the generator is consumed or closed. A cached response is yielded
+    as a single delta. The generator returns the complete `LLMResult`, with
+    the time to first token in `ttft`:
+
+        result = yield from stream(messages, model)
+
+    Args:
+        Same as `chat`; `tools` are not supported while streaming.
+
+    Returns:
+        LLMResult: The normalized completion.
+    """
+    with span(f"llm {agent or model}", agent=agent, stream=True) as trace_span:
+        key, hit = _from_cache(agent, model, messages, params, cache)
+        if hit is not None:
+            if hit.content:
+                yield hit.content
+            return _finish(agent, key, hit, trace_span)
+
+        client = client or get_client()
+        start = time.perf_counter()
+        attempt = 0
+        with _semaphore:
+            while True:
+                attempt += 1
+                try:
+                    response = client.chat.completions.create(
+                        model=model,
+                        messages=messages,
+                        timeout=timeout or DEFAULT_TIMEOUT,
+                        stream=True,
+                        stream_options={"include_usage": True},
+                        **params,
+                    )
+                    break
+                except Exception as e:
+                    if attempt > max_retries or not _is_retryable(e):
+                        raise
+                    delay = _backoff(attempt, e)
+                    print(f"⚠️ {agent or 'LLM'} call failed ({type(e).__name__}), retrying in {delay:.1f}s")
+                    time.sleep(delay)
+
+            parts, usage, ttft, name = [], None, None, model
+            try:
+                for chunk in response:
+                    name = getattr(chunk, "model", None) or name
+                    usage = getattr(chunk, "usage", None) or usage
+                    if not chunk.choices:
+                        continue
+                    text = chunk.choices[0].delta.content
+                    if text:
+                        if ttft is None:
+                            ttft = time.perf_counter() - start
+                        parts.append(text)
+                        yield text
+            finally:
+                # A caller that stops reading (e.g. a cancelled job) must not leave the HTTP stream open
+                close = getattr(response, "close", None)
+                if close is not None:
+                    close()
+
+        result = LLMResult(
+            content="".join(parts),
+            model=name,
+            usage={
+                "prompt_tokens": getattr(usage, "prompt_tokens", 0) or 0,
+                "completion_tokens": getattr(usage, "completion_tokens", 0) or 0,
+                "total_tokens": getattr(usage, "total_tokens", 0) or 0,
+            },
+            latency=time.perf_counter() - start,
+            attempts=attempt,
+            ttft=ttft,
+        )
+        return _finish(agent, key, result, trace_span)
+
+
+def stream_chat(messages: list[dict], model: str, agent: str = "", on_delta: Callable | None = None, **kwargs) -> LLMResult:
+    """
+    Streams a completion, passing each content delta to `on_delta(text)`, and returns the complete result.
+
+    Accepts the same arguments as `stream`.
+    """
+    deltas = stream(messages, model, agent, **kwargs)
+    try:
+        while True:
+            try:
+                text = next(deltas)
+            except StopIteration as done:
+                return done.value
+            if on_delta is not None:
+                on_delta(text)
+    finally:
+        deltas.close()
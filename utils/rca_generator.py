@@ -0,0 +1,235 @@
+"""
+Synthetic RCA dataset generator.
+
+Produces realistic, deterministic RCA records with the same columns as
+data/equipment_failure_data.csv at any scale, streamed to CSV or straight
+into SQLite in batches so memory stays flat at 10^7 rows.
+
+Usage:
+    python -m utils.rca_generator --rows 100000 --csv data/rca_100k.csv
+    python -m utils.rca_generator --rows 10000000 --sqlite data/rca_10m.db --seed 7
+"""
+# --- Standard library ---
+import argparse
+import csv
+import itertools
+import math
+import os
+import random
+import sqlite3
+import sys
+import time
+from datetime import datetime, timedelta
+
+COLUMNS = ["Asset", "Area", "Equipment", "RCA_ID", "Failure_Event", "Impact", "Downtime", "Root_Cause", "Action", "Action_Status"]
+
+# Equipment types found in each operational area
+AREAS = {
+    "Processing Plant": ["Crusher", "Jaw Crusher", "Cyclone", "Flotation Cell", "Ball Mill", "Vibrating Screen", "Apron Feeder", "Thickener"],
+    "Crushing Station": ["Cone Crusher", "Jaw Crusher", "Apron Feeder"],
+    "Haul Road": ["Dump Truck", "Grader", "Dozer", "Excavator", "Water Cart"],
+    "Underground Operations": ["Ventilation Fan", "Loader", "Personnel Transport", "Hoist System", "Drill Rig"],
+    "Rail Loading": ["Belt Conveyor", "Wagon Loader", "Track Scale", "Silo", "Dust Suppression System"],
+    "Tailings Dam": ["Pump Station", "Monitoring Station"],
+    "Water Treatment": ["Generator", "Water Pump", "Filter System", "Chemical Dosing Unit", "Clarifier"],
+    "Concentrate Storage": ["Filtration System", "Agitator", "Storage Tank"],
+}
+
+# Root causes and the corrective action recorded for each
+ROOT_CAUSES = [
+    ("Misalignment", "Implement routine maintenance"),
+    ("Overloading", "Implement interlock to prevent overloading"),
+    ("Inadequate lubrication schedule", "Replace bearing monitoring system and implement predictive maintenance program"),
+    ("Valve seal degradation due to corrosive environment", "Install corrosion-resistant valve seals and implement enhanced chemical monitoring"),
+    ("Metal fatigue from cyclic loading", "Replace components with fatigue-resistant materials"),
+    ("Hydraulic fluid contamination", "Install improved filtration system and establish fluid quality monitoring protocol"),
+    ("Inadequate cooling system maintenance", "Upgrade cooling system and establish monitoring protocol"),
+    ("Operational overload beyond design limits", "Implement load monitoring system and establish operational capacity limits"),
+    ("Inadequate feed size control", "Install automated feed size monitoring and implement pre-screening improvements"),
+    ("Sensor calibration drift", "Upgrade to vibration-resistant sensors and implement automated calibration system"),
+    ("Material blockage", "Install blockage detection and automatic clearing system"),
+    ("Operator error", "Implement automated control system with operator override protection"),
+    ("Inadequate training", "Enhance operator training program with simulation exercises"),
+    ("Improper tensioning", "Implement tension monitoring system with automatic adjustment"),
+    ("Design deficiency", "Redesign component with improved specifications"),
+    ("Seal failure due to age", "Replace all seals with upgraded materials on accelerated schedule"),
+    ("Software malfunction", "Update control software and implement redundant monitoring"),
+    ("Foundation settlement", "Reinforce foundation and implement settlement monitoring"),
+    ("Structural fatigue", "Conduct structural assessment and implement reinforcement program"),
+    ("Insufficient preventive maintenance", "Enhance preventive maintenance schedule with condition-based triggers"),
+    ("Environmental exposure damage", "Install environmental protection shields"),
+    ("Incorrect installation procedures", "Establish certified installation procedures and quality checks"),
+    ("Vibration-induced fatigue", "Install vibration dampening system and implement monitoring"),
+    ("Contaminated fuel supply", "Install fuel filtration system and establish fuel quality testing"),
+    ("Corrosion", "Apply protective coating and implement corrosion monitoring program"),
+    ("Belt misalignment", "Install automatic belt tracking system"),
+    ("Cavitation damage", "Modify pump system to prevent cavitation conditions"),
+    ("Thermal stress", "Install thermal protection system and implement temperature monitoring"),
+    ("Electrical insulation breakdown", "Upgrade electrical insulation and implement thermal monitoring"),
+]
+
+SYMPTOMS = [
+    "started to trip on high torque",
+    "experienced catastrophic bearing failure during routine operation",
+    "experienced a sudden pressure drop during transfer operation",
+    "shut down unexpectedly during night shift operations",
+    "experienced hydraulic system failure during loading operation",
+    "automatically shut down due to overheating during peak demand",
+    "showed abnormal vibration levels on the condition monitoring system",
+    "lost drive power and could not be restarted",
+    "developed a major leak that forced an emergency isolation",
+    "reported repeated control faults and erratic readings",
+]
+
+FINDINGS = [
+    "Metal fragments were detected in the oil sample analysis.",
+    "Inspection revealed cracked components and visible wear.",
+    "Investigation found blocked cooling passages and reduced flow.",
+    "Analysis identified contamination in the fluid system.",
+    "The protection system tripped the unit before secondary damage occurred.",
+    "Secondary damage occurred to the drive motor requiring replacement.",
+    "Environmental monitoring was immediately activated.",
+    "Maintenance records showed overdue inspections.",
+]
+
+MONTHS = ["January", "February", "March", "April", "May", "June", "July",
+          "August", "September", "October", "November", "December"]
+
+# Share of investigations with one, two and three root causes, as in the sample data
+ROOT_CAUSE_COUNTS = ([1, 2, 3], [0.66, 0.19, 0.15])
+
+
+def _ordinal(day: int) -> str:
+    suffix = "th" if 11 <= day <= 13 else {1: "st", 2: "nd", 3: "rd"}.get(day % 10, "th")
+    return f"{day}{suffix}"
+
+
+def _asset_name(index: int) -> str:
+    # Mine A .. Mine Z, then Mine AA, Mine AB, ...
+    name = ""
+    index += 1
+    while index:
+        index, rem = divmod(index - 1, 26)
+        name = chr(65 + rem) + name
+    return f"Mine {name}"
+
+
+def generate_records(rows: int, seed: int = 0, assets: int = 2, start: datetime = datetime(2020, 1, 1), years: int = 6):
+    """
+    Yields synthetic RCA rows as tuples in `COLUMNS` order.
+
+    Every investigation (RCA ID) has one to three root causes, each stored as a
+    separate row sharing the asset, equipment, narrative, impact and downtime,
+    like the sample dataset. The output is fully determined by `seed`.
+
+    Args:
+        rows (int): Number of rows to produce.
+        seed (int): Random seed.
+        assets (int): Number of mine sites.
+        start (datetime): Earliest failure date.
+        years (int): Span of failure dates in years.
+
+    Yields:
+        tuple: One RCA record.
+    """
+    rng = random.Random(seed)
+    asset_names = [_asset_name(i) for i in range(assets)]
+    areas = list(AREAS.items())
+    span_minutes = years * 365 * 24 * 60
+    counts, weights = ROOT_CAUSE_COUNTS
+    produced = 0
+    for rca in itertools.count(1):
+        if produced >= rows:
+            return
+        area, equipment_types = areas[rng.randrange(len(areas))]
+        equipment = f"{rng.choice(equipment_types)} {rng.randint(1, 20)}"
+        when = start + timedelta(minutes=rng.randrange(span_minutes))
+        downtime = max(1, min(240, int(rng.lognormvariate(math.log(50), 0.6))))
+        impact = int(rng.lognormvariate(math.log(1_200_000), 0.55))
+        narrative = (
+            f"At {when:%H%M}H on {_ordinal(when.day)} {MONTHS[when.month - 1]}, {when.year}, {equipment} "
+            f"{rng.choice(SYMPTOMS)}. {rng.choice(FINDINGS)} Total downtime was {downtime} hours."
+        )
+        # Older investigations are more likely to have their actions closed out
+        completed = 0.35 + 0.5 * (1 - (when - start).total_seconds() / 60 / span_minutes)
+        row_prefix = (rng.choice(asset_names), area, equipment, f"RCA {rca}", narrative, impact, downtime)
+        causes = rng.sample(ROOT_CAUSES, rng.choices(counts, weights)[0])
+        for cause, action in causes[:rows - produced]:
+            yield row_prefix + (cause, action, "Completed" if rng.random() < completed else "In Progress")
+            produced += 1
+
+
+def _batches(records, batch_size: int):
+    iterator = iter(records)
+    while batch := list(itertools.islice(iterator, batch_size)):
+        yield batch
+
+
+def write_csv(path: str, rows: int, seed: int = 0, assets: int = 2, batch_size: int = 50_000) -> int:
+    """Streams `rows` synthetic records to a CSV file with the sample dataset's header. Returns the number of rows written."""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    written = 0
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(COLUMNS)
+        for batch in _batches(generate_records(rows, seed, assets), batch_size):
+            writer.writerows(batch)
+            written += len(batch)
+    return written
+
+
+def write_sqlite(path: str, rows: int, seed: int = 0, assets: int = 2, table: str = "rca_data", batch_size: int = 50_000) -> int:
+    """
+    Streams `rows` synthetic records into a SQLite table, replacing it if it exists.
+
+    Batches are inserted with executemany inside a single transaction, with
+    journaling relaxed for the bulk load. Returns the number of rows written.
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    conn = sqlite3.connect(path)
+    try:
+        conn.execute("PRAGMA journal_mode = OFF")
+        conn.execute("PRAGMA synchronous = OFF")
+        conn.execute(f'DROP TABLE IF EXISTS "{table}"')
+        conn.execute(
+            f'CREATE TABLE "{table}" ("Asset" TEXT, "Area" TEXT, "Equipment" TEXT, "RCA_ID" TEXT, "Failure_Event" TEXT, '
+            f'"Impact" INTEGER, "Downtime" INTEGER, "Root_Cause" TEXT, "Action" TEXT, "Action_Status" TEXT)'
+        )
+        written = 0
+        insert = f'INSERT INTO "{table}" VALUES ({", ".join("?" * len(COLUMNS))})'
+        for batch in _batches(generate_records(rows, seed, assets), batch_size):
+            conn.executemany(insert, batch)
+            written += len(batch)
+        conn.commit()
+    finally:
+        conn.close()
+    return written
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--assets", type=int, default=2, help="Number of mine sites")
+    parser.add_argument("--batch-size", type=int, default=50_000)
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--csv", help="Write a CSV file")
+    target.add_argument("--sqlite", help="Write the rca_data table of a SQLite database")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    if args.csv:
+        written = write_csv(args.csv, args.rows, args.seed, args.assets, args.batch_size)
+    else:
+        written = write_sqlite(args.sqlite, args.rows, args.seed, args.assets, batch_size=args.batch_size)
+    elapsed = time.perf_counter() - start
+    print(f"✅ Wrote {written:,} rows to {args.csv or args.sqlite} in {elapsed:.1f}s ({written / elapsed:,.0f} rows/s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
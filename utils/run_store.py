@@ -0,0 +1,181 @@
+# --- Standard library ---
+import os
+import re
+from dataclasses import dataclass
+
+# --- Third-party ---
+from dotenv import find_dotenv, load_dotenv
+
+# --- Local ---
+from utils.ledger import record_context
+
+# Load environment variables
+load_dotenv(find_dotenv())
+
+# Context budgets in tokens for the context passed to each agent.
+# CONTEXT_BUDGETS overrides them per agent, e.g. "writer_agent=12000,editor_agent=6000".
+CONTEXT_BUDGET = int(os.getenv("CONTEXT_BUDGET", "6000"))
+SUMMARY_TOKENS = int(os.getenv("CONTEXT_SUMMARY_TOKENS", "150"))
+DEFAULT_BUDGETS = {"research_agent": 1500, "medical_agent": 1500, "writer_agent": 8000, "editor_agent": 8000}
+
+# Agents whose output is a draft of the report; everything else is treated as research
+DRAFTING_AGENTS = {"writer_agent", "editor_agent"}
+
+_URL = re.compile(r"https?://[^\s)\]>\"'`]+")
+
+
+def _budgets() -> dict:
+    budgets = dict(DEFAULT_BUDGETS)
+    for item in os.getenv("CONTEXT_BUDGETS", "").split(","):
+        agent, _, value = item.partition("=")
+        if agent.strip() and value.strip():
+            budgets[agent.strip()] = int(value)
+    return budgets
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token estimate (about four characters per token)."""
+    return len(text) // 4
+
+
+def summarize(text: str, max_tokens: int = SUMMARY_TOKENS) -> str:
+    """
+    Extractive summary: the headings and first sentence of each paragraph, in order, up to `max_tokens`.
+    """
+    picked, used = [], 0
+    for block in re.split(r"\n\s*\n", text.strip()):
+        block = block.strip()
+        if not block:
+            continue
+        if block.startswith("#"):
+            line = block.splitlines()[0].lstrip("#").strip()
+        else:
+            line = re.split(r"(?<=[.!?])\s+", " ".join(block.split()), maxsplit=1)[0]
+        cost = estimate_tokens(line) + 1
+        if used + cost > max_tokens:
+            break
+        picked.append(line)
+        used += cost
+    return " ".join(picked) if picked else text[: max_tokens * 4]
+
+
+def extract_sources(texts: list[str]) -> list[str]:
+    """Lines that cite a URL, deduplicated by URL in first-seen order."""
+    seen, sources = set(), []
+    for text in texts:
+        for line in text.splitlines():
+            for url in _URL.findall(line):
+                url = url.rstrip(".,;:")
+                if url not in seen:
+                    seen.add(url)
+                    line = line.strip().lstrip("-*• ").strip()
+                    sources.append(line if len(line) <= 300 else url)
+    return sources
+
+
+@dataclass
+class Artifact:
+    index: int
+    step_id: int
+    agent: str
+    task: str
+    output: str
+
+
+class RunStore:
+    """
+    Keeps the full output of every step of a run and builds compact context for the next steps.
+
+    A step receives the steps it depends on directly and the latest draft in
+    full, summaries of its other earlier steps and a deduplicated list of the
+    sources they cite, trimmed to the budget of the agent that runs it.
+
+    Args:
+        steps (list[dict]): Normalized plan steps, see `agents.planner_agent.normalize_plan`.
+        budgets (dict, optional): Context budget per agent, overriding CONTEXT_BUDGETS.
+    """
+
+    def __init__(self, steps: list[dict], budgets: dict | None = None):
+        self.steps = steps
+        self.budgets = {**_budgets(), **(budgets or {})}
+        self.artifacts: dict[int, Artifact] = {}
+        self._position = {s["id"]: i for i, s in enumerate(steps)}
+
+    def add(self, index: int, agent: str, output: str) -> None:
+        step = self.steps[index]
+        self.artifacts[step["id"]] = Artifact(index, step["id"], agent, step["task"], output)
+
+    def ancestors(self, index: int) -> list[Artifact]:
+        """Completed steps `index` depends on, directly or transitively, in plan order."""
+        needed, stack = set(), list(self.steps[index]["depends_on"])
+        while stack:
+            dep = stack.pop()
+            if dep not in needed:
+                needed.add(dep)
+                stack.extend(self.steps[self._position[dep]]["depends_on"])
+        return sorted((self.artifacts[d] for d in needed if d in self.artifacts), key=lambda a: a.index)
+
+    def fallback_output(self, index: int) -> str:
+        """
+        Output used when step `index` is skipped to save budget: the latest draft it builds on,
+        or the outputs of the steps it depends on.
+        """
+        ancestors = self.ancestors(index)
+        drafts = [a for a in ancestors if a.agent in DRAFTING_AGENTS]
+        if drafts:
+            return drafts[-1].output
+        direct = [a.output for a in ancestors if a.step_id in self.steps[index]["depends_on"]]
+        return "\n\n".join(direct) or "⚠️ Step skipped: run budget exhausted."
+
+    @staticmethod
+    def _render(artifact: Artifact, text: str, summary: bool = False) -> str:
+        label = " (summary)" if summary else ""
+        return f"Step {artifact.index+1} executed by {artifact.agent}{label}:\n{text}"
+
+    def full_context(self, index: int) -> str:
+        """
+        Every completed earlier step in plan order and in full, whether `index` depends on it or not:
+        the whole history the sequential executor used to pass, the baseline the savings are measured against.
+        """
+        earlier = sorted((a for a in self.artifacts.values() if a.index < index), key=lambda a: a.index)
+        return "\n".join(self._render(a, a.output) for a in earlier)
+
+    def context_for(self, index: int, agent: str) -> str:
+        """
+        Builds the compacted context for step `index` run by `agent` and records the savings in the run ledger.
+
+        Returns:
+            str: Context text within the agent's token budget.
+        """
+        ancestors = self.ancestors(index)
+        if not ancestors:
+            return ""
+        budget = self.budgets.get(agent, CONTEXT_BUDGET)
+        direct = set(self.steps[index]["depends_on"])
+        drafts = [a for a in ancestors if a.agent in DRAFTING_AGENTS]
+        latest_draft = drafts[-1].step_id if drafts else None
+
+        # Full text for referenced steps and the latest draft, summaries for the rest
+        full = {a.step_id for a in ancestors if a.step_id in direct or a.step_id == latest_draft}
+
+        def build() -> str:
+            parts = [self._render(a, a.output) if a.step_id in full else self._render(a, summarize(a.output), True)
+                     for a in ancestors]
+            sources = extract_sources([a.output for a in ancestors if a.step_id not in full])
+            if sources:
+                parts.append("Sources gathered so far:\n" + "\n".join(f"- {s}" for s in sources))
+            return "\n".join(parts)
+
+        context = build()
+        # Over budget: summarize referenced steps oldest first, keeping the latest draft in full
+        for a in ancestors:
+            if estimate_tokens(context) <= budget:
+                break
+            if a.step_id in full and a.step_id != latest_draft:
+                full.discard(a.step_id)
+                context = build()
+        if estimate_tokens(context) > budget:
+            context = context[: budget * 4]
+
+        record_context(agent, estimate_tokens(self.full_context(index)), estimate_tokens(context))
+        return context
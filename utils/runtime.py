@@ -0,0 +1,122 @@
+# --- Standard library ---
+import os
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from dataclasses import dataclass, field, replace
+from typing import Callable
+
+# --- Third-party ---
+from dotenv import find_dotenv, load_dotenv
+
+# --- Local ---
+from utils.budget import RunBudget
+from utils.llm_gateway import DEFAULT_TIMEOUT, LLMResult, chat, stream_chat
+from utils.ledger import RunLedger, current_ledger, run_scope
+from utils.tracing import Tracer, current_tracer, trace_scope
+
+# Load environment variables
+load_dotenv(find_dotenv())
+
+# Maximum number of plan steps executed at the same time
+EXECUTOR_MAX_WORKERS = int(os.getenv("EXECUTOR_MAX_WORKERS", "3"))
+
+_current = ContextVar("runtime", default=None)
+
+
+@dataclass
+class RuntimeContext:
+    """
+    Everything an agent needs to run, passed explicitly instead of read from Streamlit.
+
+    The Streamlit pages build one from their session state; benchmarks, scripts
+    and background workers build their own. Fields left as None fall back to
+    the process-wide defaults (shared gateway client, LLM_CACHE, CONTEXT_BUDGETS).
+
+    Args:
+        client: OpenAI-compatible client; None uses the gateway's shared client.
+        agent_model (str): Model used by the research, medical, writer and editor agents.
+        planner_model (str): Model used by the planner.
+        router_model (str): Model used to route steps the planner and local rules could not assign.
+        page (str): "researcher" or "medical", selects the planner prompt and agent registry.
+        max_workers (int): Maximum number of plan steps running at once.
+        context_budgets (dict, optional): Step context budget in tokens per agent, see `utils.run_store`.
+        cache (bool, optional): Force the LLM response cache on or off for every agent.
+        budget (RunBudget): Deadline, token, model call and tool call limits of the run (RUN_* settings by default).
+        run_id (str, optional): Checkpoint id, see `utils.checkpoint.run_key`.
+        progress (Callable, optional): Receives progress events as `progress(event, **data)`.
+        ledger (RunLedger, optional): Run ledger, set by `activate`.
+        tracer (Tracer, optional): Tracer, set by `activate`.
+    """
+    client: object = None
+    agent_model: str = "gpt-4o-mini"
+    planner_model: str = "gpt-5"
+    router_model: str = "gpt-5-mini"
+    page: str = "researcher"
+    max_workers: int = EXECUTOR_MAX_WORKERS
+    context_budgets: dict | None = None
+    cache: bool | None = None
+    budget: RunBudget = field(default_factory=RunBudget.from_env)
+    run_id: str | None = None
+    progress: Callable | None = field(default=None, repr=False)
+    ledger: RunLedger | None = field(default=None, repr=False)
+    tracer: Tracer | None = field(default=None, repr=False)
+
+    def emit(self, event: str, **data) -> None:
+        """Reports a progress event, if anyone is listening."""
+        if self.progress is not None:
+            self.progress(event, **data)
+
+    def for_step(self, index: int) -> "RuntimeContext":
+        """A copy whose progress events carry the plan step `index`, for the agent running that step."""
+        if self.progress is None:
+            return self
+        return replace(self, progress=lambda event, **data: self.progress(event, index=index, **data))
+
+    def chat(self, messages: list[dict], model: str, agent: str = "", stream: bool = False, **params) -> LLMResult:
+        """
+        Sends a chat completion through the gateway with this runtime's client and cache setting.
+
+        The run budget is enforced here, so it covers every agent: the call raises
+        `BudgetExceeded` once a budget is used up, switches to the fallback model
+        when it runs low and never waits past the deadline.
+
+        With `stream` and a progress callback, the completion is streamed and
+        reported as a "stream_started" event followed by "delta" events
+        carrying the new text.
+        """
+        self.budget.check(agent)
+        model = self.budget.model_for(agent, model)
+        if self.budget.deadline is not None:
+            params.setdefault("timeout", self.budget.timeout(DEFAULT_TIMEOUT))
+        if stream and self.progress is not None:
+            self.emit("stream_started", agent=agent)
+            return stream_chat(messages, model=model, agent=agent, client=self.client, cache=self.cache,
+                               on_delta=lambda text: self.emit("delta", agent=agent, text=text), **params)
+        return chat(messages, model=model, agent=agent, client=self.client, cache=self.cache, **params)
+
+    @contextmanager
+    def activate(self, trace_name: str | None = None):
+        """
+        Makes this runtime current for the duration of the block, with a run ledger and,
+        when `trace_name` is given, a trace. The budget's deadline starts counting here.
+
+        Yields:
+            RuntimeContext: A copy with `ledger`, `tracer` and a started `budget`.
+        """
+        with run_scope() as ledger:
+            scope = trace_scope(trace_name, run_id=ledger.run_id) if trace_name else nullcontext(current_tracer())
+            with scope as tracer:
+                runtime = replace(self, ledger=ledger, tracer=tracer, budget=self.budget.start())
+                token = _current.set(runtime)
+                try:
+                    yield runtime
+                finally:
+                    _current.reset(token)
+
+
+def current_runtime() -> RuntimeContext:
+    """Returns the active runtime, or a default one bound to the current ledger and tracer."""
+    runtime = _current.get()
+    if runtime is None:
+        runtime = RuntimeContext(ledger=current_ledger(), tracer=current_tracer())
+    return runtime
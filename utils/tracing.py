@@ -0,0 +1,213 @@
+# --- Standard library ---
+import json
+import os
+import secrets
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+
+# --- Third-party ---
+from dotenv import find_dotenv, load_dotenv
+
+# Load environment variables
+load_dotenv(find_dotenv())
+
+# Trace output settings
+# TRACE_DIR: directory where finished runs are written; tracing is off when unset.
+# TRACE_FORMAT: "chrome" (trace-event JSON, opens in Perfetto/chrome://tracing) or "otlp" (OTLP/JSON).
+TRACE_DIR = os.getenv("TRACE_DIR")
+TRACE_FORMAT = os.getenv("TRACE_FORMAT", "chrome")
+SERVICE_NAME = "agentic-workflows"
+
+_current_tracer = ContextVar("tracer", default=None)
+_current_span = ContextVar("span", default=None)
+
+
+@dataclass
+class Span:
+    name: str
+    trace_id: str
+    span_id: str
+    parent_id: str | None
+    start_ns: int
+    end_ns: int = 0
+    thread_id: int = 0
+    attributes: dict = field(default_factory=dict)
+    error: str | None = None
+
+    def set(self, key: str, value) -> None:
+        self.attributes[key] = value
+
+
+class _NoopSpan:
+    def set(self, key: str, value) -> None:
+        pass
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+class Tracer:
+    """
+    Collects nested spans for one workflow run.
+
+    Args:
+        name (str): Name of the root span.
+        run_id (str, optional): Identifier used in the output file name.
+    """
+
+    def __init__(self, name: str = "run", run_id: str | None = None):
+        self.name = name
+        self.run_id = run_id or secrets.token_hex(6)
+        self.trace_id = secrets.token_hex(16)
+        self.spans: list[Span] = []
+        self._lock = threading.Lock()
+        # Anchor the monotonic clock to wall-clock time once per trace
+        self._epoch_ns = time.time_ns() - time.perf_counter_ns()
+
+    def _now(self) -> int:
+        return self._epoch_ns + time.perf_counter_ns()
+
+    @contextmanager
+    def span(self, name: str, **attributes):
+        parent = _current_span.get()
+        span = Span(
+            name=name,
+            trace_id=self.trace_id,
+            span_id=secrets.token_hex(8),
+            parent_id=parent.span_id if parent is not None else None,
+            start_ns=self._now(),
+            thread_id=threading.get_ident(),
+            attributes=dict(attributes),
+        )
+        token = _current_span.set(span)
+        try:
+            yield span
+        except Exception as e:
+            span.error = f"{type(e).__name__}: {e}"
+            raise
+        except BaseException as e:
+            # Cancelled or abandoned (a cancelled job, a stream closed early): not a failure, but cut short
+            span.set("interrupted", type(e).__name__)
+            raise
+        finally:
+            span.end_ns = self._now()
+            _current_span.reset(token)
+            with self._lock:
+                self.spans.append(span)
+
+    def to_chrome_trace(self) -> dict:
+        """Returns the spans as Chrome trace-event JSON (complete "X" events)."""
+        pid = os.getpid()
+        events = []
+        for s in sorted(self.spans, key=lambda s: s.start_ns):
+            args = {k: _jsonable(v) for k, v in s.attributes.items()}
+            if s.error:
+                args["error"] = s.error
+            events.append({
+                "name": s.name,
+                "cat": s.name.split(" ")[0],
+                "ph": "X",
+                "ts": s.start_ns / 1000,
+                "dur": (s.end_ns - s.start_ns) / 1000,
+                "pid": pid,
+                "tid": s.thread_id,
+                "args": args,
+            })
+        return {"traceEvents": events, "displayTimeUnit": "ms", "otherData": {"run_id": self.run_id}}
+
+    def to_otlp(self) -> dict:
+        """Returns the spans as an OTLP/JSON ExportTraceServiceRequest."""
+        spans = []
+        for s in sorted(self.spans, key=lambda s: s.start_ns):
+            span = {
+                "traceId": s.trace_id,
+                "spanId": s.span_id,
+                "name": s.name,
+                "kind": 1,
+                "startTimeUnixNano": str(s.start_ns),
+                "endTimeUnixNano": str(s.end_ns),
+                "attributes": [_otlp_attribute(k, v) for k, v in s.attributes.items()],
+                "status": {"code": 2, "message": s.error} if s.error else {"code": 1},
+            }
+            if s.parent_id:
+                span["parentSpanId"] = s.parent_id
+            spans.append(span)
+        return {
+            "resourceSpans": [{
+                "resource": {"attributes": [_otlp_attribute("service.name", SERVICE_NAME)]},
+                "scopeSpans": [{"scope": {"name": SERVICE_NAME}, "spans": spans}],
+            }]
+        }
+
+    def export(self, path: str, fmt: str = "chrome") -> str:
+        """Writes the trace to `path` in "chrome" or "otlp" format and returns the path."""
+        data = self.to_otlp() if fmt == "otlp" else self.to_chrome_trace()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        return path
+
+
+def _jsonable(value):
+    if isinstance(value, (str, int, float, bool)) or value is None:
+        return value
+    return str(value)
+
+
+def _otlp_attribute(key: str, value) -> dict:
+    if isinstance(value, bool):
+        return {"key": key, "value": {"boolValue": value}}
+    if isinstance(value, int):
+        return {"key": key, "value": {"intValue": str(value)}}
+    if isinstance(value, float):
+        return {"key": key, "value": {"doubleValue": value}}
+    return {"key": key, "value": {"stringValue": str(value)}}
+
+
+def current_tracer() -> Tracer | None:
+    return _current_tracer.get()
+
+
+@contextmanager
+def span(name: str, **attributes):
+    """
+    Opens a span on the current tracer, nested under the current span.
+    Yields a no-op span when no trace is active, so call sites never need to check.
+    """
+    tracer = _current_tracer.get()
+    if tracer is None:
+        yield _NOOP_SPAN
+        return
+    with tracer.span(name, **attributes) as s:
+        yield s
+
+
+@contextmanager
+def trace_scope(name: str, run_id: str | None = None, path: str | None = None, fmt: str | None = None):
+    """
+    Traces the enclosed block as one run.
+
+    The trace is written to `path`, or to TRACE_DIR/<run_id>.json when TRACE_DIR is set.
+    If a trace is already active the block becomes a span of it instead.
+    """
+    if _current_tracer.get() is not None:
+        with span(name):
+            yield _current_tracer.get()
+        return
+
+    tracer = Tracer(name, run_id)
+    token = _current_tracer.set(tracer)
+    try:
+        with tracer.span(name):
+            yield tracer
+    finally:
+        _current_tracer.reset(token)
+        path = path or (os.path.join(TRACE_DIR, f"{tracer.run_id}.json") if TRACE_DIR else None)
+        if path:
+            tracer.export(path, fmt or TRACE_FORMAT)
+            print(f"🧭 Trace written to {path}")